@@ -6,4 +6,6 @@ class ChaincodeStatus(Enum):
     INSTALLED = 'INSTALLED'
     APPROVED = 'APPROVED'
     COMMITTED = 'COMMITTED'
+    # A query the status depends on timed out.
+    UNKNOWN = 'UNKNOWN'
 
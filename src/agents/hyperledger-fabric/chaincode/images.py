@@ -0,0 +1,72 @@
+"""
+Presence cache for the images peers need to build and run chaincode.
+
+Peers build chaincode with fabric-ccenv and run Go chaincode on fabric-baseos
+from the Docker daemon shared with the agent. Instead of pulling them before
+every install, the local image store is checked and the result is trusted for
+BUILDER_IMAGE_CACHE_TTL seconds. Images are only pulled when they are missing.
+"""
+import logging
+import threading
+import time
+from typing import Dict, List
+
+import docker
+from docker.errors import DockerException, ImageNotFound
+
+from hyperledger_fabric.metrics import DOCKER_CALL_DURATION
+from hyperledger_fabric.settings import BUILDER_IMAGE_CACHE_TTL, BUILDER_IMAGES, PREWARM_BUILDER_IMAGES
+
+LOG = logging.getLogger(__name__)
+docker_client = docker.DockerClient("unix:///var/run/docker.sock")
+
+# Image name -> time it was last seen in the local image store.
+_present: Dict[str, float] = {}
+_lock = threading.Lock()
+_prewarm_started = False
+
+
+def ensure_image(image: str, refresh: bool = False):
+    """Make sure image is in the local image store, pulling it if it is missing."""
+    # One lock for all images, concurrent installs wait for a single pull.
+    with _lock:
+        checked_at = _present.get(image)
+        if not refresh and checked_at is not None and time.monotonic() - checked_at < BUILDER_IMAGE_CACHE_TTL:
+            return
+
+        try:
+            with DOCKER_CALL_DURATION.labels("images.get").time():
+                docker_client.images.get(image)
+        except ImageNotFound:
+            repository, tag = image.rsplit(":", 1)
+            LOG.info("Pulling %s", image)
+            with DOCKER_CALL_DURATION.labels("images.pull").time():
+                docker_client.images.pull(repository, tag=tag)
+        _present[image] = time.monotonic()
+
+
+def ensure_builder_images(refresh: bool = False):
+    for image in BUILDER_IMAGES:
+        ensure_image(image, refresh)
+
+
+def prewarm_builder_images() -> List[str]:
+    """Check or pull every builder image and return the ones that are still unavailable."""
+    unavailable = []
+    for image in BUILDER_IMAGES:
+        try:
+            ensure_image(image, refresh=True)
+        except DockerException:
+            LOG.exception("Failed to prepare %s", image)
+            unavailable.append(image)
+    return unavailable
+
+
+def start_prewarm():
+    """Pre-warm the builder images in the background, once per process, unless disabled."""
+    global _prewarm_started
+    with _lock:
+        if _prewarm_started or not PREWARM_BUILDER_IMAGES:
+            return
+        _prewarm_started = True
+    threading.Thread(target=prewarm_builder_images, name="builder-image-prewarm", daemon=True).start()
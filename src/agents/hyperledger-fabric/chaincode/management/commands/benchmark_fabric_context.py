@@ -0,0 +1,59 @@
+import os
+import timeit
+
+import yaml
+from django.core.management.base import BaseCommand
+
+from hyperledger_fabric.context import FabricContext, get_fabric_context
+from hyperledger_fabric.settings import CRYPTO_CONFIG
+
+
+def _parse_fabric_context() -> FabricContext:
+    # What every service call used to do before the context was cached.
+    with open(
+        CRYPTO_CONFIG,
+        "r",
+        encoding="utf-8",
+    ) as f:
+        return FabricContext(yaml.safe_load(f))
+
+
+def _status_setup(load) -> None:
+    # aget_chaincodes_status and aget_chaincode_commit_readiness each load it.
+    for _ in range(2):
+        context = load()
+        context.peer.env
+        context.orderer.address
+        context.orderer.ca_file
+
+
+def _approve_setup(load) -> None:
+    context = load()
+    context.peer.env
+    context.orderer.address
+    context.orderer.ca_file
+
+
+class Command(BaseCommand):
+    help = "Compare parsing crypto-config.yaml per call with the cached Fabric context."
+
+    def add_arguments(self, parser):
+        parser.add_argument("-n", "--number", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not os.path.exists(CRYPTO_CONFIG):
+            self.stderr.write("{} does not exist, create an organization first.".format(CRYPTO_CONFIG))
+            return
+
+        number = options["number"]
+        for name, setup in (("status", _status_setup), ("approve", _approve_setup)):
+            parsed = timeit.timeit(lambda: setup(_parse_fabric_context), number=number)
+            cached = timeit.timeit(lambda: setup(get_fabric_context), number=number)
+            self.stdout.write(
+                "{}: {:.1f} us/call parsed, {:.1f} us/call cached, {:.1f}x".format(
+                    name,
+                    parsed / number * 1e6,
+                    cached / number * 1e6,
+                    parsed / cached,
+                )
+            )
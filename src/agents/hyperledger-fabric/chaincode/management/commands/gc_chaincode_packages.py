@@ -0,0 +1,55 @@
+import glob
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from hyperledger_fabric.settings import CHAINCODE_PACKAGE_DIR
+from job.enums import JobStatus
+from job.models import Job
+
+
+class Command(BaseCommand):
+    help = "Delete chaincode packages from the package store that have not been uploaded or used recently."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=float,
+            default=30,
+            help="Delete packages last uploaded more than this many days ago (default: 30)")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only list the packages that would be deleted")
+
+    def handle(self, *args, **options):
+        cutoff = time.time() - options["days"] * 24 * 60 * 60
+
+        # Packages of jobs that have not finished yet are still needed.
+        in_use = {
+            arg
+            for job_args in Job.objects.filter(
+                status__in=[JobStatus.PENDING.name, JobStatus.RUNNING.name]
+            ).values_list("args", flat=True)
+            for arg in job_args
+            if isinstance(arg, str)
+        }
+
+        deleted, freed = 0, 0
+        for path in sorted(
+                glob.glob(os.path.join(CHAINCODE_PACKAGE_DIR, "*.tar.gz"))
+                + glob.glob(os.path.join(CHAINCODE_PACKAGE_DIR, "*.part"))):
+            stat = os.stat(path)
+            if stat.st_mtime >= cutoff or path in in_use:
+                continue
+            self.stdout.write("{} {}".format("Would delete" if options["dry_run"] else "Deleting", path))
+            if not options["dry_run"]:
+                os.remove(path)
+            deleted += 1
+            freed += stat.st_size
+
+        self.stdout.write(self.style.SUCCESS("{} {} packages, {:.1f} MiB".format(
+            "Would delete" if options["dry_run"] else "Deleted",
+            deleted,
+            freed / 1024 / 1024)))
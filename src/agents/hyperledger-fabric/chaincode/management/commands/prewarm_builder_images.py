@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from chaincode.images import prewarm_builder_images
+from hyperledger_fabric.settings import BUILDER_IMAGES
+
+
+class Command(BaseCommand):
+    help = "Check the local image store for the chaincode builder images and pull the missing ones."
+
+    def handle(self, *args, **options):
+        unavailable = prewarm_builder_images()
+        if unavailable:
+            raise CommandError("Unavailable images: {}".format(", ".join(unavailable)))
+        self.stdout.write(self.style.SUCCESS("Ready: {}".format(", ".join(BUILDER_IMAGES))))
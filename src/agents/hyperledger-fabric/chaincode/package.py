@@ -0,0 +1,103 @@
+"""
+Single pass ingest of uploaded chaincode packages into a content addressed store.
+
+The upload is copied to disk, hashed and searched for metadata.json while it
+is read once, so neither a second read nor `peer lifecycle chaincode
+calculatepackageid` is needed. Fabric derives the package ID the same way,
+from the label and the SHA-256 of the package bytes.
+
+Packages are stored as <sha256>.tar.gz, so the same bytes uploaded again, for
+any channel, end up in the same file.
+"""
+import hashlib
+import json
+import os
+import tarfile
+import tempfile
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, Optional
+
+
+@dataclass(frozen=True)
+class ChaincodePackage:
+    path: str
+    sha256: str
+    metadata: Dict[str, Any]
+
+    @property
+    def label(self) -> str:
+        return self.metadata["label"]
+
+    @property
+    def language(self) -> str:
+        return self.metadata["type"]
+
+    @property
+    def package_id(self) -> str:
+        return "{}:{}".format(self.label, self.sha256)
+
+
+class _TeeReader:
+    """File-like reader that copies and hashes everything read from source."""
+
+    def __init__(self, source: BinaryIO, sink: BinaryIO):
+        self.source = source
+        self.sink = sink
+        self.hash = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.source.read(size)
+        self.sink.write(data)
+        self.hash.update(data)
+        return data
+
+    def drain(self, chunk_size: int = 1024 * 1024):
+        while self.read(chunk_size):
+            pass
+
+
+def get_package_path(directory: str, sha256: str) -> str:
+    return os.path.join(directory, "{}.tar.gz".format(sha256))
+
+
+def ingest_package(source: BinaryIO, directory: str) -> ChaincodePackage:
+    """
+    Stream source into the package store in directory and return its path, hash and metadata.
+
+    The file is written to a temporary name and renamed when complete, so a
+    failed upload never leaves a partial package behind. If the store already
+    has the package, the copy is dropped and the stored one is touched, which
+    keeps it from being garbage collected. Raise ValueError if the package is
+    not a gzipped tar with a metadata.json.
+    """
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as sink:
+            reader = _TeeReader(source, sink)
+            metadata: Optional[Dict[str, Any]] = None
+            try:
+                # "r|gz" reads the archive as a stream, members can only be visited in order.
+                with tarfile.open(fileobj=reader, mode="r|gz") as tar:
+                    for member in tar:
+                        if member.name.endswith("metadata.json"):
+                            metadata = json.loads(tar.extractfile(member).read().decode("utf-8"))
+                            break
+            except (tarfile.TarError, EOFError, OSError, ValueError) as e:
+                raise ValueError("Chaincode package is not a valid tar.gz file: {}".format(e))
+            # The rest of the archive still has to be stored and hashed.
+            reader.drain()
+        if metadata is None:
+            raise ValueError("Chaincode package has no metadata.json")
+        sha256 = reader.hash.hexdigest()
+        path = get_package_path(directory, sha256)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            os.utime(path)
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return ChaincodePackage(path=path, sha256=sha256, metadata=metadata)
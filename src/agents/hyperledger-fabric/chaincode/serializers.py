@@ -1,28 +1,35 @@
-import os
-import threading
-
-from django.core.files.storage import FileSystemStorage
+from adrf import serializers as async_serializers
 from rest_framework import serializers
 
-from chaincode.service import create_chaincode, install_chaincode, approve_chaincode, get_chaincode_package_id, \
-    commit_chaincode, get_metadata, get_chaincode_status, get_chaincode_commit_readiness
-from hyperledger_fabric.settings import CELLO_HOME
+from chaincode.package import ChaincodePackage, ingest_package
+from chaincode.service import create_chaincode, install_chaincode, aapprove_chaincode, \
+    acommit_chaincode, aget_chaincode_status, aget_chaincode_commit_readiness, aget_chaincodes_status
+from hyperledger_fabric.settings import CHAINCODE_PACKAGE_DIR
+from job.serializers import JobIDSerializer
+from job.service import submit_job
+
+
+def _save_package(file_obj) -> ChaincodePackage:
+    try:
+        return ingest_package(file_obj, CHAINCODE_PACKAGE_DIR)
+    except ValueError as e:
+        raise serializers.ValidationError({"file": [str(e)]})
 
 
 class ChaincodeCommitReadinessResponse(serializers.Serializer):
     approvals = serializers.DictField(help_text="Chaincode Commit Readiness")
 
 
-class ChaincodeCommitReadinessRequest(serializers.Serializer):
+class ChaincodeCommitReadinessRequest(async_serializers.Serializer):
     channel = serializers.CharField(help_text="Chaincode Channel Name")
     name = serializers.CharField(help_text="Chaincode Name")
     version = serializers.CharField(help_text="Chaincode Version")
     sequence = serializers.IntegerField(help_text="Chaincode Sequence")
     init_required = serializers.BooleanField(help_text="Chaincode Required Initialization")
 
-    def create(self, validated_data):
+    async def acreate(self, validated_data):
         return ChaincodeCommitReadinessResponse(dict(
-            approvals=get_chaincode_commit_readiness(
+            approvals=await aget_chaincode_commit_readiness(
                 validated_data["channel"],
                 validated_data["name"],
                 validated_data["version"],
@@ -34,22 +41,48 @@ class ChaincodeStatusResponse(serializers.Serializer):
     status = serializers.CharField(help_text="Chaincode Status")
 
 
-class ChaincodeStatusRequest(serializers.Serializer):
+class ChaincodeStatusRequest(async_serializers.Serializer):
     package_id = serializers.CharField(help_text="Chaincode Package ID")
     channel = serializers.CharField(help_text="Chaincode Channel Name")
     name = serializers.CharField(help_text="Chaincode Name")
     sequence = serializers.IntegerField(help_text="Chaincode Sequence")
 
-    def create(self, validated_data):
+    async def acreate(self, validated_data):
         return ChaincodeStatusResponse(dict(
-            status=get_chaincode_status(
+            status=(await aget_chaincode_status(
                 validated_data["package_id"],
                 validated_data["channel"],
                 validated_data["name"],
-                validated_data["sequence"]).name))
+                validated_data["sequence"])).name))
+
 
+class ChaincodeBulkStatusItem(serializers.Serializer):
+    package_id = serializers.CharField(help_text="Chaincode Package ID")
+    channel = serializers.CharField(help_text="Chaincode Channel Name")
+    name = serializers.CharField(help_text="Chaincode Name")
+    sequence = serializers.IntegerField(help_text="Chaincode Sequence")
+    version = serializers.CharField(help_text="Chaincode Version", required=False)
+    init_required = serializers.BooleanField(help_text="Chaincode Required Initialization", default=False)
+
+
+class ChaincodeBulkStatusResult(ChaincodeBulkStatusItem):
+    status = serializers.CharField(help_text="Chaincode Status")
+    approvals = serializers.DictField(help_text="Chaincode Commit Readiness", required=False)
 
-class ChaincodeResponseSerializer(serializers.Serializer):
+
+class ChaincodeBulkStatusResponse(serializers.Serializer):
+    chaincodes = ChaincodeBulkStatusResult(many=True, help_text="Chaincode Statuses")
+
+
+class ChaincodeBulkStatusRequest(async_serializers.Serializer):
+    chaincodes = ChaincodeBulkStatusItem(many=True, help_text="Chaincodes")
+
+    async def acreate(self, validated_data):
+        return ChaincodeBulkStatusResponse(dict(
+            chaincodes=await aget_chaincodes_status(validated_data["chaincodes"])))
+
+
+class ChaincodeResponseSerializer(JobIDSerializer):
     label = serializers.CharField(help_text="Chaincode Label")
     language = serializers.CharField(help_text="Chaincode Language")
     package_id = serializers.CharField(help_text="Chaincode Package ID")
@@ -69,31 +102,23 @@ class ChaincodeCreationSerializer(serializers.Serializer):
         version = validated_data["version"]
         sequence = validated_data["sequence"]
         channel_name = validated_data["channel_name"]
-        file_obj = validated_data["file"]
-        chaincode_dir = os.path.join(CELLO_HOME, channel_name, "chaincodes")
-        os.makedirs(chaincode_dir, exist_ok=True)
-        fs = FileSystemStorage(location=chaincode_dir)
-        filename = fs.save("{}_{}_{}.tar.gz".format(name, version, sequence), file_obj)
-        file_path = fs.path(filename)
-
-        metadata = get_metadata(file_path)
-        package_id = get_chaincode_package_id(file_path)
-        threading.Thread(
-            target=create_chaincode,
-            args=(
-                name,
-                version,
-                sequence,
-                channel_name,
-                file_path,
-                package_id,
-                validated_data["init_required"],
-                validated_data.get("signature_policy")),
-            daemon=True).start()
+        package = _save_package(validated_data["file"])
+
+        job = submit_job(
+            create_chaincode,
+            name,
+            version,
+            sequence,
+            channel_name,
+            package.path,
+            package.package_id,
+            validated_data["init_required"],
+            validated_data.get("signature_policy"))
         return ChaincodeResponseSerializer(dict(
-            label=metadata["label"],
-            language=metadata["type"],
-            package_id=package_id,
+            label=package.label,
+            language=package.language,
+            package_id=package.package_id,
+            job_id=job.id,
         ))
 
 
@@ -103,25 +128,22 @@ class ChaincodeInstallationSerializer(serializers.Serializer):
     sequence = serializers.IntegerField(help_text="Chaincode Sequence")
     channel_name = serializers.CharField(help_text="Chaincode Channel Name")
     file = serializers.FileField(help_text="Chaincode File")
+    parallelism = serializers.IntegerField(
+        help_text="How many peers install the chaincode at the same time",
+        required=False,
+        min_value=1)
 
     def create(self, validated_data):
-        chaincode_dir = os.path.join(CELLO_HOME, validated_data["channel_name"], "chaincodes")
-        os.makedirs(chaincode_dir, exist_ok=True)
-        fs = FileSystemStorage(location=chaincode_dir)
-        filename = fs.save(
-            "{}_{}_{}.tar.gz".format(
-                validated_data["name"],
-                validated_data["version"],
-                validated_data["sequence"]),
-            validated_data["file"])
+        package = _save_package(validated_data["file"])
 
-        threading.Thread(
-            target=install_chaincode,
-            args=(fs.path(filename),),
-            daemon=True).start()
-        return self
+        return JobIDSerializer(dict(
+            job_id=submit_job(
+                install_chaincode,
+                package.path,
+                validated_data.get("parallelism"),
+                package.package_id).id))
 
-class ChaincodeApprovementSerializer(serializers.Serializer):
+class ChaincodeApprovementSerializer(async_serializers.Serializer):
     name = serializers.CharField(help_text="Chaincode Name")
     version = serializers.CharField(help_text="Chaincode Version")
     sequence = serializers.IntegerField(help_text="Chaincode Sequence")
@@ -130,8 +152,8 @@ class ChaincodeApprovementSerializer(serializers.Serializer):
     init_required = serializers.BooleanField(help_text="Chaincode Required Initialization")
     signature_policy = serializers.CharField(help_text="Chaincode Signature Policy", required=False, allow_null=True)
 
-    def create(self, validated_data):
-        approve_chaincode(
+    async def acreate(self, validated_data):
+        await aapprove_chaincode(
             validated_data["name"],
             validated_data["channel_name"],
             validated_data["version"],
@@ -142,14 +164,14 @@ class ChaincodeApprovementSerializer(serializers.Serializer):
         return self
 
 
-class ChaincodeCommitSerializer(serializers.Serializer):
+class ChaincodeCommitSerializer(async_serializers.Serializer):
     name = serializers.CharField(help_text="Chaincode Name")
     version = serializers.CharField(help_text="Chaincode Version")
     sequence = serializers.IntegerField(help_text="Chaincode Sequence")
     channel_name = serializers.CharField(help_text="Chaincode Channel Name")
 
-    def create(self, validated_data):
-        commit_chaincode(
+    async def acreate(self, validated_data):
+        await acommit_chaincode(
             validated_data["name"],
             validated_data["channel_name"],
             validated_data["version"],
@@ -1,201 +1,265 @@
+import asyncio
 import json
 import logging
 import os
 import subprocess
-import tarfile
-import docker
-import yaml
-from typing import List, Optional, Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any, Set, Tuple
+
+from asgiref.sync import async_to_sync
+from docker.errors import DockerException
 
 from chaincode.enums import ChaincodeStatus
-from hyperledger_fabric.settings import CELLO_HOME, CRYPTO_CONFIG, FABRIC_TOOL, FABRIC_VERSION
+from chaincode.images import ensure_builder_images
+from hyperledger_fabric.context import FabricContext, Peer, get_fabric_context
+from hyperledger_fabric.runner import arun, run
+from hyperledger_fabric.settings import CHAINCODE_INSTALL_PARALLELISM, CHAINCODE_INSTALLED_INDEX_TTL, \
+    CHAINCODE_INSTALL_TIMEOUT, FABRIC_TOOL
 
 LOG = logging.getLogger(__name__)
-docker_client = docker.DockerClient("unix:///var/run/docker.sock")
 
-def get_chaincode_status(
-        package_id: str,
-        channel: str,
-        name: str,
-        sequence: int) -> ChaincodeStatus:
-    with open(
-        CRYPTO_CONFIG,
-        "r",
-        encoding="utf-8",
-    ) as f:
-        crypto_config = yaml.safe_load(f)
-
-    peer_org = crypto_config["PeerOrgs"][0]
-    peer_organization_directory = os.path.join(
-        CELLO_HOME,
-        "peerOrganizations",
-        peer_org["Domain"]
-    )
-    peer_name = peer_org["Specs"][0]["Hostname"]
-    peer_cmd = os.path.join(FABRIC_TOOL, "peer")
-    peer_domain_name = "{}.{}".format(peer_name, peer_org["Domain"])
-    peer_dir = os.path.join(
-        peer_organization_directory,
-        "peers",
-        peer_domain_name
-    )
-    peer_env = {
-        "CORE_PEER_TLS_ENABLED": "true",
-        "CORE_PEER_LOCALMSPID": peer_org["Name"] + "MSP",
-        "CORE_PEER_TLS_ROOTCERT_FILE": os.path.join(peer_dir, "tls", "ca.crt"),
-        "CORE_PEER_MSPCONFIGPATH": os.path.join(
-            peer_organization_directory,
-            "users",
-            "Admin@" + peer_org["Domain"],
-            "msp"
-        ),
-        "CORE_PEER_ADDRESS": peer_domain_name + ":7051",
-        "FABRIC_CFG_PATH": peer_dir,
-    }
+# Package IDs installed on each peer, by peer domain name, with the time they were queried.
+_installed_index: Dict[str, Tuple[float, Set[str]]] = {}
+_installed_index_lock = threading.Lock()
+
+
+async def aget_installed_package_ids(peer: Peer, refresh: bool = False) -> Set[str]:
+    """
+    Return the package IDs installed on peer, from the index unless it is
+    older than CHAINCODE_INSTALLED_INDEX_TTL or refresh is set.
+    """
+    with _installed_index_lock:
+        queried_at, package_ids = _installed_index.get(peer.domain_name, (None, None))
+    if not refresh and queried_at is not None and time.monotonic() - queried_at < CHAINCODE_INSTALLED_INDEX_TTL:
+        return set(package_ids)
+
     command = [
-        peer_cmd,
+        os.path.join(FABRIC_TOOL, "peer"),
         "lifecycle",
         "chaincode",
         "queryinstalled",
         "--output",
         "json"
     ]
-    LOG.info(peer_env)
+    LOG.info(peer.env)
     LOG.info(" ".join(command))
-    try:
-        installed_chaincode_package_ids = [
-            installed_chaincode["package_id"] for installed_chaincode in json.loads(
-                subprocess.run(
-                    command,
-                    env=peer_env,
-                    check=True,
-                    capture_output=True,
-                    text=True
-                ).stdout.rstrip("\n")
-            )["installed_chaincodes"]
-       ]
-        if package_id not in installed_chaincode_package_ids:
-            return ChaincodeStatus.CREATED
-    except (subprocess.CalledProcessError, KeyError):
-        return ChaincodeStatus.CREATED
+    package_ids = {
+        installed_chaincode["package_id"] for installed_chaincode in json.loads(
+            (await arun(
+                command,
+                env=peer.env,
+                target=peer.address,
+                idempotent=True,
+            )).stdout.rstrip("\n") or "{}"
+        ).get("installed_chaincodes", [])
+    }
+    with _installed_index_lock:
+        _installed_index[peer.domain_name] = (time.monotonic(), package_ids)
+    return set(package_ids)
+
+
+def get_installed_package_ids(peer: Peer, refresh: bool = False) -> Set[str]:
+    return async_to_sync(aget_installed_package_ids)(peer, refresh)
+
+
+def _add_installed_package_id(peer: Peer, package_id: str):
+    with _installed_index_lock:
+        if peer.domain_name in _installed_index:
+            _installed_index[peer.domain_name][1].add(package_id)
+
 
+async def aget_chaincode_status(
+        package_id: str,
+        channel: str,
+        name: str,
+        sequence: int) -> ChaincodeStatus:
+    return ChaincodeStatus[(await aget_chaincodes_status([dict(
+        package_id=package_id,
+        channel=channel,
+        name=name,
+        sequence=sequence,
+    )]))[0]["status"]]
+
+
+async def _aquery_committed(context: FabricContext, channel: str) -> Optional[Dict[str, int]]:
+    """
+    Return the committed sequences on channel by chaincode name, with one
+    querycommitted, which lists every committed definition without -n.
+    Return None if the peer timed out.
+    """
     command = [
-        peer_cmd,
+        os.path.join(FABRIC_TOOL, "peer"),
         "lifecycle",
         "chaincode",
-        "queryapproved",
+        "querycommitted",
+        "-o",
+        context.orderer.address,
         "-C",
         channel,
-        "-n",
-        name,
-        "--sequence",
-        str(sequence),
+        "--tls",
+        "--cafile",
+        context.orderer.ca_file,
         "--output",
         "json"
     ]
-    LOG.info(peer_env)
+    LOG.info(context.peer.env)
     LOG.info(" ".join(command))
     try:
-        subprocess.run(
-            command,
-            env=peer_env,
-            check=True
-        )
-    except subprocess.CalledProcessError:
-        return ChaincodeStatus.INSTALLED
+        return {
+            chaincode_definition["name"]: chaincode_definition["sequence"]
+            for chaincode_definition in json.loads(
+                (await arun(
+                    command,
+                    env=context.peer.env,
+                    target=context.peer.address,
+                    idempotent=True,
+                )).stdout.rstrip("\n")
+            ).get("chaincode_definitions", [])
+        }
+    except (subprocess.CalledProcessError, KeyError, ValueError):
+        return {}
+    except subprocess.TimeoutExpired:
+        LOG.warning("querycommitted of %s timed out", channel)
+        return None
 
-    orderer_domain_name = "{}.{}".format(
-            crypto_config["OrdererOrgs"][0]["Specs"][0]["Hostname"],
-            crypto_config["OrdererOrgs"][0]["Domain"])
+
+async def _aquery_approved(context: FabricContext, channel: str, name: str, sequence: int) -> Optional[bool]:
+    """Return whether the organization approved the definition, or None if the peer timed out."""
     command = [
-        peer_cmd,
+        os.path.join(FABRIC_TOOL, "peer"),
         "lifecycle",
         "chaincode",
-        "querycommitted",
-        "-o",
-        orderer_domain_name + ":7050",
+        "queryapproved",
         "-C",
         channel,
         "-n",
         name,
-        "--tls",
-        "--cafile",
-        os.path.join(
-            CELLO_HOME,
-            "ordererOrganizations",
-            crypto_config["OrdererOrgs"][0]["Domain"],
-            "orderers",
-            orderer_domain_name,
-            "msp",
-            "tlscacerts",
-            "tlsca.{}-cert.pem".format(crypto_config["OrdererOrgs"][0]["Domain"])
-        ),
+        "--sequence",
+        str(sequence),
         "--output",
         "json"
     ]
-    LOG.info(peer_env)
+    LOG.info(context.peer.env)
     LOG.info(" ".join(command))
     try:
-        subprocess.run(
+        await arun(
             command,
-            env=peer_env,
-            check=True
+            env=context.peer.env,
+            target=context.peer.address,
+            idempotent=True,
         )
-        return ChaincodeStatus.COMMITTED
+        return True
     except subprocess.CalledProcessError:
+        return False
+    except subprocess.TimeoutExpired:
+        LOG.warning("queryapproved of %s on %s timed out", name, channel)
+        return None
+
+
+def _derive_status(
+        chaincode: Dict[str, Any],
+        installed_package_ids: Set[str],
+        committed_sequences: Dict[str, Optional[Dict[str, int]]],
+        approved: Dict[Tuple[str, str, int], Optional[bool]]) -> ChaincodeStatus:
+    channel, name, sequence = chaincode["channel"], chaincode["name"], chaincode["sequence"]
+    if chaincode["package_id"] not in installed_package_ids:
+        return ChaincodeStatus.CREATED
+    if committed_sequences[channel] is None:
+        return ChaincodeStatus.UNKNOWN
+    if committed_sequences[channel].get(name, 0) >= sequence:
+        return ChaincodeStatus.COMMITTED
+    if approved[(channel, name, sequence)] is None:
+        return ChaincodeStatus.UNKNOWN
+    if approved[(channel, name, sequence)]:
         return ChaincodeStatus.APPROVED
+    return ChaincodeStatus.INSTALLED
+
+
+async def _aadd_commit_readiness(chaincodes_status: List[Dict[str, Any]]):
+    """Set the approvals of the chaincodes that have a version, checking those that may still need some."""
+    # A committed sequence can no longer be checked for readiness, so skip
+    # the fork and report no pending approvals. Neither is the peer that
+    # just timed out asked again.
+    pending = [
+        chaincode_status for chaincode_status in chaincodes_status
+        if chaincode_status.get("version") and chaincode_status["status"] not in (
+            ChaincodeStatus.COMMITTED.name, ChaincodeStatus.UNKNOWN.name)
+    ]
+    for chaincode_status in chaincodes_status:
+        if chaincode_status.get("version"):
+            chaincode_status["approvals"] = {}
+    for chaincode_status, approvals in zip(pending, await asyncio.gather(*(
+            aget_chaincode_commit_readiness(
+                chaincode_status["channel"],
+                chaincode_status["name"],
+                chaincode_status["version"],
+                chaincode_status["sequence"],
+                chaincode_status.get("init_required", False))
+            for chaincode_status in pending))):
+        chaincode_status["approvals"] = approvals
+
 
+async def aget_chaincodes_status(chaincodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Return chaincodes with their status, and their commit readiness if they
+    have a version. Queries that do not depend on each other run concurrently.
+    A chaincode whose status depends on a query that timed out is UNKNOWN.
+    """
+    context = get_fabric_context()
+
+    # One queryinstalled for the whole batch, which also refreshes the index.
+    try:
+        installed_chaincode_package_ids = await aget_installed_package_ids(context.peer, refresh=True)
+    except (subprocess.CalledProcessError, KeyError, ValueError):
+        installed_chaincode_package_ids = set()
+    except subprocess.TimeoutExpired:
+        LOG.warning("queryinstalled timed out")
+        return [dict(chaincode, status=ChaincodeStatus.UNKNOWN.name) for chaincode in chaincodes]
+
+    channels = sorted({
+        chaincode["channel"] for chaincode in chaincodes
+        if chaincode["package_id"] in installed_chaincode_package_ids
+    })
+    committed_sequences = dict(zip(channels, await asyncio.gather(*(
+        _aquery_committed(context, channel) for channel in channels))))
+
+    # Only installed but uncommitted definitions need a queryapproved of their own.
+    uncommitted = sorted({
+        (chaincode["channel"], chaincode["name"], chaincode["sequence"])
+        for chaincode in chaincodes
+        if chaincode["package_id"] in installed_chaincode_package_ids
+        and committed_sequences[chaincode["channel"]] is not None
+        and committed_sequences[chaincode["channel"]].get(chaincode["name"], 0) < chaincode["sequence"]
+    })
+    approved = dict(zip(uncommitted, await asyncio.gather(*(
+        _aquery_approved(context, *key) for key in uncommitted))))
+
+    res = [
+        dict(chaincode, status=_derive_status(
+            chaincode, installed_chaincode_package_ids, committed_sequences, approved).name)
+        for chaincode in chaincodes
+    ]
+    await _aadd_commit_readiness(res)
+    return res
 
-def get_chaincode_commit_readiness(
+
+async def aget_chaincode_commit_readiness(
         channel: str,
         name: str,
         version: str,
         sequence: int,
         init_required: bool) -> Dict:
-    with open(
-        CRYPTO_CONFIG,
-        "r",
-        encoding="utf-8",
-    ) as f:
-        crypto_config = yaml.safe_load(f)
-
-    peer_org = crypto_config["PeerOrgs"][0]
-    peer_organization_directory = os.path.join(
-        CELLO_HOME,
-        "peerOrganizations",
-        peer_org["Domain"]
-    )
-    peer_name = peer_org["Specs"][0]["Hostname"]
-    peer_domain_name = "{}.{}".format(peer_name, peer_org["Domain"])
-    peer_dir = os.path.join(
-        peer_organization_directory,
-        "peers",
-        peer_domain_name
-    )
-    peer_env = {
-        "CORE_PEER_TLS_ENABLED": "true",
-        "CORE_PEER_LOCALMSPID": peer_org["Name"] + "MSP",
-        "CORE_PEER_TLS_ROOTCERT_FILE": os.path.join(peer_dir, "tls", "ca.crt"),
-        "CORE_PEER_MSPCONFIGPATH": os.path.join(
-            peer_organization_directory,
-            "users",
-            "Admin@" + peer_org["Domain"],
-            "msp"
-        ),
-        "CORE_PEER_ADDRESS": peer_domain_name + ":7051",
-        "FABRIC_CFG_PATH": peer_dir,
-    }
-
-    orderer_domain_name = "{}.{}".format(
-        crypto_config["OrdererOrgs"][0]["Specs"][0]["Hostname"],
-        crypto_config["OrdererOrgs"][0]["Domain"])
+    context = get_fabric_context()
+    peer_env = context.peer.env
     command = [
         os.path.join(FABRIC_TOOL, "peer"),
         "lifecycle",
         "chaincode",
         "checkcommitreadiness",
         "-o",
-        orderer_domain_name + ":7050",
+        context.orderer.address,
         "-C",
         channel,
         "-n",
@@ -210,16 +274,7 @@ def get_chaincode_commit_readiness(
     command.extend([
         "--tls",
         "--cafile",
-        os.path.join(
-            CELLO_HOME,
-            "ordererOrganizations",
-            crypto_config["OrdererOrgs"][0]["Domain"],
-            "orderers",
-            orderer_domain_name,
-            "msp",
-            "tlscacerts",
-            "tlsca.{}-cert.pem".format(crypto_config["OrdererOrgs"][0]["Domain"])
-        ),
+        context.orderer.ca_file,
         "--output",
         "json"
     ])
@@ -227,32 +282,17 @@ def get_chaincode_commit_readiness(
     LOG.info(peer_env)
     LOG.info(" ".join(command))
     try:
-        res = subprocess.run(
+        res = (await arun(
             command,
             env=peer_env,
-            check=True,
-            capture_output=True,
-            text=True
-        ).stdout.rstrip("\n")
+            target=context.peer.address,
+            idempotent=True,
+        )).stdout.rstrip("\n")
         return json.loads(res)["approvals"]
-    except subprocess.CalledProcessError:
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
         return {}
 
 
-def get_metadata(file_path) -> Optional[Dict[str, Any]]:
-    res = None
-    with tarfile.open(file_path, mode='r:gz') as tar:
-        for member in tar.getmembers():
-            if member.name.endswith("metadata.json"):
-                res = json.loads(
-                    tar.extractfile(member)
-                    .read()
-                    .decode("utf-8")
-                )
-                break
-    return res
-
-
 def create_chaincode(
         name: str,
         version: str,
@@ -261,9 +301,9 @@ def create_chaincode(
         file_path: str,
         package_id: str,
         init_required: bool = False,
-        signature_policy: str = None):
-    install_chaincode(file_path)
-    approve_chaincode(
+        signature_policy: str = None) -> List[Dict[str, Any]]:
+    res = install_chaincode(file_path, package_id=package_id)
+    async_to_sync(aapprove_chaincode)(
         name,
         channel_name,
         version,
@@ -271,23 +311,22 @@ def create_chaincode(
         sequence,
         init_required,
         signature_policy)
+    return res
 
 
-def install_chaincode(file_path: str):
-    with open(
-        CRYPTO_CONFIG,
-        "r",
-        encoding="utf-8",
-    ) as f:
-        crypto_config = yaml.safe_load(f)
+def install_chaincode(
+        file_path: str,
+        parallelism: Optional[int] = None,
+        package_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Install the package on every peer of the organization, up to parallelism
+    peers at a time. A failing peer does not stop the others, each one gets its
+    own result. Raise only when no peer could install the package.
 
-    docker_client.images.pull("hyperledger/fabric-ccenv", tag=FABRIC_VERSION.rsplit(".", 1)[0])
+    With a package_id, peers that already have it installed are skipped.
+    """
+    context = get_fabric_context()
 
-    peer_organization_directory = os.path.join(
-        CELLO_HOME,
-        "peerOrganizations",
-        crypto_config["PeerOrgs"][0]["Domain"]
-    )
     command = [
         os.path.join(FABRIC_TOOL, "peer"),
         "lifecycle",
@@ -295,87 +334,69 @@ def install_chaincode(file_path: str):
         "install",
         file_path,
     ]
-    for peer in crypto_config["PeerOrgs"][0]["Specs"]:
-        peer_domain_name = "{}.{}".format(peer["Hostname"], crypto_config["PeerOrgs"][0]["Domain"])
-        peer_dir = os.path.join(
-            peer_organization_directory, 
-            "peers", 
-            peer_domain_name
-        )
-        peer_env = {
-            "CORE_PEER_TLS_ENABLED": "true",
-            "CORE_PEER_LOCALMSPID": crypto_config["PeerOrgs"][0]["Name"] + "MSP",
-            "CORE_PEER_TLS_ROOTCERT_FILE": os.path.join(peer_dir, "tls", "ca.crt"),
-            "CORE_PEER_MSPCONFIGPATH": os.path.join(
-                peer_organization_directory, 
-                "users", 
-                "Admin@" + crypto_config["PeerOrgs"][0]["Domain"], 
-                "msp"
-            ),
-            "CORE_PEER_ADDRESS": peer_domain_name + ":7051",
-            "FABRIC_CFG_PATH": peer_dir,
-        }
-        LOG.info(peer_env)
-        LOG.info(command)
-        subprocess.run(
-            command,
-            env=peer_env,
-            check=True)
 
+    def install(peer: Peer) -> Dict[str, Any]:
+        start = time.monotonic()
+        if package_id is not None:
+            try:
+                if package_id in get_installed_package_ids(peer):
+                    LOG.info("%s is already installed on %s", package_id, peer.domain_name)
+                    return dict(
+                        peer=peer.domain_name,
+                        installed=True,
+                        skipped=True,
+                        duration=round(time.monotonic() - start, 3),
+                        error=None,
+                    )
+            except (subprocess.CalledProcessError, subprocess.TimeoutExpired, KeyError, ValueError):
+                LOG.warning("Failed to query the chaincodes installed on %s", peer.domain_name)
 
-def get_chaincode_package_id(file_path: str):
-    with open(
-        CRYPTO_CONFIG,
-        "r",
-        encoding="utf-8",
-    ) as f:
-        crypto_config = yaml.safe_load(f)
+        LOG.info(peer.env)
+        LOG.info(" ".join(command))
+        try:
+            # Only checked once a peer actually needs to build the package.
+            ensure_builder_images()
+            # Installing twice is reported as done below, so retrying is safe.
+            run(
+                command,
+                env=peer.env,
+                target=peer.address,
+                timeout=CHAINCODE_INSTALL_TIMEOUT,
+                idempotent=True)
+            error = None
+        except subprocess.CalledProcessError as e:
+            error = e.stderr.strip() if e.stderr else str(e)
+            # The peer refuses to install a package twice, which is what we wanted anyway.
+            if "already successfully installed" in error:
+                error = None
+            else:
+                LOG.error("Failed to install %s on %s: %s", file_path, peer.domain_name, error)
+        except (subprocess.TimeoutExpired, DockerException) as e:
+            error = str(e)
+            LOG.error("Failed to install %s on %s: %s", file_path, peer.domain_name, error)
+        if error is None and package_id is not None:
+            _add_installed_package_id(peer, package_id)
+        return dict(
+            peer=peer.domain_name,
+            installed=error is None,
+            skipped=False,
+            duration=round(time.monotonic() - start, 3),
+            error=error,
+        )
 
-    peer_organization_directory = os.path.join(
-        CELLO_HOME,
-        "peerOrganizations",
-        crypto_config["PeerOrgs"][0]["Domain"]
-    )
-    peer_name = crypto_config["PeerOrgs"][0]["Specs"][0]["Hostname"]
-    peer_cmd = os.path.join(FABRIC_TOOL, "peer")
-    peer_domain_name = "{}.{}".format(peer_name, crypto_config["PeerOrgs"][0]["Domain"])
-    peer_dir = os.path.join(
-        peer_organization_directory,
-        "peers",
-        peer_domain_name
-    )
-    peer_env = {
-        "CORE_PEER_TLS_ENABLED": "true",
-        "CORE_PEER_LOCALMSPID": crypto_config["PeerOrgs"][0]["Name"] + "MSP",
-        "CORE_PEER_TLS_ROOTCERT_FILE": os.path.join(peer_dir, "tls", "ca.crt"),
-        "CORE_PEER_MSPCONFIGPATH": os.path.join(
-            peer_organization_directory,
-            "users",
-            "Admin@" + crypto_config["PeerOrgs"][0]["Domain"],
-            "msp"
-        ),
-        "CORE_PEER_ADDRESS": peer_domain_name + ":7051",
-        "FABRIC_CFG_PATH": peer_dir,
-    }
-    command: List[str] = [
-        peer_cmd,
-        "lifecycle",
-        "chaincode",
-        "calculatepackageid",
-        file_path
-    ]
-    LOG.info(peer_env)
-    LOG.info(" ".join(command))
-    return subprocess.run(
-        command,
-        env=peer_env,
-        check=True,
-        capture_output=True,
-        text=True
-    ).stdout.rstrip("\n")
+    with ThreadPoolExecutor(
+            max_workers=max(1, min(parallelism or CHAINCODE_INSTALL_PARALLELISM, len(context.peers))),
+            thread_name_prefix="chaincode-install") as executor:
+        res = list(executor.map(install, context.peers))
+
+    if not any(peer_result["installed"] for peer_result in res):
+        raise RuntimeError("Failed to install {} on any peer: {}".format(
+            file_path,
+            "; ".join("{}: {}".format(peer_result["peer"], peer_result["error"]) for peer_result in res)))
+    return res
 
 
-def approve_chaincode(
+async def aapprove_chaincode(
         name: str,
         channel_name: str,
         version: str,
@@ -383,50 +404,15 @@ def approve_chaincode(
         sequence: int,
         init_required: bool = False,
         signature_policy: str = None):
-    with open(
-        CRYPTO_CONFIG,
-        "r",
-        encoding="utf-8",
-    ) as f:
-        crypto_config = yaml.safe_load(f)
-
-    peer_organization_directory = os.path.join(
-        CELLO_HOME,
-        "peerOrganizations",
-        crypto_config["PeerOrgs"][0]["Domain"]
-    )
-    peer_name = crypto_config["PeerOrgs"][0]["Specs"][0]["Hostname"]
-    peer_cmd = os.path.join(FABRIC_TOOL, "peer")
-    peer_domain_name = "{}.{}".format(peer_name, crypto_config["PeerOrgs"][0]["Domain"])
-    peer_dir = os.path.join(
-        peer_organization_directory, 
-        "peers", 
-        peer_domain_name
-    )
-    peer_env = {
-        "CORE_PEER_TLS_ENABLED": "true",
-        "CORE_PEER_LOCALMSPID": crypto_config["PeerOrgs"][0]["Name"] + "MSP",
-        "CORE_PEER_TLS_ROOTCERT_FILE": os.path.join(peer_dir, "tls", "ca.crt"),
-        "CORE_PEER_MSPCONFIGPATH": os.path.join(
-            peer_organization_directory, 
-            "users", 
-            "Admin@" + crypto_config["PeerOrgs"][0]["Domain"], 
-            "msp"
-        ),
-        "CORE_PEER_ADDRESS": peer_domain_name + ":7051",
-        "FABRIC_CFG_PATH": peer_dir,
-    }
-
-    orderer_domain_name = "{}.{}".format(
-        crypto_config["OrdererOrgs"][0]["Specs"][0]["Hostname"], 
-        crypto_config["OrdererOrgs"][0]["Domain"])
+    context = get_fabric_context()
+    peer_env = context.peer.env
     command = [
-        peer_cmd,
+        os.path.join(FABRIC_TOOL, "peer"),
         "lifecycle",
         "chaincode",
         "approveformyorg",
         "-o",
-        orderer_domain_name + ":7050",
+        context.orderer.address,
         "--channelID",
         channel_name,
         "--name",
@@ -439,16 +425,7 @@ def approve_chaincode(
         str(sequence),
         "--tls",
         "--cafile",
-        os.path.join(
-            CELLO_HOME,
-            "ordererOrganizations",
-            crypto_config["OrdererOrgs"][0]["Domain"],
-            "orderers",
-            orderer_domain_name,
-            "msp",
-            "tlscacerts",
-            "tlsca.{}-cert.pem".format(crypto_config["OrdererOrgs"][0]["Domain"])
-        )
+        context.orderer.ca_file
     ]
     if init_required:
         command.append("--init-required")
@@ -457,62 +434,27 @@ def approve_chaincode(
 
     LOG.info(peer_env)
     LOG.info(" ".join(command))
-    subprocess.run(
+    await arun(
         command,
         env=peer_env,
-        check=True,
+        target=context.peer.address,
     )
 
 
-def commit_chaincode(
+async def acommit_chaincode(
         name: str,
         channel_name: str,
         version: str,
         sequence: int):
-    with open(
-        CRYPTO_CONFIG,
-        "r",
-        encoding="utf-8",
-    ) as f:
-        crypto_config = yaml.safe_load(f)
-
-    peer_organization_directory = os.path.join(
-        CELLO_HOME,
-        "peerOrganizations",
-        crypto_config["PeerOrgs"][0]["Domain"]
-    )
-    peer_name = crypto_config["PeerOrgs"][0]["Specs"][0]["Hostname"]
-    peer_cmd = os.path.join(FABRIC_TOOL, "peer")
-    peer_domain_name = "{}.{}".format(peer_name, crypto_config["PeerOrgs"][0]["Domain"])
-    peer_dir = os.path.join(
-        peer_organization_directory,
-        "peers",
-        peer_domain_name
-    )
-    peer_env = {
-        "CORE_PEER_TLS_ENABLED": "true",
-        "CORE_PEER_LOCALMSPID": crypto_config["PeerOrgs"][0]["Name"] + "MSP",
-        "CORE_PEER_TLS_ROOTCERT_FILE": os.path.join(peer_dir, "tls", "ca.crt"),
-        "CORE_PEER_MSPCONFIGPATH": os.path.join(
-            peer_organization_directory,
-            "users",
-            "Admin@" + crypto_config["PeerOrgs"][0]["Domain"],
-            "msp"
-        ),
-        "CORE_PEER_ADDRESS": peer_domain_name + ":7051",
-        "FABRIC_CFG_PATH": peer_dir,
-    }
-
-    orderer_domain_name = "{}.{}".format(
-        crypto_config["OrdererOrgs"][0]["Specs"][0]["Hostname"],
-        crypto_config["OrdererOrgs"][0]["Domain"])
+    context = get_fabric_context()
+    peer_env = context.peer.env
     command = [
-        peer_cmd,
+        os.path.join(FABRIC_TOOL, "peer"),
         "lifecycle",
         "chaincode",
         "commit",
         "-o",
-        orderer_domain_name + ":7050",
+        context.orderer.address,
         "--channelID",
         channel_name,
         "--name",
@@ -523,21 +465,12 @@ def commit_chaincode(
         str(sequence),
         "--tls",
         "--cafile",
-        os.path.join(
-            CELLO_HOME,
-            "ordererOrganizations",
-            crypto_config["OrdererOrgs"][0]["Domain"],
-            "orderers",
-            orderer_domain_name,
-            "msp",
-            "tlscacerts",
-            "tlsca.{}-cert.pem".format(crypto_config["OrdererOrgs"][0]["Domain"])
-        )
+        context.orderer.ca_file
     ]
     LOG.info(peer_env)
     LOG.info(" ".join(command))
-    subprocess.run(
+    await arun(
         command,
         env=peer_env,
-        check=True,
+        target=context.peer.address,
     )
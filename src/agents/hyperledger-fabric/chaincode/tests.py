@@ -1,3 +1,302 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import io
+import json
+import os
+import subprocess
+import tarfile
+import tempfile
+from collections import Counter
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+from docker.errors import APIError, ImageNotFound
+
+from chaincode.package import ingest_package
+from hyperledger_fabric.runner import CommandError, CommandResult
+
+with mock.patch("docker.DockerClient"):
+    from chaincode import images, service
+
+
+def make_package(label: str, with_metadata: bool = True) -> bytes:
+    """Build a package laid out like `peer lifecycle chaincode package` does."""
+    def add(tar, name, data):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        tar.addfile(info, io.BytesIO(data))
+
+    code = io.BytesIO()
+    with tarfile.open(fileobj=code, mode="w:gz") as tar:
+        add(tar, "src/main.go", b"package main\n" * 1000)
+
+    package = io.BytesIO()
+    with tarfile.open(fileobj=package, mode="w:gz") as tar:
+        if with_metadata:
+            add(tar, "metadata.json", json.dumps({"path": "", "type": "golang", "label": label}).encode())
+        add(tar, "code.tar.gz", code.getvalue())
+    return package.getvalue()
+
+
+class ChaincodePackageTestCase(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_ingest_stores_hashes_and_reads_metadata_in_one_pass(self):
+        data = make_package("basic_1.0")
+
+        package = ingest_package(io.BytesIO(data), self.directory)
+
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.directory, sha256 + ".tar.gz")
+        self.assertEqual(package.path, path)
+        self.assertEqual(package.sha256, sha256)
+        self.assertEqual(package.package_id, "basic_1.0:" + sha256)
+        self.assertEqual(package.label, "basic_1.0")
+        self.assertEqual(package.language, "golang")
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), data)
+        self.assertEqual(os.listdir(self.directory), [sha256 + ".tar.gz"])
+
+    def test_ingest_stores_identical_packages_once(self):
+        data = make_package("basic_1.0")
+        first = ingest_package(io.BytesIO(data), self.directory)
+        os.utime(first.path, (0, 0))
+
+        second = ingest_package(io.BytesIO(data), self.directory)
+        self.assertEqual(second.path, first.path)
+        self.assertEqual(os.listdir(self.directory), [first.sha256 + ".tar.gz"])
+        # Re-uploading counts as a use for the garbage collector.
+        self.assertGreater(os.stat(second.path).st_mtime, 0)
+
+        other = ingest_package(io.BytesIO(make_package("basic_2.0")), self.directory)
+        self.assertNotEqual(other.path, first.path)
+
+    def test_ingest_rejects_package_without_metadata(self):
+        with self.assertRaises(ValueError):
+            ingest_package(
+                io.BytesIO(make_package("basic_1.0", with_metadata=False)),
+                self.directory)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_ingest_rejects_invalid_archive(self):
+        with self.assertRaises(ValueError):
+            ingest_package(io.BytesIO(b"not a package"), self.directory)
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+class BuilderImageTestCase(SimpleTestCase):
+    def setUp(self):
+        for name, value in (
+                ("docker_client", mock.MagicMock()),
+                ("_present", {}),
+                ("BUILDER_IMAGES", ["hyperledger/fabric-ccenv:2.5", "hyperledger/fabric-baseos:2.5"])):
+            patcher = mock.patch.object(images, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_present_image_is_checked_once_per_ttl(self):
+        images.ensure_builder_images()
+        images.ensure_builder_images()
+        self.assertEqual(images.docker_client.images.get.call_count, 2)
+        images.docker_client.images.pull.assert_not_called()
+
+        images.ensure_builder_images(refresh=True)
+        self.assertEqual(images.docker_client.images.get.call_count, 4)
+
+    def test_present_image_is_checked_again_after_ttl(self):
+        images.ensure_image("hyperledger/fabric-ccenv:2.5")
+        with mock.patch.object(images, "BUILDER_IMAGE_CACHE_TTL", 0):
+            images.ensure_image("hyperledger/fabric-ccenv:2.5")
+        self.assertEqual(images.docker_client.images.get.call_count, 2)
+
+    def test_missing_image_is_pulled(self):
+        images.docker_client.images.get.side_effect = ImageNotFound("missing")
+        images.ensure_image("hyperledger/fabric-ccenv:2.5")
+        images.docker_client.images.pull.assert_called_once_with("hyperledger/fabric-ccenv", tag="2.5")
+
+    def test_prewarm_reports_unavailable_images(self):
+        images.docker_client.images.get.side_effect = ImageNotFound("missing")
+        images.docker_client.images.pull.side_effect = [None, APIError("offline")]
+        self.assertEqual(images.prewarm_builder_images(), ["hyperledger/fabric-baseos:2.5"])
+
+
+class ChaincodeStatusTestCase(SimpleTestCase):
+    def setUp(self):
+        self.commands = []
+        self.running = 0
+        self.peak = 0
+        # What the fake peer reports: installed package IDs, committed
+        # sequences by name and names whose queryapproved fails.
+        self.installed = ["a:1", "b:1"]
+        self.committed = {"a": 1}
+        self.unapproved = {"c"}
+        self.timeouts = set()
+        context = mock.MagicMock()
+        context.orderer.address = "orderer0.example.com:7050"
+        context.orderer.ca_file = "tlsca.example.com-cert.pem"
+        for name, value in (
+                ("get_fabric_context", mock.MagicMock(return_value=context)),
+                ("arun", self.fake_arun),
+                ("_installed_index", {})):
+            patcher = mock.patch.object(service, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def fake_arun(self, command, **kwargs):
+        subcommand = command[3]
+        self.commands.append(subcommand)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+
+        if subcommand in self.timeouts:
+            raise subprocess.TimeoutExpired(command, 1)
+        stdout = ""
+        if subcommand == "queryinstalled":
+            stdout = json.dumps({"installed_chaincodes": [{"package_id": package_id} for package_id in self.installed]})
+        elif subcommand == "querycommitted":
+            stdout = json.dumps({"chaincode_definitions": [
+                {"name": name, "sequence": sequence} for name, sequence in self.committed.items()
+            ]})
+        elif subcommand == "queryapproved" and command[command.index("-n") + 1] in self.unapproved:
+            raise CommandError(CommandResult(command, 1, "", "not approved", 0, 1))
+        elif subcommand == "checkcommitreadiness":
+            stdout = json.dumps({"approvals": {"Org1MSP": True}})
+        return CommandResult(command, 0, stdout, "", 0, 1)
+
+    def test_independent_queries_run_concurrently(self):
+        chaincodes = asyncio.run(service.aget_chaincodes_status([
+            dict(package_id="a:1", channel="ch1", name="a", sequence=1, version="1"),
+            dict(package_id="b:1", channel="ch1", name="b", sequence=1, version="1"),
+            dict(package_id="b:1", channel="ch2", name="c", sequence=1, version="1"),
+            dict(package_id="d:1", channel="ch2", name="d", sequence=1),
+        ]))
+
+        self.assertEqual(
+            [(chaincode["name"], chaincode["status"]) for chaincode in chaincodes],
+            [("a", "COMMITTED"), ("b", "APPROVED"), ("c", "INSTALLED"), ("d", "CREATED")])
+        self.assertEqual(chaincodes[0]["approvals"], {})
+        self.assertEqual(chaincodes[1]["approvals"], {"Org1MSP": True})
+        self.assertNotIn("approvals", chaincodes[3])
+        self.assertEqual(sorted(self.commands), [
+            "checkcommitreadiness", "checkcommitreadiness",
+            "queryapproved", "queryapproved",
+            "querycommitted", "querycommitted",
+            "queryinstalled"])
+        self.assertEqual(self.peak, 2)
+
+    def status(self, sequence: int = 2):
+        chaincode, = asyncio.run(service.aget_chaincodes_status([
+            dict(package_id="a:1", channel="ch1", name="a", sequence=sequence, version="1"),
+        ]))
+        return chaincode
+
+    def assertCommands(self, **counts):
+        self.assertEqual(Counter(self.commands), Counter(dict(queryinstalled=1, querycommitted=1, **counts)))
+
+    def test_installed_only(self):
+        self.committed = {}
+        self.unapproved = {"a"}
+
+        self.assertEqual(self.status()["status"], "INSTALLED")
+        self.assertCommands(queryapproved=1, checkcommitreadiness=1)
+
+    def test_approved(self):
+        self.committed = {}
+
+        chaincode = self.status()
+
+        self.assertEqual(chaincode["status"], "APPROVED")
+        self.assertEqual(chaincode["approvals"], {"Org1MSP": True})
+        self.assertCommands(queryapproved=1, checkcommitreadiness=1)
+
+    def test_committed_at_a_lower_sequence(self):
+        # An upgrade to sequence 2 is pending while sequence 1 is committed.
+        self.assertEqual(self.status(sequence=2)["status"], "APPROVED")
+        self.assertCommands(queryapproved=1, checkcommitreadiness=1)
+
+    def test_committed(self):
+        self.committed = {"a": 2}
+
+        chaincode = self.status(sequence=2)
+
+        self.assertEqual(chaincode["status"], "COMMITTED")
+        self.assertEqual(chaincode["approvals"], {})
+        self.assertCommands()
+
+    def test_not_installed(self):
+        self.installed = []
+
+        self.assertEqual(self.status()["status"], "CREATED")
+        # Nothing is installed, so no channel needs a querycommitted.
+        self.assertEqual(Counter(self.commands), Counter(queryinstalled=1, checkcommitreadiness=1))
+
+    def test_timed_out_queryinstalled_makes_every_status_unknown(self):
+        self.timeouts = {"queryinstalled"}
+
+        self.assertEqual(self.status()["status"], "UNKNOWN")
+        self.assertEqual(self.commands, ["queryinstalled"])
+
+    def test_timed_out_query_makes_only_its_chaincodes_unknown(self):
+        for subcommand in ("querycommitted", "queryapproved"):
+            with self.subTest(subcommand):
+                self.commands = []
+                self.timeouts = {subcommand}
+                chaincodes = asyncio.run(service.aget_chaincodes_status([
+                    dict(package_id="a:1", channel="ch1", name="a", sequence=2, version="1"),
+                    dict(package_id="d:1", channel="ch1", name="d", sequence=1, version="1"),
+                ]))
+
+                self.assertEqual([chaincode["status"] for chaincode in chaincodes], ["UNKNOWN", "CREATED"])
+                self.assertEqual(chaincodes[0]["approvals"], {})
+
+
+class ChaincodeInstallTestCase(SimpleTestCase):
+    def setUp(self):
+        self.peers = [mock.MagicMock(domain_name="peer{}.org1.example.com".format(i)) for i in range(3)]
+        # Addresses of the peers that do not answer, and of those the package was installed on.
+        self.timeouts = set()
+        self.installed = []
+        context = mock.MagicMock(peers=self.peers)
+        for name, value in (
+                ("get_fabric_context", mock.MagicMock(return_value=context)),
+                ("ensure_builder_images", mock.MagicMock()),
+                ("run", self.fake_run),
+                ("arun", self.fake_arun),
+                ("_installed_index", {})):
+            patcher = mock.patch.object(service, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def fake_run(self, command, target=None, **kwargs):
+        if target in self.timeouts:
+            raise subprocess.TimeoutExpired(command, 300)
+        if command[3] == "install":
+            self.installed.append(target)
+        return CommandResult(command, 0, "{}", "", 0, 1)
+
+    async def fake_arun(self, command, **kwargs):
+        return self.fake_run(command, **kwargs)
+
+    def test_timed_out_peer_is_reported(self):
+        self.timeouts.add(self.peers[1].address)
+
+        with self.assertLogs("chaincode.service", "ERROR"):
+            res = service.install_chaincode("basic.tar.gz", package_id="basic_1:" + "a" * 64)
+
+        self.assertEqual([peer_result["installed"] for peer_result in res], [True, False, True])
+        self.assertIn("timed out", res[1]["error"])
+        self.assertCountEqual(self.installed, [self.peers[0].address, self.peers[2].address])
+
+    def test_unavailable_builder_images_are_reported(self):
+        service.ensure_builder_images.side_effect = [None, APIError("offline"), None]
+
+        with self.assertLogs("chaincode.service", "ERROR"):
+            res = service.install_chaincode("basic.tar.gz", parallelism=1)
+
+        self.assertEqual([peer_result["installed"] for peer_result in res], [True, False, True])
+        self.assertIn("offline", res[1]["error"])
@@ -1,12 +1,15 @@
+from adrf import viewsets
 from drf_spectacular.utils import extend_schema
-from rest_framework import viewsets, status
+from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, JSONParser
 from rest_framework.response import Response
 
 from chaincode.serializers import ChaincodeCreationSerializer, ChaincodeInstallationSerializer, \
     ChaincodeApprovementSerializer, ChaincodeCommitSerializer, ChaincodeResponseSerializer, ChaincodeStatusResponse, \
-    ChaincodeStatusRequest, ChaincodeCommitReadinessRequest, ChaincodeCommitReadinessResponse
+    ChaincodeStatusRequest, ChaincodeCommitReadinessRequest, ChaincodeCommitReadinessResponse, \
+    ChaincodeBulkStatusRequest, ChaincodeBulkStatusResponse
+from job.serializers import JobIDSerializer
 
 
 # Create your views here.
@@ -22,7 +25,7 @@ class ChaincodeViewSet(viewsets.ViewSet):
 
     @extend_schema(
         request=ChaincodeCreationSerializer,
-        responses={201: ChaincodeResponseSerializer}
+        responses={202: ChaincodeResponseSerializer}
     )
     def create(self, request):
         serializer = ChaincodeCreationSerializer(data=request.data)
@@ -30,28 +33,30 @@ class ChaincodeViewSet(viewsets.ViewSet):
 
         return Response(
             data=serializer.save().data,
-            status=status.HTTP_201_CREATED)
+            status=status.HTTP_202_ACCEPTED)
 
     @extend_schema(
         request=ChaincodeInstallationSerializer,
-        responses={204: None}
+        responses={202: JobIDSerializer}
     )
     @action(detail=False, methods=["PUT"])
     def install(self, request):
         serializer = ChaincodeInstallationSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+
+        return Response(
+            data=serializer.save().data,
+            status=status.HTTP_202_ACCEPTED)
 
     @extend_schema(
         request=ChaincodeApprovementSerializer,
         responses={204: None}
     )
     @action(detail=False, methods=["PUT"])
-    def approve(self, request):
+    async def approve(self, request):
         serializer = ChaincodeApprovementSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        await serializer.asave()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @extend_schema(
@@ -59,10 +64,10 @@ class ChaincodeViewSet(viewsets.ViewSet):
         responses={204: None}
     )
     @action(detail=False, methods=["PUT"])
-    def commit(self, request):
+    async def commit(self, request):
         serializer = ChaincodeCommitSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        await serializer.asave()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @extend_schema(
@@ -70,12 +75,25 @@ class ChaincodeViewSet(viewsets.ViewSet):
         responses={200: ChaincodeStatusResponse}
     )
     @action(detail=False, methods=["GET"])
-    def status(self, request):
+    async def status(self, request):
         serializer = ChaincodeStatusRequest(data=request.query_params)
         serializer.is_valid(raise_exception=True)
 
         return Response(
-            data=serializer.save().data,
+            data=(await serializer.asave()).data,
+            status=status.HTTP_200_OK)
+
+    @extend_schema(
+        request=ChaincodeBulkStatusRequest,
+        responses={200: ChaincodeBulkStatusResponse}
+    )
+    @status.mapping.post
+    async def bulk_status(self, request):
+        serializer = ChaincodeBulkStatusRequest(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return Response(
+            data=(await serializer.asave()).data,
             status=status.HTTP_200_OK)
 
     @extend_schema(
@@ -83,10 +101,10 @@ class ChaincodeViewSet(viewsets.ViewSet):
         responses={200: ChaincodeCommitReadinessResponse}
     )
     @action(detail=False, methods=["GET"], url_path="commit/readiness")
-    def commit_readiness(self, request):
+    async def commit_readiness(self, request):
         serializer = ChaincodeCommitReadinessRequest(data=request.query_params)
         serializer.is_valid(raise_exception=True)
 
         return Response(
-            data=serializer.save().data,
+            data=(await serializer.asave()).data,
             status=status.HTTP_200_OK)
@@ -0,0 +1,249 @@
+"""
+In-process replacement for the configtxlator calls of the anchor peer update,
+and for proto_decode when the channel config is read.
+
+compute_update follows configtxlator's update.Compute: members that did not
+change are carried into the read set with their version only, changed and
+new members go into the write set, and every group whose members changed
+has its version bumped.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from hyperledger_fabric.protos import AnchorPeer, AnchorPeers, BatchSize, BatchTimeout, Block, ChannelHeader, \
+    Config, ConfigEnvelope, ConfigGroup, ConfigPolicy, ConfigUpdate, ConfigUpdateEnvelope, ConfigValue, \
+    ConsensusType, Envelope, FabricMSPConfig, Header, HEADER_TYPE_CONFIG_UPDATE, MSPConfig, OrdererAddresses, \
+    Payload, marshal
+
+
+def get_config_from_block(block: bytes) -> Config:
+    """Decode the channel config from a config block, as fetched by `peer channel fetch config`."""
+    envelope = Envelope.FromString(Block.FromString(block).data.data[0])
+    payload = Payload.FromString(envelope.payload)
+    return ConfigEnvelope.FromString(payload.data).config
+
+
+def set_anchor_peer(config: Config, organization: str, host: str, port: int) -> Config:
+    """Return a copy of config with host:port as the only anchor peer of the application organization."""
+    updated = Config()
+    updated.CopyFrom(config)
+    values = updated.channel_group.groups["Application"].groups[organization].values
+    values["AnchorPeers"].CopyFrom(ConfigValue(
+        mod_policy="Admins",
+        value=marshal(AnchorPeers(anchor_peers=[AnchorPeer(host=host, port=port)])),
+    ))
+    return updated
+
+
+def compute_update(channel_id: str, original: Config, updated: Config) -> ConfigUpdate:
+    read_set, write_set, group_updated = _compute_group_update(original.channel_group, updated.channel_group)
+    if not group_updated:
+        raise ValueError("no differences detected between original and updated config")
+    return ConfigUpdate(channel_id=channel_id, read_set=read_set, write_set=write_set)
+
+
+def create_config_update_envelope(channel_id: str, config_update: ConfigUpdate) -> bytes:
+    """Wrap config_update into the unsigned envelope that `peer channel update -f` signs and submits."""
+    return marshal(Envelope(payload=marshal(Payload(
+        header=Header(channel_header=marshal(ChannelHeader(
+            type=HEADER_TYPE_CONFIG_UPDATE,
+            channel_id=channel_id,
+        ))),
+        data=marshal(ConfigUpdateEnvelope(config_update=marshal(config_update))),
+    ))))
+
+
+def create_anchor_peer_update(block: bytes, channel_id: str, organization: str, host: str, port: int) -> bytes:
+    """Build the anchor peer update envelope straight from the fetched config block."""
+    original = get_config_from_block(block)
+    return create_config_update_envelope(
+        channel_id,
+        compute_update(channel_id, original, set_anchor_peer(original, organization, host, port)))
+
+
+def describe_config(config: Config) -> Dict[str, Any]:
+    """Return the organizations, anchor peers and orderer settings of a channel config."""
+    channel_group = config.channel_group
+    orderer = channel_group.groups["Orderer"]
+    batch_size = _decode_value(orderer, "BatchSize", BatchSize)
+    batch_timeout = _decode_value(orderer, "BatchTimeout", BatchTimeout)
+    consensus_type = _decode_value(orderer, "ConsensusType", ConsensusType)
+    addresses = _decode_value(channel_group, "OrdererAddresses", OrdererAddresses)
+    return dict(
+        sequence=config.sequence,
+        organizations=[
+            dict(
+                name=name,
+                msp_id=_get_msp_id(organization),
+                anchor_peers=[
+                    "{}:{}".format(anchor_peer.host, anchor_peer.port)
+                    for anchor_peer in _anchor_peers(organization)
+                ],
+            )
+            for name, organization in sorted(channel_group.groups["Application"].groups.items())
+        ],
+        orderer=dict(
+            organizations=[
+                dict(
+                    name=name,
+                    msp_id=_get_msp_id(organization),
+                    endpoints=list(_decode_value(organization, "Endpoints", OrdererAddresses).addresses),
+                )
+                for name, organization in sorted(orderer.groups.items())
+            ],
+            addresses=list(addresses.addresses),
+            consensus_type=consensus_type.type or None,
+            batch_timeout=batch_timeout.timeout or None,
+            batch_size=dict(
+                max_message_count=batch_size.max_message_count,
+                absolute_max_bytes=batch_size.absolute_max_bytes,
+                preferred_max_bytes=batch_size.preferred_max_bytes,
+            ) if "BatchSize" in orderer.values else None,
+        ),
+    )
+
+
+def _decode_value(group: ConfigGroup, name: str, message_class):
+    """Decode a config value, or return an empty message if the group does not have it."""
+    return message_class.FromString(group.values[name].value) if name in group.values else message_class()
+
+
+def _get_msp_id(organization: ConfigGroup) -> Optional[str]:
+    msp = _decode_value(organization, "MSP", MSPConfig)
+    return FabricMSPConfig.FromString(msp.config).name or None
+
+
+def _anchor_peers(organization: ConfigGroup) -> List[AnchorPeer]:
+    return list(_decode_value(organization, "AnchorPeers", AnchorPeers).anchor_peers)
+
+
+def _compute_policies_map_update(original, updated) -> Tuple[Dict, Dict, Dict, bool]:
+    read_set, write_set, same_set = {}, {}, {}
+    updated_members = False
+    for name, original_policy in original.items():
+        if name not in updated:
+            updated_members = True
+            continue
+        updated_policy = updated[name]
+        if original_policy.mod_policy == updated_policy.mod_policy \
+                and original_policy.policy == updated_policy.policy:
+            same_set[name] = ConfigPolicy(version=original_policy.version)
+            continue
+        write_set[name] = ConfigPolicy(
+            version=original_policy.version + 1,
+            mod_policy=updated_policy.mod_policy,
+            policy=updated_policy.policy,
+        )
+    for name, updated_policy in updated.items():
+        if name in original:
+            continue
+        updated_members = True
+        write_set[name] = ConfigPolicy(
+            version=0,
+            mod_policy=updated_policy.mod_policy,
+            policy=updated_policy.policy,
+        )
+    return read_set, write_set, same_set, updated_members
+
+
+def _compute_values_map_update(original, updated) -> Tuple[Dict, Dict, Dict, bool]:
+    read_set, write_set, same_set = {}, {}, {}
+    updated_members = False
+    for name, original_value in original.items():
+        if name not in updated:
+            updated_members = True
+            continue
+        updated_value = updated[name]
+        if original_value.mod_policy == updated_value.mod_policy \
+                and original_value.value == updated_value.value:
+            same_set[name] = ConfigValue(version=original_value.version)
+            continue
+        write_set[name] = ConfigValue(
+            version=original_value.version + 1,
+            mod_policy=updated_value.mod_policy,
+            value=updated_value.value,
+        )
+    for name, updated_value in updated.items():
+        if name in original:
+            continue
+        updated_members = True
+        write_set[name] = ConfigValue(
+            version=0,
+            mod_policy=updated_value.mod_policy,
+            value=updated_value.value,
+        )
+    return read_set, write_set, same_set, updated_members
+
+
+def _compute_groups_map_update(original, updated) -> Tuple[Dict, Dict, Dict, bool]:
+    read_set, write_set, same_set = {}, {}, {}
+    updated_members = False
+    for name, original_group in original.items():
+        if name not in updated:
+            updated_members = True
+            continue
+        group_read_set, group_write_set, group_updated = _compute_group_update(original_group, updated[name])
+        if not group_updated:
+            same_set[name] = group_read_set
+            continue
+        read_set[name] = group_read_set
+        write_set[name] = group_write_set
+    for name, updated_group in updated.items():
+        if name in original:
+            continue
+        updated_members = True
+        _, group_write_set, _ = _compute_group_update(ConfigGroup(), updated_group)
+        write_set[name] = ConfigGroup(
+            version=0,
+            mod_policy=updated_group.mod_policy,
+            policies=group_write_set.policies,
+            values=group_write_set.values,
+            groups=group_write_set.groups,
+        )
+    return read_set, write_set, same_set, updated_members
+
+
+def _compute_group_update(original: ConfigGroup, updated: ConfigGroup) -> Tuple[ConfigGroup, ConfigGroup, bool]:
+    read_set_policies, write_set_policies, same_set_policies, policies_members_updated = \
+        _compute_policies_map_update(original.policies, updated.policies)
+    read_set_values, write_set_values, same_set_values, values_members_updated = \
+        _compute_values_map_update(original.values, updated.values)
+    read_set_groups, write_set_groups, same_set_groups, groups_members_updated = \
+        _compute_groups_map_update(original.groups, updated.groups)
+
+    if not (policies_members_updated or values_members_updated or groups_members_updated
+            or original.mod_policy != updated.mod_policy):
+        if not (read_set_policies or write_set_policies or read_set_values or write_set_values
+                or read_set_groups or write_set_groups):
+            return ConfigGroup(version=original.version), ConfigGroup(version=original.version), False
+
+        return ConfigGroup(
+            version=original.version,
+            policies=read_set_policies,
+            values=read_set_values,
+            groups=read_set_groups,
+        ), ConfigGroup(
+            version=original.version,
+            policies=write_set_policies,
+            values=write_set_values,
+            groups=write_set_groups,
+        ), True
+
+    for same_set, read_set, write_set in (
+            (same_set_policies, read_set_policies, write_set_policies),
+            (same_set_values, read_set_values, write_set_values),
+            (same_set_groups, read_set_groups, write_set_groups)):
+        read_set.update(same_set)
+        write_set.update(same_set)
+
+    return ConfigGroup(
+        version=original.version,
+        policies=read_set_policies,
+        values=read_set_values,
+        groups=read_set_groups,
+    ), ConfigGroup(
+        version=original.version + 1,
+        policies=write_set_policies,
+        values=write_set_values,
+        groups=write_set_groups,
+        mod_policy=updated.mod_policy,
+    ), True
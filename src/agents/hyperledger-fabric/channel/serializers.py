@@ -1,10 +1,67 @@
+from adrf import serializers as async_serializers
 from rest_framework import serializers
 
-from channel.service import create_channel
+from channel.service import aget_channel_config, create_channel
+
+
+class ChannelStepTimingSerializer(serializers.Serializer):
+    step = serializers.CharField(help_text="Step Name")
+    target = serializers.CharField(help_text="Orderer or Peer of the Step", allow_null=True)
+    duration = serializers.FloatField(help_text="Step Duration in Seconds")
+    attempts = serializers.IntegerField(help_text="Attempts until the Step Succeeded", required=False)
+
+
+class ChannelResponseSerializer(serializers.Serializer):
+    name = serializers.CharField(help_text="Channel Name")
+    timings = ChannelStepTimingSerializer(many=True, help_text="Channel Creation Step Timings")
+
 
 class ChannelSerializer(serializers.Serializer):
     name = serializers.CharField(help_text="Channel Name")
 
     def create(self, validated_data):
-        create_channel(validated_data["name"])
-        return self
+        return ChannelResponseSerializer(dict(
+            name=validated_data["name"],
+            timings=create_channel(validated_data["name"])))
+
+
+class ChannelOrganizationSerializer(serializers.Serializer):
+    name = serializers.CharField(help_text="Organization Name")
+    msp_id = serializers.CharField(help_text="Organization MSP ID", allow_null=True)
+    anchor_peers = serializers.ListField(child=serializers.CharField(), help_text="Anchor Peer Addresses")
+
+
+class ChannelOrdererOrganizationSerializer(serializers.Serializer):
+    name = serializers.CharField(help_text="Organization Name")
+    msp_id = serializers.CharField(help_text="Organization MSP ID", allow_null=True)
+    endpoints = serializers.ListField(child=serializers.CharField(), help_text="Orderer Endpoints")
+
+
+class ChannelBatchSizeSerializer(serializers.Serializer):
+    max_message_count = serializers.IntegerField(help_text="Maximum Messages per Block")
+    absolute_max_bytes = serializers.IntegerField(help_text="Maximum Block Size in Bytes")
+    preferred_max_bytes = serializers.IntegerField(help_text="Preferred Block Size in Bytes")
+
+
+class ChannelOrdererSerializer(serializers.Serializer):
+    organizations = ChannelOrdererOrganizationSerializer(many=True, help_text="Orderer Organizations")
+    addresses = serializers.ListField(child=serializers.CharField(), help_text="Orderer Addresses")
+    consensus_type = serializers.CharField(help_text="Consensus Type", allow_null=True)
+    batch_timeout = serializers.CharField(help_text="Batch Timeout", allow_null=True)
+    batch_size = ChannelBatchSizeSerializer(help_text="Batch Size", allow_null=True)
+
+
+class ChannelConfigResponse(serializers.Serializer):
+    name = serializers.CharField(help_text="Channel Name")
+    height = serializers.IntegerField(help_text="Block Height")
+    config_block_number = serializers.IntegerField(help_text="Number of the Latest Config Block")
+    sequence = serializers.IntegerField(help_text="Config Sequence")
+    organizations = ChannelOrganizationSerializer(many=True, help_text="Application Organizations")
+    orderer = ChannelOrdererSerializer(help_text="Orderer Settings")
+
+
+class ChannelConfigRequest(async_serializers.Serializer):
+    name = serializers.RegexField(r"^[a-z][a-z0-9.-]*$", help_text="Channel Name")
+
+    async def acreate(self, validated_data):
+        return ChannelConfigResponse(await aget_channel_config(validated_data["name"]))
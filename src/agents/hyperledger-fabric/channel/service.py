@@ -1,36 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from copy import deepcopy
 import json
 import logging
 import os
 import subprocess
+import tempfile
+import threading
 import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
 import yaml
 
-from hyperledger_fabric.settings import CELLO_HOME, CRYPTO_CONFIG, FABRIC_TOOL
+from channel.configtx import create_anchor_peer_update, describe_config, get_config_from_block
+from hyperledger_fabric.context import Orderer, Peer, get_fabric_context
+from hyperledger_fabric.protos import Block
+from hyperledger_fabric.runner import arun, run
+from hyperledger_fabric.settings import CELLO_HOME, FABRIC_TOOL, CHANNEL_JOIN_PARALLELISM, CHANNEL_READY_TIMEOUT
 
 LOG = logging.getLogger(__name__)
 
+# Decoded channel configs, channel name -> (block height when last checked, config block number, config).
+_configs: Dict[str, Tuple[int, int, Dict[str, Any]]] = {}
+_configs_lock = threading.Lock()
+
+
 def create_channel(channel_name: str):
-    with open(
-        CRYPTO_CONFIG,
-        "r",
-        encoding="utf-8",
-    ) as f:
-        crypto_config = yaml.safe_load(f)
-
-    order_org = crypto_config["OrdererOrgs"][0]
-    orderer_hosts = ["{}.{}".format(spec["Hostname"], order_org["Domain"]) for spec in order_org["Specs"]]
-    orderer_addresses = [orderer_host + ":7050" for orderer_host in orderer_hosts]
-    orderer_organization_directory = os.path.join(
-        CELLO_HOME,
-        "ordererOrganizations",
-        crypto_config["OrdererOrgs"][0]["Domain"]
-    )
+    context = get_fabric_context()
+    orderer_addresses = [orderer.address for orderer in context.orderers]
     orderer_organizations = {
         "Name": "Orderer",
         "ID": "OrdererMSP",
-        "MSPDir": os.path.join(orderer_organization_directory, "msp"),
+        "MSPDir": os.path.join(context.orderer_organization_directory, "msp"),
         "Policies": {
             "Readers": {
                 "Type": "Signature",
@@ -48,47 +49,37 @@ def create_channel(channel_name: str):
         "OrdererEndpoints": orderer_addresses,
     }
 
-    peer_organization_directory = os.path.join(
-        CELLO_HOME,
-        "peerOrganizations",
-        crypto_config["PeerOrgs"][0]["Domain"]
-    )
     peer_organizations = {
-        "Name": crypto_config["PeerOrgs"][0]["Name"],
-        "ID": crypto_config["PeerOrgs"][0]["Name"] + "MSP",
-        "MSPDir": os.path.join(peer_organization_directory, "msp"),
+        "Name": context.peer_org_name,
+        "ID": context.peer_msp_id,
+        "MSPDir": os.path.join(context.peer_organization_directory, "msp"),
         "Policies": {
             "Readers": {
                 "Type": "Signature",
                 "Rule": "OR('{}MSP.admin', '{}MSP.peer', '{}MSP.client')".format(
-                    crypto_config["PeerOrgs"][0]["Name"], 
-                    crypto_config["PeerOrgs"][0]["Name"], 
-                    crypto_config["PeerOrgs"][0]["Name"]
+                    context.peer_org_name, 
+                    context.peer_org_name, 
+                    context.peer_org_name
                 ),
             },
             "Writers": {
                 "Type": "Signature",
                 "Rule": "OR('{}MSP.admin', '{}MSP.client')".format(
-                    crypto_config["PeerOrgs"][0]["Name"], 
-                    crypto_config["PeerOrgs"][0]["Name"]
+                    context.peer_org_name, 
+                    context.peer_org_name
                 ),
             },
             "Admins": {
                 "Type": "Signature",
-                "Rule": "OR('{}MSP.admin')".format(crypto_config["PeerOrgs"][0]["Name"]),
+                "Rule": "OR('{}MSP.admin')".format(context.peer_org_name),
             },
             "Endorsement": {
                 "Type": "Signature",
-                "Rule": "OR('{}MSP.peer')".format(crypto_config["PeerOrgs"][0]["Name"]),
+                "Rule": "OR('{}MSP.peer')".format(context.peer_org_name),
             }
         }
     }
 
-    orderer_directories = [os.path.join(
-        orderer_organization_directory, 
-        "orderers", 
-        orderer_host) for orderer_host in orderer_hosts]
-
     with open(os.path.join(CELLO_HOME, "config", "configtx.yaml"), "r", encoding="utf-8") as f:
         configtx = yaml.safe_load(f)
 
@@ -100,11 +91,11 @@ def create_channel(channel_name: str):
     orderer["Capabilities"] = configtx["Capabilities"]["Orderer"]
     orderer["OrdererType"] = "etcdraft"
     orderer["EtcdRaft"]["Consenters"] = [{
-        "Host": orderer_host,
+        "Host": consenter.domain_name,
         "Port": 7050,
-        "ClientTLSCert": os.path.join(orderer_directory, "tls", "server.crt"),
-        "ServerTLSCert": os.path.join(orderer_directory, "tls", "server.crt"),
-    } for orderer_host, orderer_directory in zip(orderer_hosts, orderer_directories)]
+        "ClientTLSCert": consenter.tls_cert_file,
+        "ServerTLSCert": consenter.tls_cert_file,
+    } for consenter in context.orderers]
 
     channel = deepcopy(configtx["Channel"])
     channel["Capabilities"] = configtx["Capabilities"]["Channel"]
@@ -139,6 +130,8 @@ def create_channel(channel_name: str):
             f
         )
 
+    timings: List[Dict[str, Any]] = []
+
     command = [
         os.path.join(FABRIC_TOOL, "configtxgen"),
         "-configPath",
@@ -151,65 +144,20 @@ def create_channel(channel_name: str):
         channel_name,
     ]
     LOG.info(" ".join(command))
-    subprocess.run(command, check=True)
+    with _step(timings, "configtxgen"):
+        run(command)
 
-    for orderer_host, orderer_directory in zip(orderer_hosts, orderer_directories):
-        command = [
-            os.path.join(FABRIC_TOOL, "osnadmin"),
-            "channel",
-            "join",
-            "--channelID",
-            channel_name,
-            "--config-block",
-            os.path.join(channel_directory, "genesis.block"),
-            "-o",
-            orderer_host + ":7053",
-            "--ca-file",
-            os.path.join(orderer_directory, "msp", "tlscacerts", "tlsca.{}-cert.pem".format(crypto_config["OrdererOrgs"][0]["Domain"])),
-            "--client-cert",
-            os.path.join(orderer_directory, "tls", "server.crt"),
-            "--client-key",
-            os.path.join(orderer_directory, "tls", "server.key"),
-        ]
-        LOG.info(" ".join(command))
-        subprocess.run(command, check=True)
+    genesis_block = os.path.join(channel_directory, "genesis.block")
+    timings.extend(_join_all(
+        lambda consenter: _join_orderer(channel_name, genesis_block, consenter),
+        context.orderers))
+    timings.extend(_join_all(
+        lambda peer: _join_peer(genesis_block, peer),
+        context.peers))
 
-    peer_org = crypto_config["PeerOrgs"][0]
-    command = [
-        os.path.join(FABRIC_TOOL, "peer"),
-        "channel",
-        "join",
-        "-b",
-        os.path.join(channel_directory, "genesis.block"),
-    ]
-    for spec in peer_org["Specs"]:
-        peer_domain_name = "{}.{}".format(spec["Hostname"], peer_org["Domain"])
-        peer_dir = os.path.join(
-            peer_organization_directory, 
-            "peers", 
-            peer_domain_name
-        )
-        peer_env = {
-            "CORE_PEER_TLS_ENABLED": "true",
-            "CORE_PEER_LOCALMSPID": crypto_config["PeerOrgs"][0]["Name"] + "MSP",
-            "CORE_PEER_TLS_ROOTCERT_FILE": os.path.join(peer_dir, "tls", "ca.crt"),
-            "CORE_PEER_MSPCONFIGPATH": os.path.join(
-                peer_organization_directory, 
-                "users", 
-                "Admin@" + crypto_config["PeerOrgs"][0]["Domain"], 
-                "msp"
-            ),
-            "CORE_PEER_ADDRESS": peer_domain_name + ":7051",
-            "FABRIC_CFG_PATH": peer_dir,
-        }
-        LOG.info(peer_env)
-        LOG.info(" ".join(command))
-        subprocess.run(
-            command,
-            env=peer_env,
-            check=True)
+    # The last peer fetches the config block and becomes the anchor peer.
+    anchor_peer = context.peers[-1]
 
-    time.sleep(5)
     command = [
         os.path.join(FABRIC_TOOL, "peer"),
         "channel",
@@ -217,168 +165,234 @@ def create_channel(channel_name: str):
         "config",
         os.path.join(channel_directory, "config_block.pb"),
         "-o",
-        orderer_addresses[0],
+        context.orderer.address,
         "--ordererTLSHostnameOverride",
-        orderer_hosts[0],
+        context.orderer.domain_name,
         "-c",
         channel_name,
         "--tls",
         "--cafile",
-        os.path.join(
-            orderer_directories[0], 
-            "msp", 
-            "tlscacerts", 
-            "tlsca.{}-cert.pem".format(crypto_config["OrdererOrgs"][0]["Domain"])
-        ),
+        context.orderer.ca_file,
     ]
     LOG.info(" ".join(command))
-    LOG.info(peer_env)
-    subprocess.run(
-        command,
-        env=peer_env,
-        check=True)
+    LOG.info(anchor_peer.env)
+    with _step(timings, "fetch config", anchor_peer.domain_name) as step:
+        # Polls until the orderers have started the channel, instead of sleeping a fixed time.
+        step["attempts"] = _run_until_ready(command, anchor_peer.env)
 
-    command = [
-        os.path.join(FABRIC_TOOL, "configtxlator"),
-        "proto_decode",
-        "--input={}".format(os.path.join(channel_directory, "config_block.pb")),
-        "--type=common.Block",
-        "--output={}".format(os.path.join(channel_directory, "config_block.json")),
-    ]
-    LOG.info(" ".join(command))
-    subprocess.run(command, check=True)
-
-    with open(os.path.join(channel_directory, "config_block.json"), "r", encoding="utf-8") as f:
-        config_block = json.load(f)
-
-    with open(os.path.join(channel_directory, "config.json"), "w", encoding="utf-8") as f:
-        json.dump(config_block["data"]["data"][0]["payload"]["data"]["config"], f, sort_keys=False, indent=4)
-
-    with open(os.path.join(channel_directory, "config.json"), "r", encoding="utf-8") as f:
-        config = json.load(f)
-
-    config["channel_group"]["groups"]["Application"]["groups"][crypto_config["PeerOrgs"][0]["Name"]]["values"].update({
-        "AnchorPeers": {
-            "mod_policy": "Admins",
-            "value": {
-                "anchor_peers": [
-                    {
-                        "host": peer_domain_name,
-                        "port": 7051
-                    }
-                ]
-            },
-            "version": 0,
-        }
-    })
+    with _step(timings, "anchor peer update", anchor_peer.domain_name):
+        _update_anchor_peer(channel_name, channel_directory, anchor_peer)
 
-    with open(os.path.join(channel_directory, "modified_config.json"), "w", encoding="utf-8") as f:
-        json.dump(config, f, sort_keys=False, indent=4)
+    return timings
 
-    command = [
-        os.path.join(FABRIC_TOOL, "configtxlator"),
-        "proto_encode",
-        "--input={}".format(os.path.join(channel_directory, "config.json")),
-        "--type=common.Config",
-        "--output={}".format(os.path.join(channel_directory, "config.pb")),
-    ]
-    LOG.info(" ".join(command))
-    subprocess.run(command, check=True)
 
-    command = [
-        os.path.join(FABRIC_TOOL, "configtxlator"),
-        "proto_encode",
-        "--input={}".format(os.path.join(channel_directory, "modified_config.json")),
-        "--type=common.Config",
-        "--output={}".format(os.path.join(channel_directory, "modified_config.pb")),
-    ]
-    LOG.info(" ".join(command))
-    subprocess.run(command, check=True)
+def _update_anchor_peer(channel_name: str, channel_directory: str, anchor_peer: Peer):
+    context = get_fabric_context()
+    config_block = os.path.join(channel_directory, "config_block.pb")
+    config_update_in_envelope = os.path.join(channel_directory, "config_update_in_envelope.pb")
+
+    with open(config_block, "rb") as f:
+        block = f.read()
+    with open(config_update_in_envelope, "wb") as f:
+        f.write(create_anchor_peer_update(
+            block,
+            channel_name,
+            context.peer_org_name,
+            anchor_peer.domain_name,
+            7051))
 
     command = [
-        os.path.join(FABRIC_TOOL, "configtxlator"),
-        "compute_update",
-        "--original={}".format(os.path.join(channel_directory, "config.pb")),
-        "--updated={}".format(os.path.join(channel_directory, "modified_config.pb")),
-        "--channel_id={}".format(channel_name),
-        "--output={}".format(os.path.join(channel_directory, "config_update.pb")),
+        os.path.join(FABRIC_TOOL, "peer"),
+        "channel",
+        "update",
+        "-f",
+        config_update_in_envelope,
+        "-c",
+        channel_name,
+        "-o",
+        context.orderer.address,
+        "--ordererTLSHostnameOverride",
+        context.orderer.domain_name,
+        "--tls",
+        "--cafile",
+        context.orderer.ca_file
     ]
     LOG.info(" ".join(command))
-    subprocess.run(command, check=True)
-
+    LOG.info(anchor_peer.env)
+    run(
+        command,
+        env=anchor_peer.env,
+        target=anchor_peer.address)
+
+    os.remove(config_block)
+    os.remove(config_update_in_envelope)
+
+
+@contextmanager
+def _step(timings: List[Dict[str, Any]], step: str, target: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    timing: Dict[str, Any] = dict(step=step, target=target)
+    start = time.monotonic()
+    try:
+        yield timing
+    finally:
+        timing["duration"] = round(time.monotonic() - start, 3)
+        timings.append(timing)
+
+
+def _join_all(join: Callable[[Any], Dict[str, Any]], nodes: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Run join for every node on a bounded pool and raise the first error once all of them are done."""
+    if not nodes:
+        return []
+    with ThreadPoolExecutor(
+            max_workers=min(CHANNEL_JOIN_PARALLELISM, len(nodes)),
+            thread_name_prefix="channel-join") as executor:
+        futures = [executor.submit(join, node) for node in nodes]
+    errors = [future.exception() for future in futures if future.exception() is not None]
+    if errors:
+        raise errors[0]
+    return [future.result() for future in futures]
+
+
+def _join_orderer(channel_name: str, genesis_block: str, orderer: Orderer) -> Dict[str, Any]:
     command = [
-        os.path.join(FABRIC_TOOL, "configtxlator"),
-        "proto_decode",
-        "--input={}".format(os.path.join(channel_directory, "config_update.pb")),
-        "--type=common.ConfigUpdate",
-        "--output={}".format(os.path.join(channel_directory, "config_update.json")),
+        os.path.join(FABRIC_TOOL, "osnadmin"),
+        "channel",
+        "join",
+        "--channelID",
+        channel_name,
+        "--config-block",
+        genesis_block,
+        "-o",
+        orderer.admin_address,
+        "--ca-file",
+        orderer.ca_file,
+        "--client-cert",
+        orderer.tls_cert_file,
+        "--client-key",
+        orderer.tls_key_file,
     ]
+    timings: List[Dict[str, Any]] = []
     LOG.info(" ".join(command))
-    subprocess.run(command, check=True)
+    with _step(timings, "osnadmin channel join", orderer.domain_name):
+        run(command, target=orderer.admin_address)
+    return timings[0]
 
-    with open(os.path.join(channel_directory, "config_update.json"), "r", encoding="utf-8") as f:
-        config_update = json.load(f)
-
-    with open(os.path.join(channel_directory, "config_update_in_envelope.json"), "w", encoding="utf-8") as f:
-        json.dump(
-            {
-                "payload": {
-                    "header": {
-                        "channel_header": {"channel_id": channel_name, "type": 2}
-                    },
-                    "data": {"config_update": config_update},
-                }
-            },
-            f,
-            sort_keys=False,
-            indent=4
-        )
 
+def _join_peer(genesis_block: str, peer: Peer) -> Dict[str, Any]:
     command = [
-        os.path.join(FABRIC_TOOL, "configtxlator"),
-        "proto_encode",
-        "--input={}".format(os.path.join(channel_directory, "config_update_in_envelope.json")),
-        "--type=common.Envelope",
-        "--output={}".format(os.path.join(channel_directory, "config_update_in_envelope.pb")),
+        os.path.join(FABRIC_TOOL, "peer"),
+        "channel",
+        "join",
+        "-b",
+        genesis_block,
     ]
+    timings: List[Dict[str, Any]] = []
+    LOG.info(peer.env)
     LOG.info(" ".join(command))
-    subprocess.run(command, check=True)
-
+    with _step(timings, "peer channel join", peer.domain_name):
+        run(
+            command,
+            env=peer.env,
+            target=peer.address)
+    return timings[0]
+
+
+def _run_until_ready(command: List[str], env: Dict[str, str]) -> int:
+    """
+    Retry command with exponential backoff until it succeeds or
+    CHANNEL_READY_TIMEOUT runs out. Return the number of attempts.
+    """
+    deadline = time.monotonic() + CHANNEL_READY_TIMEOUT
+    delay = 0.5
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            run(
+                command,
+                env=env,
+                target=env["CORE_PEER_ADDRESS"])
+            return attempts
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+            # The orderers may still be electing a leader and not answer in time.
+            if time.monotonic() + delay > deadline:
+                raise
+            LOG.info("Channel is not ready yet, retrying in %.1fs: %s", delay, (e.stderr or str(e)).strip())
+            time.sleep(delay)
+            delay = min(delay * 2, 8)
+
+
+async def aget_channel_config(channel_name: str) -> Dict[str, Any]:
+    """
+    Return the decoded config of the channel.
+
+    The config is cached with the block height and config block number it was
+    read at. While the height stays the same no block, so no config update,
+    was added and the cache is returned after a single getinfo. Once it
+    grows, the config block is fetched again, and only decoded if it is a new
+    one.
+    """
+    context = get_fabric_context()
+    peer = context.peer
+    height = await _aget_height(channel_name, peer)
+    with _configs_lock:
+        cached = _configs.get(channel_name)
+    if cached is not None and cached[0] == height:
+        return dict(cached[2], name=channel_name, height=height, config_block_number=cached[1])
+
+    with tempfile.TemporaryDirectory() as directory:
+        config_block = os.path.join(directory, "config_block.pb")
+        command = [
+            os.path.join(FABRIC_TOOL, "peer"),
+            "channel",
+            "fetch",
+            "config",
+            config_block,
+            "-o",
+            context.orderer.address,
+            "--ordererTLSHostnameOverride",
+            context.orderer.domain_name,
+            "-c",
+            channel_name,
+            "--tls",
+            "--cafile",
+            context.orderer.ca_file,
+        ]
+        LOG.info(" ".join(command))
+        LOG.info(peer.env)
+        await arun(
+            command,
+            env=peer.env,
+            target=peer.address,
+            idempotent=True)
+        with open(config_block, "rb") as f:
+            block = f.read()
+
+    number = Block.FromString(block).header.number
+    if cached is not None and cached[1] == number:
+        config = cached[2]
+    else:
+        LOG.info("Decoding config block %d of %s", number, channel_name)
+        config = describe_config(get_config_from_block(block))
+    with _configs_lock:
+        _configs[channel_name] = (height, number, config)
+    return dict(config, name=channel_name, height=height, config_block_number=number)
+
+
+async def _aget_height(channel_name: str, peer: Peer) -> int:
     command = [
         os.path.join(FABRIC_TOOL, "peer"),
         "channel",
-        "update",
-        "-f",
-        os.path.join(channel_directory, "config_update_in_envelope.pb"),
+        "getinfo",
         "-c",
         channel_name,
-        "-o",
-        orderer_addresses[0],
-        "--ordererTLSHostnameOverride",
-        orderer_hosts[0],
-        "--tls",
-        "--cafile",
-        os.path.join(
-            orderer_directories[0], 
-            "msp", 
-            "tlscacerts", 
-            "tlsca.{}-cert.pem".format(crypto_config["OrdererOrgs"][0]["Domain"])
-        )
     ]
     LOG.info(" ".join(command))
-    LOG.info(peer_env)
-    subprocess.run(
+    LOG.info(peer.env)
+    stdout = (await arun(
         command,
-        env=peer_env,
-        check=True)
-
-    os.remove(os.path.join(channel_directory, "config_block.pb"))
-    os.remove(os.path.join(channel_directory, "config_block.json"))
-    os.remove(os.path.join(channel_directory, "config.json"))
-    os.remove(os.path.join(channel_directory, "modified_config.json"))
-    os.remove(os.path.join(channel_directory, "config.pb"))
-    os.remove(os.path.join(channel_directory, "modified_config.pb"))
-    os.remove(os.path.join(channel_directory, "config_update.pb"))
-    os.remove(os.path.join(channel_directory, "config_update.json"))
-    os.remove(os.path.join(channel_directory, "config_update_in_envelope.json"))
-    os.remove(os.path.join(channel_directory, "config_update_in_envelope.pb"))
+        env=peer.env,
+        target=peer.address,
+        idempotent=True)).stdout
+    # Printed as: Blockchain info: {"height":5,"currentBlockHash":"...","previousBlockHash":"..."}
+    return json.loads(stdout.split("Blockchain info:", 1)[1])["height"]
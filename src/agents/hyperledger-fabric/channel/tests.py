@@ -1,3 +1,227 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from channel import service
+from channel.configtx import compute_update, create_anchor_peer_update, describe_config, get_config_from_block, \
+    set_anchor_peer
+from hyperledger_fabric.protos import AnchorPeers, Block, Config, ConfigGroup, ConfigUpdate, ConfigUpdateEnvelope, \
+    ConfigValue, Envelope, Payload
+from hyperledger_fabric.runner import CommandError, CommandResult
+from hyperledger_fabric.settings import FABRIC_TOOL
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+CONFIGTXLATOR = os.path.join(FABRIC_TOOL, "configtxlator")
+
+
+def read_fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+class ConfigtxTestCase(SimpleTestCase):
+    def setUp(self):
+        self.block = read_fixture("config_block.pb")
+
+    def test_anchor_peer_update_matches_fixture(self):
+        # The fixtures are synthetic: config_block.pb was encoded with the
+        # fabric-sdk-py protobufs and anchor_peer_update.pb was derived by hand
+        # from configtxlator's update.Compute, not produced by configtxlator.
+        # test_anchor_peer_update_matches_configtxlator checks the same update
+        # against the real binary where it is installed.
+        self.assertEqual(
+            create_anchor_peer_update(self.block, "mychannel", "Org1", "peer1.org1.example.com", 7051),
+            read_fixture("anchor_peer_update.pb"))
+
+    @unittest.skipUnless(os.path.exists(CONFIGTXLATOR), "configtxlator is not installed")
+    def test_anchor_peer_update_matches_configtxlator(self):
+        # Set CONFIG_BLOCK to a block fetched with `peer channel fetch config`
+        # to check a real network's config as well.
+        block = self.block
+        if os.getenv("CONFIG_BLOCK"):
+            with open(os.getenv("CONFIG_BLOCK"), "rb") as f:
+                block = f.read()
+        original = get_config_from_block(block)
+        organization = sorted(original.channel_group.groups["Application"].groups)[0]
+
+        envelope = Envelope.FromString(
+            create_anchor_peer_update(block, "mychannel", organization, "peer1.example.com", 7051))
+        config_update = ConfigUpdate.FromString(
+            ConfigUpdateEnvelope.FromString(Payload.FromString(envelope.payload).data).config_update)
+
+        # Map entries are encoded in random order, so compare the decoded messages.
+        self.assertEqual(
+            config_update,
+            ConfigUpdate.FromString(self.configtxlator_update(block, organization, "peer1.example.com", 7051)))
+
+    def configtxlator_update(self, block: bytes, organization: str, host: str, port: int) -> bytes:
+        """Compute the anchor peer update the way the agent did before it was done in process."""
+        with tempfile.TemporaryDirectory() as directory:
+            def path(name):
+                return os.path.join(directory, name)
+
+            def configtxlator(*args):
+                subprocess.run([CONFIGTXLATOR, *args], check=True)
+
+            with open(path("config_block.pb"), "wb") as f:
+                f.write(block)
+            configtxlator(
+                "proto_decode", "--input={}".format(path("config_block.pb")), "--type=common.Block",
+                "--output={}".format(path("config_block.json")))
+            with open(path("config_block.json"), "r", encoding="utf-8") as f:
+                config = json.load(f)["data"]["data"][0]["payload"]["data"]["config"]
+            with open(path("config.json"), "w", encoding="utf-8") as f:
+                json.dump(config, f)
+            config["channel_group"]["groups"]["Application"]["groups"][organization]["values"]["AnchorPeers"] = {
+                "mod_policy": "Admins",
+                "value": {"anchor_peers": [{"host": host, "port": port}]},
+                "version": 0,
+            }
+            with open(path("modified_config.json"), "w", encoding="utf-8") as f:
+                json.dump(config, f)
+            for name in ("config", "modified_config"):
+                configtxlator(
+                    "proto_encode", "--input={}".format(path(name + ".json")), "--type=common.Config",
+                    "--output={}".format(path(name + ".pb")))
+            configtxlator(
+                "compute_update", "--original={}".format(path("config.pb")),
+                "--updated={}".format(path("modified_config.pb")), "--channel_id=mychannel",
+                "--output={}".format(path("config_update.pb")))
+            with open(path("config_update.pb"), "rb") as f:
+                return f.read()
+
+    def test_config_is_decoded_from_block(self):
+        config = get_config_from_block(self.block)
+        self.assertEqual(sorted(config.channel_group.groups), ["Application", "Orderer"])
+        self.assertEqual(sorted(config.channel_group.groups["Application"].groups), ["Org1", "Org2"])
+
+    def test_new_group_is_written_with_its_members(self):
+        original = get_config_from_block(self.block)
+        updated = Config()
+        updated.CopyFrom(original)
+        org3 = updated.channel_group.groups["Application"].groups["Org3"]
+        org3.CopyFrom(ConfigGroup(mod_policy="Admins"))
+        org3.values["AnchorPeers"].CopyFrom(ConfigValue(
+            mod_policy="Admins",
+            value=AnchorPeers().SerializeToString()))
+
+        config_update = compute_update("mychannel", original, updated)
+        application = original.channel_group.groups["Application"]
+        self.assertEqual(config_update.channel_id, "mychannel")
+        self.assertEqual(
+            config_update.write_set.groups["Application"].version,
+            application.version + 1)
+        self.assertEqual(
+            sorted(config_update.read_set.groups["Application"].groups),
+            ["Org1", "Org2"])
+        self.assertEqual(config_update.write_set.groups["Application"].groups["Org3"].version, 0)
+        self.assertEqual(
+            list(config_update.write_set.groups["Application"].groups["Org3"].values),
+            ["AnchorPeers"])
+
+    def test_unchanged_config_is_rejected(self):
+        config = get_config_from_block(self.block)
+        with self.assertRaises(ValueError):
+            compute_update("mychannel", config, config)
+
+
+class ChannelConfigTestCase(SimpleTestCase):
+    def setUp(self):
+        self.commands = []
+        self.height = 1
+        self.block = read_fixture("config_block.pb")
+        context = mock.MagicMock()
+        context.orderer.address = "orderer0.example.com:7050"
+        context.orderer.domain_name = "orderer0.example.com"
+        context.orderer.ca_file = "tlsca.example.com-cert.pem"
+        for name, value in (
+                ("get_fabric_context", mock.MagicMock(return_value=context)),
+                ("arun", self.fake_arun),
+                ("describe_config", mock.MagicMock(wraps=describe_config)),
+                ("_configs", {})):
+            patcher = mock.patch.object(service, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def fake_arun(self, command, **kwargs):
+        self.commands.append(command[2])
+        stdout = ""
+        if command[2] == "getinfo":
+            stdout = 'Blockchain info: {{"height":{},"currentBlockHash":"","previousBlockHash":""}}\n'.format(
+                self.height)
+        else:
+            with open(command[4], "wb") as f:
+                f.write(self.block)
+        return CommandResult(command, 0, stdout, "", 0, 1)
+
+    def get_config(self):
+        return asyncio.run(service.aget_channel_config("mychannel"))
+
+    def test_config_is_described(self):
+        config = self.get_config()
+        self.assertEqual((config["name"], config["height"], config["config_block_number"]), ("mychannel", 1, 0))
+        self.assertEqual([organization["msp_id"] for organization in config["organizations"]], ["Org1MSP", "Org2MSP"])
+        self.assertEqual(config["orderer"]["consensus_type"], "etcdraft")
+        self.assertEqual(config["orderer"]["batch_timeout"], "2s")
+        self.assertEqual(
+            config["orderer"]["addresses"],
+            ["orderer0.example.com:7050", "orderer1.example.com:7050"])
+
+    def test_anchor_peers_are_described(self):
+        config = describe_config(set_anchor_peer(
+            get_config_from_block(self.block), "Org1", "peer1.org1.example.com", 7051))
+        self.assertEqual(config["organizations"][0]["anchor_peers"], ["peer1.org1.example.com:7051"])
+
+    def test_config_is_fetched_again_only_when_the_height_changes(self):
+        self.get_config()
+        self.get_config()
+        self.assertEqual(self.commands, ["getinfo", "fetch", "getinfo"])
+
+        # A new block that is not a config block, the config is fetched but not decoded again.
+        self.height = 2
+        self.get_config()
+        self.assertEqual(self.commands[3:], ["getinfo", "fetch"])
+        self.assertEqual(service.describe_config.call_count, 1)
+
+        block = Block.FromString(self.block)
+        block.header.number = 2
+        self.block = block.SerializeToString()
+        self.height = 3
+        self.assertEqual(self.get_config()["config_block_number"], 2)
+        self.assertEqual(service.describe_config.call_count, 2)
+
+
+class ChannelReadyTestCase(SimpleTestCase):
+    def setUp(self):
+        self.run = mock.MagicMock()
+        for name, value in (
+                ("run", self.run),
+                ("time", mock.MagicMock(**{"monotonic.return_value": 0}))):
+            patcher = mock.patch.object(service, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.command = ["peer", "channel", "fetch", "config"]
+        self.env = {"CORE_PEER_ADDRESS": "peer0.org1.example.com:7051"}
+
+    def test_timeout_is_retried_until_the_channel_is_ready(self):
+        self.run.side_effect = [
+            subprocess.TimeoutExpired(self.command, 30),
+            CommandError(CommandResult(self.command, 1, "", "orderer not ready", 0, 1)),
+            None,
+        ]
+        self.assertEqual(service._run_until_ready(self.command, self.env), 3)
+        self.assertEqual(service.time.sleep.call_count, 2)
+
+    def test_timeout_is_raised_after_the_deadline(self):
+        self.run.side_effect = subprocess.TimeoutExpired(self.command, 30)
+        # The first attempt ends at the deadline.
+        service.time.monotonic.side_effect = [0, service.CHANNEL_READY_TIMEOUT]
+        with self.assertRaises(subprocess.TimeoutExpired):
+            service._run_until_ready(self.command, self.env)
+        self.assertEqual(self.run.call_count, 1)
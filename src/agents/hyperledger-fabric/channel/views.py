@@ -1,17 +1,38 @@
+from adrf import viewsets
 from drf_spectacular.utils import extend_schema
-from rest_framework import viewsets, status
+from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from channel.serializers import ChannelSerializer
+from channel.serializers import ChannelSerializer, ChannelResponseSerializer, ChannelConfigRequest, \
+    ChannelConfigResponse
 
 # Create your views here.
 class ChannelViewSet(viewsets.ViewSet):
+    lookup_field = "name"
+    # Channel names may contain dots.
+    lookup_value_regex = "[^/]+"
+
     @extend_schema(
         request=ChannelSerializer,
-        responses={201: ChannelSerializer}
+        responses={201: ChannelResponseSerializer}
     )
     def create(self, request):
         serializer = ChannelSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(data=serializer.validated_data, status=status.HTTP_201_CREATED)
+
+        return Response(
+            data=serializer.save().data,
+            status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        responses={200: ChannelConfigResponse}
+    )
+    @action(detail=True, methods=["GET"])
+    async def config(self, request, name=None):
+        serializer = ChannelConfigRequest(data=dict(name=name))
+        serializer.is_valid(raise_exception=True)
+
+        return Response(
+            data=(await serializer.asave()).data,
+            status=status.HTTP_200_OK)
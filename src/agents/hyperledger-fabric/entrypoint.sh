@@ -3,7 +3,10 @@
 python manage.py migrate
 python manage.py collectstatic --noinput
 DEBUG="${DEBUG:-True}"
-if [[ "${DEBUG,,}" == "true" ]]; then # For dev, use pure Django directly
+ASGI="${ASGI:-False}"
+if [[ "${ASGI,,}" == "true" ]]; then # Async views, many status queries served by one process
+  uvicorn hyperledger_fabric.asgi:application --host 0.0.0.0 --port 8080
+elif [[ "${DEBUG,,}" == "true" ]]; then # For dev, use pure Django directly
   python manage.py runserver 0.0.0.0:8080
 else # For production, use uwsgi in front
   uwsgi --ini server.ini
@@ -14,3 +14,14 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hyperledger_fabric.settings')
 
 application = get_asgi_application()
+
+# Imported after the application so that the app registry is ready.
+from chaincode.images import start_prewarm  # noqa: E402
+from job.service import start_workers  # noqa: E402
+from node.events import start_watcher  # noqa: E402
+from node.operations import start_scraper  # noqa: E402
+
+start_workers()
+start_prewarm()
+start_watcher()
+start_scraper()
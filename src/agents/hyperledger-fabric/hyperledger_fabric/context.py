@@ -0,0 +1,146 @@
+"""
+Shared, cached view of the organization described by CRYPTO_CONFIG.
+
+Every agent service needs the same peer environment, orderer endpoints and
+TLS CA paths. FabricContext derives them once per version of
+crypto-config.yaml, and get_fabric_context() re-parses the file only when its
+inode, mtime or size changes.
+"""
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from hyperledger_fabric.settings import CELLO_HOME, CRYPTO_CONFIG
+
+
+@dataclass(frozen=True)
+class Peer:
+    name: str
+    domain_name: str
+    address: str
+    directory: str
+    env: Dict[str, str]
+
+
+@dataclass(frozen=True)
+class Orderer:
+    name: str
+    domain_name: str
+    address: str
+    admin_address: str
+    directory: str
+    ca_file: str
+    tls_cert_file: str
+    tls_key_file: str
+
+
+class FabricContext:
+    """Peer and orderer settings precomputed from one crypto-config.yaml."""
+
+    def __init__(self, crypto_config: Dict[str, Any]):
+        self.crypto_config = crypto_config
+
+        peer_org = crypto_config["PeerOrgs"][0]
+        self.peer_org_name: str = peer_org["Name"]
+        self.peer_msp_id: str = peer_org["Name"] + "MSP"
+        self.peer_domain: str = peer_org["Domain"]
+        self.peer_organization_directory: str = os.path.join(
+            CELLO_HOME,
+            "peerOrganizations",
+            self.peer_domain
+        )
+        self.peers: List[Peer] = [self._make_peer(spec["Hostname"]) for spec in peer_org["Specs"]]
+
+        orderer_org = crypto_config["OrdererOrgs"][0]
+        self.orderer_domain: str = orderer_org["Domain"]
+        self.orderer_organization_directory: str = os.path.join(
+            CELLO_HOME,
+            "ordererOrganizations",
+            self.orderer_domain
+        )
+        self.orderers: List[Orderer] = [self._make_orderer(spec["Hostname"]) for spec in orderer_org["Specs"]]
+
+    def _make_peer(self, name: str) -> Peer:
+        domain_name = "{}.{}".format(name, self.peer_domain)
+        directory = os.path.join(self.peer_organization_directory, "peers", domain_name)
+        return Peer(
+            name=name,
+            domain_name=domain_name,
+            address=domain_name + ":7051",
+            directory=directory,
+            env={
+                "CORE_PEER_TLS_ENABLED": "true",
+                "CORE_PEER_LOCALMSPID": self.peer_msp_id,
+                "CORE_PEER_TLS_ROOTCERT_FILE": os.path.join(directory, "tls", "ca.crt"),
+                "CORE_PEER_MSPCONFIGPATH": os.path.join(
+                    self.peer_organization_directory,
+                    "users",
+                    "Admin@" + self.peer_domain,
+                    "msp"
+                ),
+                "CORE_PEER_ADDRESS": domain_name + ":7051",
+                "FABRIC_CFG_PATH": directory,
+            },
+        )
+
+    def _make_orderer(self, name: str) -> Orderer:
+        domain_name = "{}.{}".format(name, self.orderer_domain)
+        directory = os.path.join(self.orderer_organization_directory, "orderers", domain_name)
+        return Orderer(
+            name=name,
+            domain_name=domain_name,
+            address=domain_name + ":7050",
+            admin_address=domain_name + ":7053",
+            directory=directory,
+            ca_file=os.path.join(
+                directory,
+                "msp",
+                "tlscacerts",
+                "tlsca.{}-cert.pem".format(self.orderer_domain)
+            ),
+            tls_cert_file=os.path.join(directory, "tls", "server.crt"),
+            tls_key_file=os.path.join(directory, "tls", "server.key"),
+        )
+
+    @property
+    def peer(self) -> Peer:
+        """The peer used for organization-wide queries and approvals."""
+        return self.peers[0]
+
+    @property
+    def orderer(self) -> Orderer:
+        """The orderer used for lifecycle transactions."""
+        return self.orderers[0]
+
+    def get_domain(self, peer: bool) -> str:
+        return self.peer_domain if peer else self.orderer_domain
+
+
+_lock = threading.Lock()
+_context: Optional[FabricContext] = None
+_context_key: Optional[Tuple[int, int, int, int]] = None
+
+
+def get_fabric_context() -> FabricContext:
+    """
+    Return the context for the current crypto-config.yaml.
+
+    The returned object is shared between requests, callers must copy
+    crypto_config before changing it.
+    """
+    global _context, _context_key
+    stat = os.stat(CRYPTO_CONFIG)
+    key = (stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        if _context is None or _context_key != key:
+            with open(
+                CRYPTO_CONFIG,
+                "r",
+                encoding="utf-8",
+            ) as f:
+                _context = FabricContext(yaml.safe_load(f))
+            _context_key = key
+        return _context
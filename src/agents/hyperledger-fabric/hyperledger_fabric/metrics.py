@@ -0,0 +1,45 @@
+"""
+Prometheus metrics of the agent, served at /metrics.
+
+Fabric CLI calls are measured by hyperledger_fabric.runner, labelled by tool
+and subcommand, e.g. tool="peer", command="lifecycle chaincode approveformyorg".
+Docker API calls are timed where they are made, labelled by the docker-py call.
+"""
+import os
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+
+# CLI calls take from tens of milliseconds (queries) to minutes (chaincode builds).
+COMMAND_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+COMMAND_DURATION = Histogram(
+    "cello_agent_command_duration_seconds",
+    "Duration of Fabric CLI calls.",
+    ["tool", "command"],
+    buckets=COMMAND_BUCKETS)
+COMMAND_EXITS = Counter(
+    "cello_agent_command_exits",
+    "Finished Fabric CLI calls by exit code, timeout or error if the command could not be run.",
+    ["tool", "command", "exit_code"])
+COMMAND_RETRIES = Counter(
+    "cello_agent_command_retries",
+    "Fabric CLI calls that were retried after a timeout or connection error.",
+    ["tool", "command"])
+COMMANDS_IN_FLIGHT = Gauge(
+    "cello_agent_commands_in_flight",
+    "Fabric CLI calls currently running.",
+    ["tool", "command"],
+    multiprocess_mode="livesum")
+DOCKER_CALL_DURATION = Histogram(
+    "cello_agent_docker_call_duration_seconds",
+    "Duration of Docker API calls.",
+    ["call"])
+
+
+def get_metrics() -> bytes:
+    """Render the metrics, of all processes if PROMETHEUS_MULTIPROC_DIR is set."""
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
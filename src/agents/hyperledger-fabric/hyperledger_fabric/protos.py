@@ -0,0 +1,243 @@
+"""
+The subset of the Fabric protobuf definitions the agent reads and writes.
+
+The messages are declared below with the same package, names and field
+numbers as fabric-protos (common/common.proto, common/configtx.proto,
+common/policies.proto, common/configuration.proto, peer/configuration.proto,
+orderer/configuration.proto and msp/msp_config.proto) and are built into a
+private descriptor pool, so there is no generated code to keep in sync with
+the protobuf runtime.
+"""
+from typing import Dict, List, Tuple
+
+from google.protobuf import descriptor_pb2, descriptor_pool, message_factory, timestamp_pb2
+
+_TYPES = {
+    "bool": descriptor_pb2.FieldDescriptorProto.TYPE_BOOL,
+    "bytes": descriptor_pb2.FieldDescriptorProto.TYPE_BYTES,
+    "int32": descriptor_pb2.FieldDescriptorProto.TYPE_INT32,
+    "string": descriptor_pb2.FieldDescriptorProto.TYPE_STRING,
+    "uint32": descriptor_pb2.FieldDescriptorProto.TYPE_UINT32,
+    "uint64": descriptor_pb2.FieldDescriptorProto.TYPE_UINT64,
+}
+
+# file name -> (package, {message name -> [(field name, number, type, label)]})
+# A type that is not in _TYPES is a message type, "map<K,V>" declares a map.
+_FILES: Dict[str, Tuple[str, Dict[str, List[Tuple[str, int, str, str]]]]] = {
+    "common/policies.proto": ("common", {
+        "Policy": [
+            ("type", 1, "int32", "optional"),
+            ("value", 2, "bytes", "optional"),
+        ],
+    }),
+    "common/common.proto": ("common", {
+        "Header": [
+            ("channel_header", 1, "bytes", "optional"),
+            ("signature_header", 2, "bytes", "optional"),
+        ],
+        "ChannelHeader": [
+            ("type", 1, "int32", "optional"),
+            ("version", 2, "int32", "optional"),
+            ("timestamp", 3, ".google.protobuf.Timestamp", "optional"),
+            ("channel_id", 4, "string", "optional"),
+            ("tx_id", 5, "string", "optional"),
+            ("epoch", 6, "uint64", "optional"),
+            ("extension", 7, "bytes", "optional"),
+            ("tls_cert_hash", 8, "bytes", "optional"),
+        ],
+        "SignatureHeader": [
+            ("creator", 1, "bytes", "optional"),
+            ("nonce", 2, "bytes", "optional"),
+        ],
+        "Payload": [
+            ("header", 1, ".common.Header", "optional"),
+            ("data", 2, "bytes", "optional"),
+        ],
+        "Envelope": [
+            ("payload", 1, "bytes", "optional"),
+            ("signature", 2, "bytes", "optional"),
+        ],
+        "Block": [
+            ("header", 1, ".common.BlockHeader", "optional"),
+            ("data", 2, ".common.BlockData", "optional"),
+            ("metadata", 3, ".common.BlockMetadata", "optional"),
+        ],
+        "BlockHeader": [
+            ("number", 1, "uint64", "optional"),
+            ("previous_hash", 2, "bytes", "optional"),
+            ("data_hash", 3, "bytes", "optional"),
+        ],
+        "BlockData": [
+            ("data", 1, "bytes", "repeated"),
+        ],
+        "BlockMetadata": [
+            ("metadata", 1, "bytes", "repeated"),
+        ],
+    }),
+    "common/configtx.proto": ("common", {
+        "ConfigEnvelope": [
+            ("config", 1, ".common.Config", "optional"),
+            ("last_update", 2, ".common.Envelope", "optional"),
+        ],
+        "Config": [
+            ("sequence", 1, "uint64", "optional"),
+            ("channel_group", 2, ".common.ConfigGroup", "optional"),
+        ],
+        "ConfigUpdateEnvelope": [
+            ("config_update", 1, "bytes", "optional"),
+            ("signatures", 2, ".common.ConfigSignature", "repeated"),
+        ],
+        "ConfigUpdate": [
+            ("channel_id", 1, "string", "optional"),
+            ("read_set", 2, ".common.ConfigGroup", "optional"),
+            ("write_set", 3, ".common.ConfigGroup", "optional"),
+            ("isolated_data", 5, "map<string,bytes>", "repeated"),
+        ],
+        "ConfigGroup": [
+            ("version", 1, "uint64", "optional"),
+            ("groups", 2, "map<string,.common.ConfigGroup>", "repeated"),
+            ("values", 3, "map<string,.common.ConfigValue>", "repeated"),
+            ("policies", 4, "map<string,.common.ConfigPolicy>", "repeated"),
+            ("mod_policy", 5, "string", "optional"),
+        ],
+        "ConfigValue": [
+            ("version", 1, "uint64", "optional"),
+            ("value", 2, "bytes", "optional"),
+            ("mod_policy", 3, "string", "optional"),
+        ],
+        "ConfigPolicy": [
+            ("version", 1, "uint64", "optional"),
+            ("policy", 2, ".common.Policy", "optional"),
+            ("mod_policy", 3, "string", "optional"),
+        ],
+        "ConfigSignature": [
+            ("signature_header", 1, "bytes", "optional"),
+            ("signature", 2, "bytes", "optional"),
+        ],
+    }),
+    "common/configuration.proto": ("common", {
+        "OrdererAddresses": [
+            ("addresses", 1, "string", "repeated"),
+        ],
+    }),
+    "peer/configuration.proto": ("protos", {
+        "AnchorPeers": [
+            ("anchor_peers", 1, ".protos.AnchorPeer", "repeated"),
+        ],
+        "AnchorPeer": [
+            ("host", 1, "string", "optional"),
+            ("port", 2, "int32", "optional"),
+        ],
+    }),
+    "orderer/configuration.proto": ("orderer", {
+        "ConsensusType": [
+            ("type", 1, "string", "optional"),
+            ("metadata", 2, "bytes", "optional"),
+        ],
+        "BatchSize": [
+            ("max_message_count", 1, "uint32", "optional"),
+            ("absolute_max_bytes", 2, "uint32", "optional"),
+            ("preferred_max_bytes", 3, "uint32", "optional"),
+        ],
+        "BatchTimeout": [
+            ("timeout", 1, "string", "optional"),
+        ],
+    }),
+    # Only the MSP ID of FabricMSPConfig is read, its other fields are left undecoded.
+    "msp/msp_config.proto": ("msp", {
+        "MSPConfig": [
+            ("type", 1, "int32", "optional"),
+            ("config", 2, "bytes", "optional"),
+        ],
+        "FabricMSPConfig": [
+            ("name", 1, "string", "optional"),
+        ],
+    }),
+}
+
+# HeaderType values used by the agent.
+HEADER_TYPE_CONFIG = 1
+HEADER_TYPE_CONFIG_UPDATE = 2
+
+
+def _add_field(message: descriptor_pb2.DescriptorProto, name: str, number: int, field_type: str, label: str):
+    field = message.field.add(
+        name=name,
+        number=number,
+        label=getattr(descriptor_pb2.FieldDescriptorProto, "LABEL_" + label.upper()),
+    )
+    if field_type in _TYPES:
+        field.type = _TYPES[field_type]
+    else:
+        field.type = descriptor_pb2.FieldDescriptorProto.TYPE_MESSAGE
+        field.type_name = field_type
+
+
+def _build_pool() -> descriptor_pool.DescriptorPool:
+    pool = descriptor_pool.DescriptorPool()
+    timestamp = descriptor_pb2.FileDescriptorProto()
+    timestamp_pb2.DESCRIPTOR.CopyToProto(timestamp)
+    pool.Add(timestamp)
+
+    dependencies = [timestamp.name]
+    for file_name, (package, messages) in _FILES.items():
+        # Files are declared in dependency order, each one may use the types of those above it.
+        file = descriptor_pb2.FileDescriptorProto(name=file_name, package=package, syntax="proto3")
+        file.dependency.extend(dependencies)
+        dependencies.append(file_name)
+        for message_name, fields in messages.items():
+            message = file.message_type.add(name=message_name)
+            for name, number, field_type, label in fields:
+                if not field_type.startswith("map<"):
+                    _add_field(message, name, number, field_type, label)
+                    continue
+                # A map is a repeated field of a nested key/value entry message.
+                key_type, value_type = field_type[len("map<"):-1].split(",")
+                entry = message.nested_type.add(
+                    name="".join(part.capitalize() for part in name.split("_")) + "Entry")
+                entry.options.map_entry = True
+                _add_field(entry, "key", 1, key_type, "optional")
+                _add_field(entry, "value", 2, value_type, "optional")
+                _add_field(message, name, number, ".{}.{}.{}".format(package, message_name, entry.name), label)
+        pool.Add(file)
+    return pool
+
+
+_pool = _build_pool()
+
+
+def _message_class(full_name: str):
+    return message_factory.GetMessageClass(_pool.FindMessageTypeByName(full_name))
+
+
+Header = _message_class("common.Header")
+ChannelHeader = _message_class("common.ChannelHeader")
+SignatureHeader = _message_class("common.SignatureHeader")
+Payload = _message_class("common.Payload")
+Envelope = _message_class("common.Envelope")
+Block = _message_class("common.Block")
+BlockHeader = _message_class("common.BlockHeader")
+BlockData = _message_class("common.BlockData")
+BlockMetadata = _message_class("common.BlockMetadata")
+Policy = _message_class("common.Policy")
+ConfigEnvelope = _message_class("common.ConfigEnvelope")
+Config = _message_class("common.Config")
+ConfigUpdateEnvelope = _message_class("common.ConfigUpdateEnvelope")
+ConfigUpdate = _message_class("common.ConfigUpdate")
+ConfigGroup = _message_class("common.ConfigGroup")
+ConfigValue = _message_class("common.ConfigValue")
+ConfigPolicy = _message_class("common.ConfigPolicy")
+ConfigSignature = _message_class("common.ConfigSignature")
+OrdererAddresses = _message_class("common.OrdererAddresses")
+AnchorPeers = _message_class("protos.AnchorPeers")
+AnchorPeer = _message_class("protos.AnchorPeer")
+ConsensusType = _message_class("orderer.ConsensusType")
+BatchSize = _message_class("orderer.BatchSize")
+BatchTimeout = _message_class("orderer.BatchTimeout")
+MSPConfig = _message_class("msp.MSPConfig")
+FabricMSPConfig = _message_class("msp.FabricMSPConfig")
+
+
+def marshal(message) -> bytes:
+    """Serialize with map entries sorted by key, so equal messages give equal bytes."""
+    return message.SerializeToString(deterministic=True)
@@ -0,0 +1,242 @@
+"""
+The single place the agent runs Fabric CLI commands from.
+
+Every command is killed after a timeout, and at most
+RUNNER_TARGET_CONCURRENCY commands run against the same peer or orderer at a
+time. Commands that are safe to repeat are retried with backoff when they
+time out or cannot reach their target. Output is always captured and returned
+together with the exit code, duration and number of attempts.
+
+run blocks the calling thread, arun is the same for async views and awaits an
+asyncio subprocess instead. Both share the per target limits.
+"""
+import asyncio
+import logging
+import os
+import re
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from hyperledger_fabric.metrics import COMMAND_DURATION, COMMAND_EXITS, COMMAND_RETRIES, COMMANDS_IN_FLIGHT
+from hyperledger_fabric.settings import RUNNER_RETRIES, RUNNER_RETRY_BACKOFF, RUNNER_TARGET_CONCURRENCY, \
+    RUNNER_TIMEOUT
+
+LOG = logging.getLogger(__name__)
+
+# Subcommands are lower case words, e.g. "lifecycle chaincode install", the
+# arguments that follow them, such as a package path, are not.
+_SUBCOMMAND_PATTERN = re.compile(r"^[a-z][a-z_]*$")
+_MAX_SUBCOMMAND_DEPTH = 3
+# Errors of the gRPC connection to a node, where trying again may help.
+_TRANSIENT_ERROR_PATTERN = re.compile(
+    r"connection refused|context deadline exceeded|transport is closing|code = Unavailable"
+    r"|failed to create new connection|no such host")
+
+_target_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_target_semaphores_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class CommandResult:
+    command: List[str]
+    returncode: int
+    stdout: str
+    stderr: str
+    duration: float
+    attempts: int
+
+
+class CommandError(subprocess.CalledProcessError):
+    """A command exited with a non-zero code, result has everything it printed."""
+
+    def __init__(self, result: CommandResult):
+        super().__init__(result.returncode, result.command, result.stdout, result.stderr)
+        self.result = result
+
+
+def get_command_labels(command: List[str]) -> Tuple[str, str]:
+    """Return the tool and subcommand of command, e.g. ("peer", "channel join")."""
+    subcommand = []
+    for word in command[1:_MAX_SUBCOMMAND_DEPTH + 1]:
+        if not _SUBCOMMAND_PATTERN.match(word):
+            break
+        subcommand.append(word)
+    return os.path.basename(command[0]), " ".join(subcommand)
+
+
+def _get_target_semaphore(target: str) -> threading.BoundedSemaphore:
+    with _target_semaphores_lock:
+        if target not in _target_semaphores:
+            _target_semaphores[target] = threading.BoundedSemaphore(RUNNER_TARGET_CONCURRENCY)
+        return _target_semaphores[target]
+
+
+def _is_transient(returncode: int, stderr: str) -> bool:
+    return returncode != 0 and bool(_TRANSIENT_ERROR_PATTERN.search(stderr))
+
+
+def _retry_delay(command: List[str], attempt: int) -> float:
+    delay = RUNNER_RETRY_BACKOFF * 2 ** (attempt - 1)
+    LOG.info("Retrying %s in %.1fs", " ".join(get_command_labels(command)), delay)
+    COMMAND_RETRIES.labels(*get_command_labels(command)).inc()
+    return delay
+
+
+def _get_result(
+        command: List[str],
+        completed: subprocess.CompletedProcess,
+        start: float,
+        attempts: int,
+        check: bool) -> CommandResult:
+    result = CommandResult(
+        command=command,
+        returncode=completed.returncode,
+        stdout=completed.stdout,
+        stderr=completed.stderr,
+        duration=time.monotonic() - start,
+        attempts=attempts)
+    LOG.debug("%s exited with %d in %.2fs", " ".join(command), result.returncode, result.duration)
+    if result.stderr:
+        LOG.debug(result.stderr)
+    if check and result.returncode != 0:
+        raise CommandError(result)
+    return result
+
+
+@contextmanager
+def _measure(command: List[str]) -> Iterator[Dict[str, str]]:
+    """Record one attempt of command, the caller sets outcome["exit_code"]."""
+    tool, subcommand = get_command_labels(command)
+    outcome = dict(exit_code="error")
+    start = time.perf_counter()
+    try:
+        with COMMANDS_IN_FLIGHT.labels(tool, subcommand).track_inprogress():
+            yield outcome
+    finally:
+        COMMAND_DURATION.labels(tool, subcommand).observe(time.perf_counter() - start)
+        COMMAND_EXITS.labels(tool, subcommand, outcome["exit_code"]).inc()
+
+
+def _run_once(command: List[str], env: Optional[Dict[str, str]], timeout: float) -> subprocess.CompletedProcess:
+    with _measure(command) as outcome:
+        try:
+            result = subprocess.run(command, env=env, timeout=timeout, capture_output=True, text=True)
+        except subprocess.TimeoutExpired:
+            outcome["exit_code"] = "timeout"
+            raise
+        outcome["exit_code"] = str(result.returncode)
+        return result
+
+
+async def _arun_once(
+        command: List[str],
+        env: Optional[Dict[str, str]],
+        timeout: float) -> subprocess.CompletedProcess:
+    with _measure(command) as outcome:
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            env=env,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE)
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            outcome["exit_code"] = "timeout"
+            raise subprocess.TimeoutExpired(command, timeout)
+        outcome["exit_code"] = str(process.returncode)
+        return subprocess.CompletedProcess(
+            command,
+            process.returncode,
+            stdout.decode(errors="replace"),
+            stderr.decode(errors="replace"))
+
+
+async def _acquire(semaphore: threading.BoundedSemaphore):
+    # The semaphores are shared with run in other threads, so a caller that
+    # has to wait does so in a thread of its own instead of in the loop.
+    if semaphore.acquire(blocking=False):
+        return
+    acquiring = asyncio.ensure_future(asyncio.to_thread(semaphore.acquire))
+    try:
+        await asyncio.shield(acquiring)
+    except asyncio.CancelledError:
+        # The thread still gets the semaphore, give it back.
+        acquiring.add_done_callback(lambda _: semaphore.release())
+        raise
+
+
+def run(
+        command: List[str],
+        env: Optional[Dict[str, str]] = None,
+        target: Optional[str] = None,
+        timeout: Optional[float] = None,
+        idempotent: bool = False,
+        check: bool = True) -> CommandResult:
+    """
+    Run command and return what it printed.
+
+    target is the address of the peer or orderer the command talks to, if any.
+    Only idempotent commands, which may be repeated without side effects, are
+    retried. Raise CommandError for a non-zero exit code if check, and
+    subprocess.TimeoutExpired once the last attempt times out.
+    """
+    timeout = timeout or RUNNER_TIMEOUT
+    semaphore = _get_target_semaphore(target) if target else None
+    retries = RUNNER_RETRIES if idempotent else 0
+    start = time.monotonic()
+    attempt = 0
+    while True:
+        attempt += 1
+        if semaphore:
+            semaphore.acquire()
+        try:
+            completed = _run_once(command, env, timeout)
+            transient = _is_transient(completed.returncode, completed.stderr)
+        except subprocess.TimeoutExpired:
+            if attempt > retries:
+                raise
+            transient = True
+        finally:
+            if semaphore:
+                semaphore.release()
+        if not transient or attempt > retries:
+            return _get_result(command, completed, start, attempt, check)
+        time.sleep(_retry_delay(command, attempt))
+
+
+async def arun(
+        command: List[str],
+        env: Optional[Dict[str, str]] = None,
+        target: Optional[str] = None,
+        timeout: Optional[float] = None,
+        idempotent: bool = False,
+        check: bool = True) -> CommandResult:
+    """run, without blocking the event loop."""
+    timeout = timeout or RUNNER_TIMEOUT
+    semaphore = _get_target_semaphore(target) if target else None
+    retries = RUNNER_RETRIES if idempotent else 0
+    start = time.monotonic()
+    attempt = 0
+    while True:
+        attempt += 1
+        if semaphore:
+            await _acquire(semaphore)
+        try:
+            completed = await _arun_once(command, env, timeout)
+            transient = _is_transient(completed.returncode, completed.stderr)
+        except subprocess.TimeoutExpired:
+            if attempt > retries:
+                raise
+            transient = True
+        finally:
+            if semaphore:
+                semaphore.release()
+        if not transient or attempt > retries:
+            return _get_result(command, completed, start, attempt, check)
+        await asyncio.sleep(_retry_delay(command, attempt))
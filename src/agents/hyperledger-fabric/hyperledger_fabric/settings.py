@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     'node',
     'channel',
     'chaincode',
+    'job',
     'user',
 ]
 
@@ -84,6 +85,8 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": "hyperledger_cello_hyperledger_fabric_agent",
+        # Job workers write from several threads, wait for the lock instead of failing.
+        "OPTIONS": {"timeout": 20},
     }
 }
 
@@ -132,6 +135,62 @@ CELLO_HOME = os.path.join(BASE_DIR, "cello")
 CRYPTO_CONFIG = os.path.join(CELLO_HOME, "crypto-config.yaml")
 FABRIC_TOOL = os.path.join(CELLO_HOME, "bin")
 FABRIC_VERSION = "2.5.15"
+# How a new node receives its MSP, TLS and configuration, ENV or ARCHIVE,
+# unless the request chooses one. See node.enums.NodeTransport.
+NODE_TRANSPORT = os.getenv("NODE_TRANSPORT", "ENV").upper()
+# The certificates of new nodes are signed in process by hyperledger_fabric.issuer
+# unless CRYPTOGEN_EXTEND is true, which runs cryptogen extend for them instead.
+CRYPTOGEN_EXTEND = os.getenv("CRYPTOGEN_EXTEND", "False").upper() == "TRUE"
+# How many nodes of a batch are configured and started at the same time.
+NODE_CREATE_PARALLELISM = int(os.getenv("NODE_CREATE_PARALLELISM", "8"))
+# Node states are cached from the Docker event stream unless NODE_STATE_WATCHER
+# is false. After the stream breaks, it is followed again this many seconds later.
+NODE_STATE_WATCHER = os.getenv("NODE_STATE_WATCHER", "True").upper() == "TRUE"
+NODE_EVENTS_RETRY_INTERVAL = float(os.getenv("NODE_EVENTS_RETRY_INTERVAL", "5"))
+# The operations endpoints, /metrics and /healthz, of running nodes are scraped
+# every NODE_OPERATIONS_SCRAPE_INTERVAL seconds unless NODE_OPERATIONS_SCRAPER is
+# false, and summarized over the last NODE_OPERATIONS_WINDOW scrapes of each node.
+NODE_OPERATIONS_SCRAPER = os.getenv("NODE_OPERATIONS_SCRAPER", "True").upper() == "TRUE"
+NODE_OPERATIONS_SCRAPE_INTERVAL = float(os.getenv("NODE_OPERATIONS_SCRAPE_INTERVAL", "15"))
+NODE_OPERATIONS_SCRAPE_TIMEOUT = float(os.getenv("NODE_OPERATIONS_SCRAPE_TIMEOUT", "5"))
+NODE_OPERATIONS_WINDOW = int(os.getenv("NODE_OPERATIONS_WINDOW", "20"))
+# Fabric CLI calls are killed after RUNNER_TIMEOUT seconds, chaincode installs,
+# which build the chaincode, after CHAINCODE_INSTALL_TIMEOUT. At most
+# RUNNER_TARGET_CONCURRENCY calls run against the same peer or orderer at a time,
+# and calls that are safe to repeat are retried RUNNER_RETRIES times when they
+# time out or cannot connect, after RUNNER_RETRY_BACKOFF seconds, doubling.
+RUNNER_TIMEOUT = float(os.getenv("RUNNER_TIMEOUT", "120"))
+CHAINCODE_INSTALL_TIMEOUT = float(os.getenv("CHAINCODE_INSTALL_TIMEOUT", "600"))
+RUNNER_TARGET_CONCURRENCY = int(os.getenv("RUNNER_TARGET_CONCURRENCY", "4"))
+RUNNER_RETRIES = int(os.getenv("RUNNER_RETRIES", "2"))
+RUNNER_RETRY_BACKOFF = float(os.getenv("RUNNER_RETRY_BACKOFF", "1"))
+# Images peers build and run chaincode with. Their presence is cached for
+# BUILDER_IMAGE_CACHE_TTL seconds, and they are pulled at startup unless
+# PREWARM_BUILDER_IMAGES is false.
+BUILDER_IMAGES = [
+    "hyperledger/fabric-ccenv:" + FABRIC_VERSION.rsplit(".", 1)[0],
+    "hyperledger/fabric-baseos:" + FABRIC_VERSION.rsplit(".", 1)[0],
+]
+BUILDER_IMAGE_CACHE_TTL = float(os.getenv("BUILDER_IMAGE_CACHE_TTL", "3600"))
+PREWARM_BUILDER_IMAGES = os.getenv("PREWARM_BUILDER_IMAGES", "True").upper() == "TRUE"
+
+# Background jobs, such as chaincode installation, run on a bounded pool of worker threads.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "5"))
+# Each process marks the jobs it runs alive every JOB_HEARTBEAT_INTERVAL
+# seconds. A running job that was not marked for JOB_HEARTBEAT_TIMEOUT
+# seconds, or whose process is gone, is queued again.
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "10"))
+JOB_HEARTBEAT_TIMEOUT = float(os.getenv("JOB_HEARTBEAT_TIMEOUT", "60"))
+# How many peers install a chaincode package at the same time.
+CHAINCODE_INSTALL_PARALLELISM = int(os.getenv("CHAINCODE_INSTALL_PARALLELISM", "4"))
+# Uploaded packages are stored once per content hash, and the package IDs each
+# peer has installed are cached for this many seconds.
+CHAINCODE_PACKAGE_DIR = os.path.join(CELLO_HOME, "packages")
+CHAINCODE_INSTALLED_INDEX_TTL = float(os.getenv("CHAINCODE_INSTALLED_INDEX_TTL", "300"))
+# How many nodes join a new channel at the same time, and how long to wait for it to start.
+CHANNEL_JOIN_PARALLELISM = int(os.getenv("CHANNEL_JOIN_PARALLELISM", "8"))
+CHANNEL_READY_TIMEOUT = float(os.getenv("CHANNEL_READY_TIMEOUT", "60"))
 
 LOGGING = {
     "version": 1,
@@ -157,10 +216,12 @@ LOGGING = {
             "level": "DEBUG",
             "propagate": False,
         },
+        "hyperledger_fabric": {"handlers": ["console"], "level": "DEBUG", "propagate": False},
         "organization": {"handlers": ["console"], "level": "DEBUG", "propagate": False},
         "node": {"handlers": ["console"], "level": "DEBUG", "propagate": False},
         "channel": {"handlers": ["console"], "level": "DEBUG", "propagate": False},
         "chaincode": {"handlers": ["console"], "level": "DEBUG", "propagate": False},
+        "job": {"handlers": ["console"], "level": "DEBUG", "propagate": False},
     },
 }
 
@@ -0,0 +1,374 @@
+import asyncio
+import datetime
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+import yaml
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import ExtendedKeyUsageOID, NameOID
+from django.test import SimpleTestCase
+from prometheus_client import REGISTRY
+
+from hyperledger_fabric import context, issuer, runner
+from hyperledger_fabric.context import get_fabric_context
+from hyperledger_fabric.runner import CommandError, arun, get_command_labels, run
+
+
+class FabricContextTestCase(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.crypto_config = os.path.join(directory.name, "crypto-config.yaml")
+        self.write_crypto_config(["peer0"])
+
+        for name, value in (
+                ("CRYPTO_CONFIG", self.crypto_config),
+                ("CELLO_HOME", "/etc/hyperledger/fabric"),
+                ("_context", None),
+                ("_context_key", None)):
+            patcher = mock.patch.object(context, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write_crypto_config(self, peers):
+        with open(self.crypto_config, "w", encoding="utf-8") as f:
+            yaml.safe_dump({
+                "PeerOrgs": [{
+                    "Name": "Org1",
+                    "Domain": "org1.example.com",
+                    "Specs": [dict(Hostname=peer) for peer in peers],
+                }],
+                "OrdererOrgs": [{
+                    "Name": "Orderer",
+                    "Domain": "example.com",
+                    "Specs": [dict(Hostname="orderer0")],
+                }],
+            }, f)
+
+    def test_context_precomputes_peer_env_and_orderer(self):
+        fabric_context = get_fabric_context()
+        self.assertEqual(fabric_context.peer_msp_id, "Org1MSP")
+        self.assertEqual(fabric_context.peer.env, {
+            "CORE_PEER_TLS_ENABLED": "true",
+            "CORE_PEER_LOCALMSPID": "Org1MSP",
+            "CORE_PEER_TLS_ROOTCERT_FILE":
+                "/etc/hyperledger/fabric/peerOrganizations/org1.example.com/peers/peer0.org1.example.com/tls/ca.crt",
+            "CORE_PEER_MSPCONFIGPATH":
+                "/etc/hyperledger/fabric/peerOrganizations/org1.example.com/users/Admin@org1.example.com/msp",
+            "CORE_PEER_ADDRESS": "peer0.org1.example.com:7051",
+            "FABRIC_CFG_PATH": "/etc/hyperledger/fabric/peerOrganizations/org1.example.com/peers/peer0.org1.example.com",
+        })
+        self.assertEqual(fabric_context.orderer.address, "orderer0.example.com:7050")
+        self.assertEqual(fabric_context.orderer.admin_address, "orderer0.example.com:7053")
+        self.assertEqual(
+            fabric_context.orderer.ca_file,
+            "/etc/hyperledger/fabric/ordererOrganizations/example.com/orderers/orderer0.example.com"
+            "/msp/tlscacerts/tlsca.example.com-cert.pem")
+        self.assertEqual(fabric_context.get_domain(True), "org1.example.com")
+        self.assertEqual(fabric_context.get_domain(False), "example.com")
+
+    def test_context_is_parsed_once(self):
+        with mock.patch.object(context.yaml, "safe_load", wraps=yaml.safe_load) as safe_load:
+            first = get_fabric_context()
+            second = get_fabric_context()
+        self.assertIs(first, second)
+        self.assertEqual(safe_load.call_count, 1)
+
+    def test_context_is_reloaded_when_crypto_config_changes(self):
+        first = get_fabric_context()
+        self.write_crypto_config(["peer0", "peer1"])
+        # Make sure the mtime moves even on filesystems with coarse timestamps.
+        stat = os.stat(self.crypto_config)
+        os.utime(self.crypto_config, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        second = get_fabric_context()
+        self.assertIsNot(first, second)
+        self.assertEqual([peer.name for peer in second.peers], ["peer0", "peer1"])
+
+
+class RunnerTestCase(SimpleTestCase):
+    def setUp(self):
+        for name, value in (
+                ("RUNNER_RETRY_BACKOFF", 0),
+                ("_target_semaphores", {})):
+            patcher = mock.patch.object(runner, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def python(self, code):
+        return [sys.executable, "-c", code]
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_command_labels_stop_at_arguments(self):
+        for command, labels in (
+                (["/cello/bin/peer", "lifecycle", "chaincode", "install", "/cello/packages/a.tar.gz"],
+                 ("peer", "lifecycle chaincode install")),
+                (["/cello/bin/peer", "channel", "join", "-b", "mychannel.block"], ("peer", "channel join")),
+                (["/cello/bin/osnadmin", "channel", "join", "--channelID", "mychannel"],
+                 ("osnadmin", "channel join")),
+                (["/cello/bin/configtxlator", "proto_decode", "--input=config_block.pb"],
+                 ("configtxlator", "proto_decode")),
+                (["/cello/bin/configtxgen", "-profile", "SampleAppChannelEtcdRaft"], ("configtxgen", ""))):
+            self.assertEqual(get_command_labels(command), labels)
+
+    def test_run_records_duration_and_exit_code(self):
+        labels = dict(tool=os.path.basename(sys.executable), command="")
+        count = self.sample("cello_agent_command_duration_seconds_count", **labels)
+        failures = self.sample("cello_agent_command_exits_total", exit_code="3", **labels)
+
+        run(self.python("print('ok')"))
+        with self.assertRaises(subprocess.CalledProcessError):
+            run(self.python("exit(3)"))
+
+        self.assertEqual(self.sample("cello_agent_command_duration_seconds_count", **labels), count + 2)
+        self.assertEqual(self.sample("cello_agent_command_exits_total", exit_code="3", **labels), failures + 1)
+        self.assertEqual(self.sample("cello_agent_commands_in_flight", **labels), 0)
+
+    def test_run_captures_output(self):
+        result = run(self.python("import sys; print('out'); print('err', file=sys.stderr); exit(1)"), check=False)
+        self.assertEqual((result.returncode, result.stdout, result.stderr), (1, "out\n", "err\n"))
+        self.assertEqual(result.attempts, 1)
+        self.assertGreater(result.duration, 0)
+
+        with self.assertRaises(CommandError) as e:
+            run(self.python("import sys; print('err', file=sys.stderr); exit(1)"))
+        self.assertEqual(e.exception.stderr, "err\n")
+        self.assertEqual(e.exception.result.returncode, 1)
+
+    def test_only_idempotent_commands_are_retried_on_connection_errors(self):
+        unreachable = self.python("import sys; print('connection refused', file=sys.stderr); exit(1)")
+        with self.assertRaises(CommandError) as e:
+            run(unreachable)
+        self.assertEqual(e.exception.result.attempts, 1)
+
+        with mock.patch.object(runner, "RUNNER_RETRIES", 2):
+            with self.assertRaises(CommandError) as e:
+                run(unreachable, idempotent=True)
+            self.assertEqual(e.exception.result.attempts, 3)
+
+            # Other failures are answers, not something to retry.
+            with self.assertRaises(CommandError) as e:
+                run(self.python("exit(1)"), idempotent=True)
+            self.assertEqual(e.exception.result.attempts, 1)
+
+    def test_hung_command_is_killed(self):
+        with mock.patch.object(runner, "RUNNER_RETRIES", 1):
+            start = time.monotonic()
+            with self.assertRaises(subprocess.TimeoutExpired):
+                run(self.python("import time; time.sleep(10)"), timeout=0.2, idempotent=True)
+            self.assertLess(time.monotonic() - start, 5)
+
+    def test_commands_against_one_target_are_limited(self):
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def fake_run(*args, **kwargs):
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.pop()
+            return subprocess.CompletedProcess(args[0], 0, "", "")
+
+        with mock.patch.object(runner, "RUNNER_TARGET_CONCURRENCY", 2), \
+                mock.patch.object(runner.subprocess, "run", fake_run):
+            threads = [
+                threading.Thread(target=run, args=(["peer", "channel", "list"],), kwargs=dict(target="peer0:7051"))
+                for _ in range(6)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(max(peak), 2)
+
+    def test_arun_captures_output(self):
+        result = asyncio.run(arun(
+            self.python("import sys; print('out'); print('err', file=sys.stderr); exit(1)"),
+            check=False))
+        self.assertEqual((result.returncode, result.stdout, result.stderr), (1, "out\n", "err\n"))
+
+        with self.assertRaises(CommandError):
+            asyncio.run(arun(self.python("exit(1)")))
+
+    def test_arun_kills_hung_command(self):
+        start = time.monotonic()
+        with self.assertRaises(subprocess.TimeoutExpired):
+            asyncio.run(arun(self.python("import time; time.sleep(10)"), timeout=0.2))
+        self.assertLess(time.monotonic() - start, 5)
+
+    def test_arun_runs_commands_concurrently_within_the_target_limit(self):
+        async def run_all():
+            return await asyncio.gather(*(
+                arun(self.python("import time; time.sleep(0.3)"), target="peer0:7051")
+                for _ in range(4)))
+
+        with mock.patch.object(runner, "RUNNER_TARGET_CONCURRENCY", 2):
+            start = time.monotonic()
+            asyncio.run(run_all())
+            duration = time.monotonic() - start
+        # Two rounds of two, not four in a row nor all at once.
+        self.assertGreaterEqual(duration, 0.6)
+        self.assertLess(duration, 1.2)
+
+    def test_arun_waits_for_the_target_without_polling(self):
+        semaphore = runner._get_target_semaphore("peer0:7051")
+
+        async def wait():
+            for _ in range(runner.RUNNER_TARGET_CONCURRENCY):
+                semaphore.acquire()
+            with mock.patch.object(runner.asyncio, "sleep", wraps=asyncio.sleep) as sleep:
+                waiting = asyncio.ensure_future(arun(self.python("pass"), target="peer0:7051"))
+                await asyncio.sleep(0.1)
+                self.assertFalse(waiting.done())
+                semaphore.release()
+                await waiting
+            # The loop only slept in this test, never in a polling loop of arun.
+            self.assertEqual(sleep.call_count, 1)
+
+        asyncio.run(wait())
+
+    def test_cancelled_arun_gives_the_target_back(self):
+        async def cancel():
+            semaphore.acquire()
+            waiting = asyncio.ensure_future(arun(self.python("pass"), target="peer0:7051"))
+            await asyncio.sleep(0.1)
+            waiting.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiting
+            semaphore.release()
+            await asyncio.sleep(0.1)
+
+        with mock.patch.object(runner, "RUNNER_TARGET_CONCURRENCY", 1):
+            semaphore = runner._get_target_semaphore("peer0:7051")
+            asyncio.run(cancel())
+            self.assertTrue(semaphore.acquire(blocking=False))
+
+
+def make_ca(directory, name):
+    """Write a self-signed CA the way cryptogen generate does, and return its certificate."""
+    key = ec.generate_private_key(ec.SECP256R1())
+    subject = x509.Name([
+        x509.NameAttribute(NameOID.COUNTRY_NAME, "CN"),
+        x509.NameAttribute(NameOID.ORGANIZATION_NAME, name.split(".", 1)[1]),
+        x509.NameAttribute(NameOID.COMMON_NAME, name),
+    ])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = x509.CertificateBuilder() \
+        .subject_name(subject) \
+        .issuer_name(subject) \
+        .public_key(key.public_key()) \
+        .serial_number(x509.random_serial_number()) \
+        .not_valid_before(now) \
+        .not_valid_after(now + datetime.timedelta(days=1)) \
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True) \
+        .add_extension(x509.SubjectKeyIdentifier.from_public_key(key.public_key()), critical=False) \
+        .sign(key, hashes.SHA256())
+    os.makedirs(directory)
+    with open(os.path.join(directory, "priv_sk"), "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+    with open(os.path.join(directory, name + "-cert.pem"), "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    return cert
+
+
+class IssuerTestCase(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.home = directory.name
+        self.organization = os.path.join(self.home, "peerOrganizations", "org1.example.com")
+        self.ca = make_ca(os.path.join(self.organization, "ca"), "ca.org1.example.com")
+        self.tls_ca = make_ca(os.path.join(self.organization, "tlsca"), "tlsca.org1.example.com")
+        self.crypto_config = {
+            "PeerOrgs": [{
+                "Name": "Org1",
+                "Domain": "org1.example.com",
+                "CA": {"Country": "CN", "Province": "CP", "Locality": "BJ"},
+                "EnableNodeOUs": True,
+                "Specs": [{"Hostname": "peer0", "SANS": ["localhost", "127.0.0.1"]}],
+                "Template": {"Count": 1, "Start": 1},
+                "Users": {"Count": 1},
+            }],
+        }
+
+    def read_cert(self, *path):
+        with open(os.path.join(self.organization, *path), "rb") as f:
+            return x509.load_pem_x509_certificate(f.read())
+
+    def test_extend_writes_the_cryptogen_layout(self):
+        written = issuer.extend(self.home, self.crypto_config)
+
+        self.assertEqual([os.path.relpath(path, self.organization) for path in written], [
+            "peers/peer0.org1.example.com", "peers/peer1.org1.example.com", "users/User1@org1.example.com"])
+        peer = os.path.join("peers", "peer0.org1.example.com")
+        self.assertEqual(sorted(
+            os.path.relpath(os.path.join(root, file_name), os.path.join(self.organization, peer))
+            for root, _, file_names in os.walk(os.path.join(self.organization, peer))
+            for file_name in file_names
+        ), [
+            "msp/cacerts/ca.org1.example.com-cert.pem",
+            "msp/config.yaml",
+            "msp/keystore/priv_sk",
+            "msp/signcerts/peer0.org1.example.com-cert.pem",
+            "msp/tlscacerts/tlsca.org1.example.com-cert.pem",
+            "tls/ca.crt",
+            "tls/server.crt",
+            "tls/server.key",
+        ])
+        with open(os.path.join(self.organization, peer, "msp", "config.yaml"), encoding="utf-8") as f:
+            node_ous = yaml.safe_load(f)["NodeOUs"]
+        self.assertEqual(node_ous["PeerOUIdentifier"], {
+            "Certificate": "cacerts/ca.org1.example.com-cert.pem",
+            "OrganizationalUnitIdentifier": "peer",
+        })
+
+        sign_cert = self.read_cert(peer, "msp", "signcerts", "peer0.org1.example.com-cert.pem")
+        sign_cert.verify_directly_issued_by(self.ca)
+        self.assertEqual(
+            sign_cert.subject.rfc4514_string(), "CN=peer0.org1.example.com,OU=peer,L=BJ,ST=CP,C=CN")
+        tls_cert = self.read_cert(peer, "tls", "server.crt")
+        tls_cert.verify_directly_issued_by(self.tls_ca)
+        self.assertEqual(
+            tls_cert.extensions.get_extension_for_class(x509.SubjectAlternativeName).value.get_values_for_type(
+                x509.DNSName),
+            ["peer0.org1.example.com", "peer0", "localhost"])
+        self.assertEqual(
+            list(tls_cert.extensions.get_extension_for_class(x509.ExtendedKeyUsage).value),
+            [ExtendedKeyUsageOID.SERVER_AUTH, ExtendedKeyUsageOID.CLIENT_AUTH])
+
+        user = os.path.join("users", "User1@org1.example.com")
+        self.assertEqual(
+            self.read_cert(user, "msp", "signcerts", "User1@org1.example.com-cert.pem").subject.get_attributes_for_oid(
+                NameOID.ORGANIZATIONAL_UNIT_NAME)[0].value,
+            "client")
+        self.assertTrue(os.path.exists(os.path.join(self.organization, user, "tls", "client.key")))
+
+    def test_extend_only_writes_new_nodes(self):
+        issuer.extend(self.home, self.crypto_config)
+        cert = self.read_cert("peers", "peer0.org1.example.com", "tls", "server.crt")
+
+        self.crypto_config["PeerOrgs"][0]["Specs"].append({"Hostname": "peer2"})
+        written = issuer.extend(self.home, self.crypto_config)
+
+        self.assertEqual([os.path.basename(path) for path in written], ["peer2.org1.example.com"])
+        self.assertEqual(self.read_cert("peers", "peer0.org1.example.com", "tls", "server.crt"), cert)
+
+    def test_extend_needs_existing_organizations(self):
+        self.crypto_config["OrdererOrgs"] = [{"Name": "Orderer", "Domain": "example.com", "Specs": []}]
+
+        with self.assertRaises(FileNotFoundError):
+            issuer.extend(self.home, self.crypto_config)
+        self.assertFalse(os.path.exists(os.path.join(self.organization, "peers")))
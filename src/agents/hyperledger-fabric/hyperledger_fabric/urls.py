@@ -23,7 +23,8 @@ from rest_framework.routers import DefaultRouter
 from chaincode.views import ChaincodeViewSet
 from channel.views import ChannelViewSet
 from hyperledger_fabric.settings import WEBROOT
-from hyperledger_fabric.views import HealthCheckViewSet
+from hyperledger_fabric.views import HealthCheckViewSet, MetricsViewSet
+from job.views import JobViewSet
 from organization.views import OrganizationViewSet
 from node.views import NodeViewSet
 
@@ -32,7 +33,9 @@ router.register("organizations", OrganizationViewSet, basename="organization")
 router.register("nodes", NodeViewSet, basename="node")
 router.register("channels", ChannelViewSet, basename="channel")
 router.register("chaincodes", ChaincodeViewSet, basename="chaincode")
+router.register("jobs", JobViewSet, basename="job")
 router.register("health", HealthCheckViewSet, basename="health")
+router.register("metrics", MetricsViewSet, basename="metrics")
 
 urlpatterns = [
     path('admin/', admin.site.urls),
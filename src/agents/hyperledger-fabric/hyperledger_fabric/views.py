@@ -1,7 +1,12 @@
+from django.http import HttpResponse
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema
+from prometheus_client import CONTENT_TYPE_LATEST
 from rest_framework import viewsets
 from rest_framework.response import Response
 
+from hyperledger_fabric.metrics import get_metrics
+
 
 class HealthCheckViewSet(viewsets.ViewSet):
     @extend_schema(
@@ -10,3 +15,12 @@ class HealthCheckViewSet(viewsets.ViewSet):
     )
     def list(self, request):
         return Response()
+
+
+class MetricsViewSet(viewsets.ViewSet):
+    @extend_schema(
+        summary="Prometheus metrics",
+        responses={(200, CONTENT_TYPE_LATEST): OpenApiTypes.STR},
+    )
+    def list(self, request):
+        return HttpResponse(get_metrics(), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-18 03:11
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('function', models.CharField(help_text='Dotted path of the function to run', max_length=256)),
+                ('args', models.JSONField(default=list, help_text='Positional arguments of the function')),
+                ('status', models.CharField(choices=[('PENDING', 'PENDING'), ('RUNNING', 'RUNNING'), ('SUCCEEDED', 'SUCCEEDED'), ('FAILED', 'FAILED')], default='PENDING', max_length=16)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ('created_at',),
+                'indexes': [models.Index(fields=['status', 'created_at'], name='job_job_status_3607e2_idx')],
+            },
+        ),
+    ]
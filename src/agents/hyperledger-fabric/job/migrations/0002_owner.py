@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 04:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='When the running job was last marked alive', null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='owner',
+            field=models.CharField(blank=True, default='', help_text='host:pid of the process running the job', max_length=256),
+        ),
+    ]
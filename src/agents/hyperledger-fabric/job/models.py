@@ -0,0 +1,27 @@
+import uuid
+
+from django.db import models
+
+from job.enums import JobStatus
+
+
+class Job(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    function = models.CharField(max_length=256, help_text="Dotted path of the function to run")
+    args = models.JSONField(default=list, help_text="Positional arguments of the function")
+    status = models.CharField(
+        max_length=16,
+        choices=[(job_status.name, job_status.value) for job_status in JobStatus],
+        default=JobStatus.PENDING.name,
+    )
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    owner = models.CharField(max_length=256, blank=True, default="", help_text="host:pid of the process running the job")
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="When the running job was last marked alive")
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("created_at",)
+        indexes = [models.Index(fields=["status", "created_at"])]
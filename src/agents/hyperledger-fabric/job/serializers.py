@@ -0,0 +1,22 @@
+from rest_framework import serializers
+
+from job.models import Job
+
+
+class JobResponseSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = (
+            "id",
+            "function",
+            "status",
+            "result",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        )
+
+
+class JobIDSerializer(serializers.Serializer):
+    job_id = serializers.UUIDField(help_text="Job ID, poll /jobs/{id} for its status")
@@ -0,0 +1,193 @@
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+from typing import Any, Callable, List, Optional, Set
+from uuid import UUID
+
+from django.db import close_old_connections
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from hyperledger_fabric.settings import JOB_HEARTBEAT_INTERVAL, JOB_HEARTBEAT_TIMEOUT, JOB_POLL_INTERVAL, \
+    JOB_WORKERS
+from job.enums import JobStatus
+from job.models import Job
+
+LOG = logging.getLogger(__name__)
+
+_wakeup = threading.Event()
+_workers: List[threading.Thread] = []
+_workers_lock = threading.Lock()
+# The owner of the jobs this process claims, and the ones it is running.
+HOST = socket.gethostname()
+OWNER = "{}:{}".format(HOST, os.getpid())
+_running: Set[UUID] = set()
+_running_lock = threading.Lock()
+
+
+def submit_job(function: Callable, *args: Any) -> Job:
+    """Queue function(*args) for the worker pool. Arguments must be JSON serializable."""
+    job = Job.objects.create(
+        function="{}.{}".format(function.__module__, function.__qualname__),
+        args=list(args),
+    )
+    LOG.info("Job %s queued: %s", job.id, job.function)
+    _wakeup.set()
+    return job
+
+
+def get_job(pk: str) -> Job:
+    return Job.objects.get(id=pk)
+
+
+def _claim_next_job() -> Optional[Job]:
+    for job in Job.objects.filter(status=JobStatus.PENDING.name).order_by("created_at")[:JOB_WORKERS]:
+        # The job is marked as running here before it is claimed, so that
+        # resume_jobs never sees it owned by this process but not running.
+        with _running_lock:
+            _running.add(job.id)
+        # Only one worker wins the update, the others move on to the next job.
+        now = timezone.now()
+        if Job.objects.filter(id=job.id, status=JobStatus.PENDING.name).update(
+                status=JobStatus.RUNNING.name,
+                started_at=now,
+                owner=OWNER,
+                heartbeat_at=now):
+            job.refresh_from_db()
+            return job
+        with _running_lock:
+            _running.discard(job.id)
+    return None
+
+
+def _finish_job(job: Job) -> bool:
+    """Store the outcome of the job, unless it was queued again meanwhile."""
+    return bool(Job.objects.filter(id=job.id, status=JobStatus.RUNNING.name, owner=OWNER).update(
+        result=job.result,
+        error=job.error,
+        status=job.status,
+        finished_at=job.finished_at))
+
+
+def run_next_job() -> bool:
+    """Run the oldest pending job in the calling thread. Return False if there is none."""
+    job = _claim_next_job()
+    if job is None:
+        return False
+
+    LOG.info("Job %s started: %s", job.id, job.function)
+    try:
+        job.result = import_string(job.function)(*job.args)
+        job.status = JobStatus.SUCCEEDED.name
+    except Exception:
+        LOG.exception("Job %s failed", job.id)
+        job.error = traceback.format_exc()
+        job.status = JobStatus.FAILED.name
+    job.finished_at = timezone.now()
+    try:
+        if _finish_job(job):
+            LOG.info("Job %s %s", job.id, job.status.lower())
+        else:
+            LOG.warning("Job %s %s after it was queued again", job.id, job.status.lower())
+    finally:
+        with _running_lock:
+            _running.discard(job.id)
+    return True
+
+
+def _owner_is_gone(job: Job) -> bool:
+    host, _, pid = job.owner.rpartition(":")
+    if job.owner == OWNER:
+        # A restarted container often gets the same pid again.
+        with _running_lock:
+            return job.id not in _running
+    if host != HOST:
+        # Only the heartbeat tells whether a process on another host is alive.
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except (ProcessLookupError, ValueError):
+        return True
+    except PermissionError:
+        pass
+    return False
+
+
+def resume_jobs() -> int:
+    """Queue again the running jobs whose process is gone or stopped marking them alive."""
+    stale = timezone.now() - timedelta(seconds=JOB_HEARTBEAT_TIMEOUT)
+    count = 0
+    for job in Job.objects.filter(status=JobStatus.RUNNING.name).only("id", "owner", "heartbeat_at"):
+        if job.heartbeat_at is not None and job.heartbeat_at >= stale and not _owner_is_gone(job):
+            continue
+        # Skip the job if it was marked alive meanwhile.
+        count += Job.objects.filter(
+            id=job.id,
+            status=JobStatus.RUNNING.name,
+            heartbeat_at=job.heartbeat_at,
+        ).update(
+            status=JobStatus.PENDING.name,
+            started_at=None,
+            owner="",
+            heartbeat_at=None)
+    if count:
+        LOG.info("%d interrupted jobs queued again", count)
+    return count
+
+
+def mark_jobs_alive() -> int:
+    """Mark the jobs this process is running alive, and return how many."""
+    with _running_lock:
+        running = list(_running)
+    if not running:
+        return 0
+    return Job.objects.filter(id__in=running, owner=OWNER, status=JobStatus.RUNNING.name).update(
+        heartbeat_at=timezone.now())
+
+
+def _work():
+    while True:
+        try:
+            while run_next_job():
+                pass
+        except Exception:
+            LOG.exception("Job worker error")
+        finally:
+            close_old_connections()
+        # Jobs submitted in this process wake the workers up, the interval
+        # picks up the rest.
+        _wakeup.wait(JOB_POLL_INTERVAL)
+        _wakeup.clear()
+
+
+def _heartbeat():
+    while True:
+        try:
+            mark_jobs_alive()
+            # Jobs of processes that stopped are picked up by the ones still running.
+            if resume_jobs():
+                _wakeup.set()
+        except Exception:
+            LOG.exception("Job heartbeat error")
+        finally:
+            close_old_connections()
+        time.sleep(JOB_HEARTBEAT_INTERVAL)
+
+
+def start_workers():
+    """Resume interrupted jobs and start JOB_WORKERS worker threads and a heartbeat, once per process."""
+    with _workers_lock:
+        if _workers:
+            return
+        resume_jobs()
+        for i in range(JOB_WORKERS):
+            worker = threading.Thread(target=_work, name="job-worker-{}".format(i), daemon=True)
+            worker.start()
+            _workers.append(worker)
+        heartbeat = threading.Thread(target=_heartbeat, name="job-heartbeat", daemon=True)
+        heartbeat.start()
+        _workers.append(heartbeat)
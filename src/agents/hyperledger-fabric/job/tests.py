@@ -0,0 +1,174 @@
+import os
+from datetime import timedelta
+from unittest import mock
+
+from django.db.models.query import QuerySet
+from django.test import TestCase
+from django.utils import timezone
+
+from job import service
+from job.enums import JobStatus
+from job.models import Job
+from job.service import HOST, OWNER, resume_jobs, run_next_job, submit_job
+
+
+def add(a, b):
+    return a + b
+
+
+def fail():
+    raise RuntimeError("peer lifecycle chaincode install failed")
+
+
+def resume():
+    return resume_jobs()
+
+
+class JobTestCase(TestCase):
+    def test_submitted_job_runs_once(self):
+        job = submit_job(add, 1, 2)
+        self.assertEqual(job.function, "job.tests.add")
+        self.assertEqual(job.status, JobStatus.PENDING.name)
+
+        self.assertTrue(run_next_job())
+        self.assertFalse(run_next_job())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.SUCCEEDED.name)
+        self.assertEqual(job.result, 3)
+        self.assertIsNotNone(job.started_at)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_failed_job_keeps_the_error(self):
+        job = submit_job(fail)
+        run_next_job()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.FAILED.name)
+        self.assertIn("peer lifecycle chaincode install failed", job.error)
+
+    def test_jobs_run_in_submission_order(self):
+        first = submit_job(add, 1, 1)
+        second = submit_job(add, 2, 2)
+        run_next_job()
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.status, JobStatus.SUCCEEDED.name)
+        self.assertEqual(second.status, JobStatus.PENDING.name)
+
+    def test_interrupted_job_is_resumed(self):
+        job = submit_job(add, 1, 2)
+        Job.objects.filter(id=job.id).update(status=JobStatus.RUNNING.name)
+
+        self.assertEqual(resume_jobs(), 1)
+        self.assertTrue(run_next_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.SUCCEEDED.name)
+
+    def running(self, owner, heartbeat_at):
+        job = submit_job(add, 1, 2)
+        Job.objects.filter(id=job.id).update(status=JobStatus.RUNNING.name, owner=owner, heartbeat_at=heartbeat_at)
+        return job
+
+    def test_job_of_a_live_process_is_not_resumed(self):
+        job = self.running("{}:{}".format(HOST, os.getppid()), timezone.now())
+        self.running("other-host:1", timezone.now())
+
+        self.assertEqual(resume_jobs(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.RUNNING.name)
+
+    def test_job_without_a_recent_heartbeat_is_resumed(self):
+        job = self.running("other-host:1", timezone.now() - timedelta(days=1))
+
+        self.assertEqual(resume_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.PENDING.name)
+        self.assertEqual(job.owner, "")
+        self.assertIsNone(job.heartbeat_at)
+
+    def test_job_of_a_stopped_process_is_resumed(self):
+        # The pid of a process that exited and was reaped.
+        pid = os.fork()
+        if not pid:
+            os._exit(0)
+        os.waitpid(pid, 0)
+        self.running("{}:{}".format(HOST, pid), timezone.now())
+
+        self.assertEqual(resume_jobs(), 1)
+
+    def test_job_this_process_is_not_running_is_resumed(self):
+        self.running(OWNER, timezone.now())
+
+        self.assertEqual(resume_jobs(), 1)
+
+    def test_running_jobs_are_marked_alive(self):
+        job = self.running(OWNER, timezone.now() - timedelta(days=1))
+        service._running.add(job.id)
+        self.addCleanup(service._running.discard, job.id)
+
+        self.assertEqual(service.mark_jobs_alive(), 1)
+        self.assertEqual(resume_jobs(), 0)
+
+    def test_job_status_endpoint(self):
+        job = submit_job(add, 1, 2)
+        run_next_job()
+
+        response = self.client.get("/api/v1/jobs/{}".format(job.id))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], JobStatus.SUCCEEDED.name)
+        self.assertEqual(response.json()["result"], 3)
+
+        response = self.client.get("/api/v1/jobs/00000000-0000-0000-0000-000000000000")
+        self.assertEqual(response.status_code, 404)
+
+    def test_claimed_job_is_not_resumed(self):
+        job = submit_job(add, 1, 2)
+        update = QuerySet.update
+        resumed = []
+
+        def claim_then_resume(queryset, **kwargs):
+            count = update(queryset, **kwargs)
+            if kwargs.get("owner") == OWNER:
+                resumed.append(resume_jobs())
+            return count
+
+        with mock.patch.object(QuerySet, "update", claim_then_resume):
+            self.assertTrue(run_next_job())
+
+        self.assertEqual(resumed, [0])
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.SUCCEEDED.name)
+
+    def test_running_job_is_not_resumed(self):
+        job = submit_job(resume)
+        finish_job = service._finish_job
+        resumed = []
+
+        def resume_then_finish(job):
+            resumed.append(resume_jobs())
+            return finish_job(job)
+
+        with mock.patch.object(service, "_finish_job", resume_then_finish):
+            self.assertTrue(run_next_job())
+
+        self.assertEqual(resumed, [0])
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.SUCCEEDED.name)
+        self.assertEqual(job.result, 0)
+        self.assertFalse(service._running)
+
+    def test_requeued_job_is_not_overwritten(self):
+        job = submit_job(add, 1, 2)
+        finish_job = service._finish_job
+
+        def requeue(job):
+            Job.objects.filter(id=job.id).update(status=JobStatus.PENDING.name, owner="")
+            return finish_job(job)
+
+        with mock.patch.object(service, "_finish_job", requeue), self.assertLogs("job.service", "WARNING"):
+            run_next_job()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.PENDING.name)
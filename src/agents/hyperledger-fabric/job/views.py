@@ -0,0 +1,25 @@
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework import viewsets, status
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from job.serializers import JobResponseSerializer
+from job.service import get_job
+
+
+class JobViewSet(viewsets.ViewSet):
+    @extend_schema(
+        parameters=[OpenApiParameter("id", OpenApiTypes.UUID, OpenApiParameter.PATH)],
+        responses={200: JobResponseSerializer}
+    )
+    def retrieve(self, request, pk=None):
+        try:
+            job = get_job(pk)
+        except (ObjectDoesNotExist, ValidationError):
+            raise NotFound("Job {} not found".format(pk))
+
+        return Response(
+            data=JobResponseSerializer(job).data,
+            status=status.HTTP_200_OK)
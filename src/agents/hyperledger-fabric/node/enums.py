@@ -4,3 +4,10 @@ from enum import Enum
 class NodeType(Enum):
     PEER = "PEER"
     ORDERER = "ORDERER"
+
+
+class NodeTransport(Enum):
+    # MSP, TLS and configuration are zipped into base64 encoded environment variables.
+    ENV = "ENV"
+    # MSP, TLS and configuration are uploaded into the container as a tar archive before it starts.
+    ARCHIVE = "ARCHIVE"
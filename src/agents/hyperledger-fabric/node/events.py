@@ -0,0 +1,223 @@
+"""
+Node state kept current from the Docker event stream.
+
+A background watcher lists the labelled node containers once, then follows
+their events and updates an in-memory table, so status reads do not touch the
+Docker socket. Whenever the stream breaks the table is marked stale, readers
+fall back to asking Docker, and the watcher lists the containers again once it
+reconnects. Events are requested from just before that list, so none are lost
+in between.
+"""
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import docker
+
+from hyperledger_fabric.metrics import DOCKER_CALL_DURATION
+from hyperledger_fabric.settings import NODE_EVENTS_RETRY_INTERVAL, NODE_STATE_WATCHER
+
+LOG = logging.getLogger(__name__)
+docker_client = docker.DockerClient("unix:///var/run/docker.sock")
+
+# Every node container is labelled, so all of them are listed with one Docker call.
+NODE_TYPE_LABEL = "org.hyperledger.cello.node.type"
+NODE_NAME_LABEL = "org.hyperledger.cello.node.name"
+NODE_DOMAIN_LABEL = "org.hyperledger.cello.node.domain"
+# The health suffix of a container status, e.g. "Up 2 hours (healthy)".
+_HEALTH_PATTERN = re.compile(r"\((healthy|unhealthy|health: starting)\)")
+# The exit code of a stopped container, e.g. "Exited (2) 5 minutes ago".
+_EXIT_CODE_PATTERN = re.compile(r"^Exited \((\d+)\)")
+# Container status after each event, the others do not change it.
+_EVENT_STATUSES = {
+    "create": "created",
+    "start": "running",
+    "restart": "running",
+    "unpause": "running",
+    "pause": "paused",
+    "die": "exited",
+}
+
+
+@dataclass(frozen=True)
+class NodeState:
+    container: str
+    type: str
+    name: str
+    domain: str
+    status: str
+    health: Optional[str] = None
+    exit_code: Optional[int] = None
+    # When the status last changed, unknown for containers found by listing them.
+    last_transition: Optional[datetime] = None
+
+
+def parse_container(attrs: Dict[str, Any]) -> NodeState:
+    """Build the state of a container from its entry in a sparse container list."""
+    labels = attrs["Labels"]
+    health = _HEALTH_PATTERN.search(attrs["Status"])
+    exit_code = _EXIT_CODE_PATTERN.search(attrs["Status"])
+    return NodeState(
+        container=attrs["Names"][0].lstrip("/"),
+        type=labels[NODE_TYPE_LABEL],
+        name=labels[NODE_NAME_LABEL],
+        domain=labels.get(NODE_DOMAIN_LABEL, ""),
+        status=attrs["State"],
+        health=health.group(1).replace("health: ", "") if health else None,
+        exit_code=int(exit_code.group(1)) if exit_code else None,
+    )
+
+
+class NodeStateCache:
+    """Lock-protected table of node states, keyed by container name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[str, NodeState] = {}
+        self._synced = False
+
+    @property
+    def synced(self) -> bool:
+        """Whether the table follows the event stream, if not it must not be trusted."""
+        return self._synced
+
+    def resync(self, states: Iterable[NodeState]):
+        states = {state.container: state for state in states}
+        with self._lock:
+            self._states = states
+            self._synced = True
+
+    def invalidate(self):
+        with self._lock:
+            self._synced = False
+
+    def get(self, container: str) -> Optional[NodeState]:
+        with self._lock:
+            return self._states.get(container) if self._synced else None
+
+    def all(self) -> Optional[List[NodeState]]:
+        with self._lock:
+            return list(self._states.values()) if self._synced else None
+
+    def apply(self, event: Dict[str, Any]):
+        """Update the table with one decoded Docker container event."""
+        action = event.get("Action") or event.get("status", "")
+        attributes = event.get("Actor", {}).get("Attributes", {})
+        container = attributes.get("name")
+        if container is None or NODE_TYPE_LABEL not in attributes:
+            return
+        at = datetime.fromtimestamp(event["timeNano"] / 1e9, timezone.utc) if "timeNano" in event else None
+
+        with self._lock:
+            state = self._states.get(container)
+            if action == "destroy":
+                self._states.pop(container, None)
+                return
+            if state is None:
+                state = NodeState(
+                    container=container,
+                    type=attributes[NODE_TYPE_LABEL],
+                    name=attributes.get(NODE_NAME_LABEL, container.split(".", 1)[0]),
+                    domain=attributes.get(NODE_DOMAIN_LABEL, ""),
+                    status="created",
+                )
+            if action.startswith("health_status:"):
+                state = replace(state, health=action.split(":", 1)[1].strip())
+            elif action in _EVENT_STATUSES and _EVENT_STATUSES[action] != state.status:
+                state = replace(
+                    state,
+                    status=_EVENT_STATUSES[action],
+                    health=None,
+                    exit_code=int(attributes["exitCode"]) if action == "die" and "exitCode" in attributes else None,
+                    last_transition=at)
+            self._states[container] = state
+
+
+class DockerEventSource:
+    """The labelled containers and their events, from a Docker daemon."""
+
+    def __init__(self, client: docker.DockerClient):
+        self.client = client
+
+    def list(self) -> List[Dict[str, Any]]:
+        # Sparse, or docker-py inspects every listed container.
+        with DOCKER_CALL_DURATION.labels("containers.list").time():
+            containers = self.client.containers.list(all=True, sparse=True, filters={"label": NODE_TYPE_LABEL})
+        return [container.attrs for container in containers]
+
+    def events(self, since: int) -> Iterator[Dict[str, Any]]:
+        return self.client.events(
+            since=since,
+            decode=True,
+            filters={"type": "container", "label": NODE_TYPE_LABEL})
+
+
+class FakeEventSource:
+    """
+    Event source for tests, without a Docker daemon.
+
+    containers is what list returns. Each call to events replays the next of
+    streams, where an exception in a stream is raised instead of yielded, as
+    a broken connection would be.
+    """
+
+    def __init__(self, containers: List[Dict[str, Any]], streams: List[List[Any]]):
+        self.containers = containers
+        self.streams = list(streams)
+        self.since: List[int] = []
+
+    def list(self) -> List[Dict[str, Any]]:
+        return list(self.containers)
+
+    def events(self, since: int) -> Iterator[Dict[str, Any]]:
+        self.since.append(since)
+        for event in self.streams.pop(0) if self.streams else []:
+            if isinstance(event, BaseException):
+                raise event
+            yield event
+
+
+class NodeStateWatcher:
+    def __init__(self, source, cache: NodeStateCache):
+        self.source = source
+        self.cache = cache
+
+    def sync(self):
+        """Resync the cache and follow the event stream until it ends."""
+        since = int(time.time())
+        self.cache.resync(parse_container(attrs) for attrs in self.source.list())
+        LOG.info("Following node container events")
+        try:
+            for event in self.source.events(since=since):
+                self.cache.apply(event)
+        finally:
+            self.cache.invalidate()
+
+    def run(self):
+        while True:
+            try:
+                self.sync()
+                LOG.warning("Docker event stream ended")
+            except Exception:
+                LOG.exception("Docker event stream failed")
+            time.sleep(NODE_EVENTS_RETRY_INTERVAL)
+
+
+node_states = NodeStateCache()
+_lock = threading.Lock()
+_watcher_started = False
+
+
+def start_watcher():
+    """Follow node container events in the background, once per process, unless disabled."""
+    global _watcher_started
+    with _lock:
+        if _watcher_started or not NODE_STATE_WATCHER:
+            return
+        _watcher_started = True
+    watcher = NodeStateWatcher(DockerEventSource(docker_client), node_states)
+    threading.Thread(target=watcher.run, name="node-state-watcher", daemon=True).start()
@@ -0,0 +1,81 @@
+import os
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hyperledger_fabric.context import get_fabric_context
+from hyperledger_fabric.settings import CRYPTO_CONFIG
+from node.enums import NodeTransport, NodeType
+from node.service import create_node, docker_client
+
+# Log lines Fabric prints once a node serves requests.
+READY_LINES = {
+    NodeType.PEER.name: b"Started peer with ID",
+    NodeType.ORDERER.name: b"Beginning to serve requests",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the time-to-ready of nodes created with each transport. "
+        "Throwaway nodes are created and their containers removed afterwards, "
+        "their crypto material is kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--type",
+            choices=[node_type.name for node_type in NodeType],
+            default=NodeType.PEER.name)
+        parser.add_argument("-n", "--number", type=int, default=3, help="Nodes to create per transport")
+        parser.add_argument("--prefix", default="benchmark", help="Hostname prefix of the created nodes")
+        parser.add_argument("--timeout", type=float, default=120, help="Seconds to wait for a node to be ready")
+        parser.add_argument("--keep", action="store_true", help="Keep the containers running")
+
+    def handle(self, *args, **options):
+        if not os.path.exists(CRYPTO_CONFIG):
+            raise CommandError("{} does not exist, create an organization first.".format(CRYPTO_CONFIG))
+
+        node_type = options["type"]
+        domain = get_fabric_context().get_domain(node_type == NodeType.PEER.name)
+        results = {transport: [] for transport in NodeTransport}
+        # Alternate the transports so both see the same daemon load.
+        for i in range(options["number"]):
+            for transport in NodeTransport:
+                name = "{}-{}-{}".format(options["prefix"], transport.name.lower(), i)
+                start = time.monotonic()
+                create_node(node_type, name, transport.name)
+                started = time.monotonic() - start
+                container = docker_client.containers.get("{}.{}".format(name, domain))
+                try:
+                    ready = self._wait_until_ready(container, READY_LINES[node_type], options["timeout"]) - start
+                    environment = sum(len(entry) for entry in container.attrs["Config"]["Env"])
+                finally:
+                    if not options["keep"]:
+                        container.remove(force=True)
+                results[transport].append((started, ready, environment))
+                self.stdout.write("{}: started in {:.2f}s, ready in {:.2f}s, {} bytes of environment".format(
+                    container.name, started, ready, environment))
+
+        for transport, runs in results.items():
+            self.stdout.write(self.style.SUCCESS(
+                "{}: median {:.2f}s to start, {:.2f}s to ready, {} bytes of environment".format(
+                    transport.name,
+                    statistics.median(run[0] for run in runs),
+                    statistics.median(run[1] for run in runs),
+                    runs[0][2],
+                )
+            ))
+
+    @staticmethod
+    def _wait_until_ready(container, ready_line: bytes, timeout: float) -> float:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            container.reload()
+            if container.status == "exited":
+                raise CommandError("{} exited:\n{}".format(container.name, container.logs(tail=20).decode()))
+            if ready_line in container.logs():
+                return time.monotonic()
+            time.sleep(0.1)
+        raise CommandError("{} was not ready in {}s".format(container.name, timeout))
@@ -0,0 +1,224 @@
+"""
+Rolling summary of the operations endpoints of the nodes.
+
+Every node serves Prometheus metrics at /metrics and its health checks at
+/healthz on its operations listener. A background scraper reads both from all
+running nodes at once every NODE_OPERATIONS_SCRAPE_INTERVAL seconds, and keeps
+a few counters of the last NODE_OPERATIONS_WINDOW scrapes of each node. Rates
+and average latencies are taken between the oldest and the newest of them, so
+callers get throughput without scraping the nodes themselves.
+"""
+import json
+import logging
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from prometheus_client.parser import text_string_to_metric_families
+
+from hyperledger_fabric.settings import NODE_OPERATIONS_SCRAPE_INTERVAL, NODE_OPERATIONS_SCRAPE_TIMEOUT, \
+    NODE_OPERATIONS_SCRAPER, NODE_OPERATIONS_WINDOW
+from node.enums import NodeType
+from node.events import NodeState
+from node.service import get_node_states
+
+LOG = logging.getLogger(__name__)
+
+# The operations listeners node.service configures for each node type.
+OPERATIONS_PORTS = {
+    NodeType.PEER.name: 9444,
+    NodeType.ORDERER.name: 9443,
+}
+# Fabric metrics summarized, whatever their labels.
+_BLOCKCHAIN_HEIGHT = "ledger_blockchain_height"
+_ENDORSEMENT_DURATION = "endorser_proposal_duration"
+_BROADCASTS = "broadcast_processed_count"
+_COMMIT_TIME = "ledger_blockstorage_commit_time"
+_MAX_SCRAPE_PARALLELISM = 16
+
+# Returns the status code and body of a GET of the URL.
+Fetch = Callable[[str, float], Tuple[int, str]]
+
+
+@dataclass(frozen=True)
+class OperationsSample:
+    at: float
+    scraped_at: datetime
+    healthy: Optional[bool]
+    failed_checks: List[str]
+    error: Optional[str] = None
+    block_heights: Dict[str, int] = field(default_factory=dict)
+    # Cumulative totals, endorsements and commits as (sum of seconds, count).
+    endorsements: Tuple[float, float] = (0, 0)
+    broadcasts: float = 0
+    commits: Tuple[float, float] = (0, 0)
+
+
+def parse_metrics(text: str) -> Dict[str, Any]:
+    """Return the block heights per channel and the counters summarized from a /metrics page."""
+    heights = {}
+    totals = {}
+    for family in text_string_to_metric_families(text):
+        if family.name not in (_BLOCKCHAIN_HEIGHT, _ENDORSEMENT_DURATION, _BROADCASTS, _COMMIT_TIME):
+            continue
+        for sample in family.samples:
+            if family.name == _BLOCKCHAIN_HEIGHT:
+                channel = sample.labels.get("channel", "")
+                heights[channel] = max(heights.get(channel, 0), int(sample.value))
+            elif not sample.name.endswith("_bucket"):
+                totals[sample.name] = totals.get(sample.name, 0) + sample.value
+    return dict(
+        block_heights=heights,
+        endorsements=(totals.get(_ENDORSEMENT_DURATION + "_sum", 0), totals.get(_ENDORSEMENT_DURATION + "_count", 0)),
+        broadcasts=totals.get(_BROADCASTS + "_total", totals.get(_BROADCASTS, 0)),
+        commits=(totals.get(_COMMIT_TIME + "_sum", 0), totals.get(_COMMIT_TIME + "_count", 0)),
+    )
+
+
+def fetch(url: str, timeout: float) -> Tuple[int, str]:
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status, response.read().decode()
+    except urllib.error.HTTPError as e:
+        # A failing health check answers 503 with the checks that failed.
+        return e.code, e.read().decode()
+
+
+def _average(newest: Tuple[float, float], oldest: Tuple[float, float]) -> Optional[float]:
+    count = newest[1] - oldest[1]
+    return (newest[0] - oldest[0]) / count if count > 0 else None
+
+
+class NodeOperationsCache:
+    """Lock-protected last scrapes of each node, keyed by container name."""
+
+    def __init__(self, window: int = NODE_OPERATIONS_WINDOW):
+        self._lock = threading.Lock()
+        self._window = window
+        self._nodes: Dict[str, Tuple[NodeState, Deque[OperationsSample]]] = {}
+
+    def record(self, state: NodeState, sample: OperationsSample):
+        with self._lock:
+            _, samples = self._nodes.get(state.container, (None, deque(maxlen=self._window)))
+            if sample.error is None:
+                last = next((s for s in reversed(samples) if s.error is None), None)
+                # The counters restart with the node, rates across that would be wrong.
+                if last is not None and (
+                        sample.broadcasts < last.broadcasts
+                        or sample.endorsements[1] < last.endorsements[1]
+                        or sample.commits[1] < last.commits[1]):
+                    samples.clear()
+            samples.append(sample)
+            self._nodes[state.container] = (state, samples)
+
+    def retain(self, containers: List[str]):
+        """Forget the nodes that are no longer running."""
+        with self._lock:
+            for container in set(self._nodes) - set(containers):
+                del self._nodes[container]
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            nodes = [(state, list(samples)) for state, samples in self._nodes.values()]
+        return [self.summarize(state, samples) for state, samples in nodes]
+
+    @staticmethod
+    def summarize(state: NodeState, samples: List[OperationsSample]) -> Dict[str, Any]:
+        latest = samples[-1]
+        scraped = [sample for sample in samples if sample.error is None]
+        summary = dict(
+            type=state.type,
+            name=state.name,
+            healthy=latest.healthy,
+            failed_checks=latest.failed_checks,
+            error=latest.error,
+            scraped_at=latest.scraped_at,
+            block_heights=scraped[-1].block_heights if scraped else {},
+            window=None,
+            endorsement_latency=None,
+            broadcast_rate=None,
+            commit_time=None,
+        )
+        if len(scraped) > 1:
+            oldest, newest = scraped[0], scraped[-1]
+            window = newest.at - oldest.at
+            summary.update(
+                window=round(window, 3),
+                endorsement_latency=_average(newest.endorsements, oldest.endorsements),
+                broadcast_rate=(newest.broadcasts - oldest.broadcasts) / window if window > 0 else None,
+                commit_time=_average(newest.commits, oldest.commits),
+            )
+        return summary
+
+
+class NodeOperationsScraper:
+    def __init__(self, list_nodes: Callable[[], List[NodeState]], cache: NodeOperationsCache, fetch: Fetch = fetch):
+        self.list_nodes = list_nodes
+        self.cache = cache
+        self.fetch = fetch
+
+    def scrape_node(self, state: NodeState) -> OperationsSample:
+        url = "http://{}:{}".format(state.container, OPERATIONS_PORTS[state.type])
+        at, scraped_at = time.monotonic(), datetime.now(timezone.utc)
+        try:
+            health_status, health = self.fetch(url + "/healthz", NODE_OPERATIONS_SCRAPE_TIMEOUT)
+            failed_checks = [
+                check.get("component", "") for check in json.loads(health or "{}").get("failed_checks") or []
+            ]
+            metrics_status, metrics = self.fetch(url + "/metrics", NODE_OPERATIONS_SCRAPE_TIMEOUT)
+            if metrics_status != 200:
+                raise ValueError("/metrics answered {}".format(metrics_status))
+            return OperationsSample(
+                at=at,
+                scraped_at=scraped_at,
+                healthy=health_status == 200,
+                failed_checks=failed_checks,
+                **parse_metrics(metrics))
+        except (OSError, ValueError) as e:
+            LOG.debug("Failed to scrape %s: %s", url, e)
+            return OperationsSample(at=at, scraped_at=scraped_at, healthy=None, failed_checks=[], error=str(e))
+
+    def scrape(self):
+        """Scrape every running node at once and record what each one reported."""
+        states = [
+            state for state in self.list_nodes()
+            if state.status == "running" and state.type in OPERATIONS_PORTS
+        ]
+        self.cache.retain([state.container for state in states])
+        if not states:
+            return
+        with ThreadPoolExecutor(
+                max_workers=min(len(states), _MAX_SCRAPE_PARALLELISM),
+                thread_name_prefix="node-operations-scrape") as executor:
+            for state, sample in zip(states, executor.map(self.scrape_node, states)):
+                self.cache.record(state, sample)
+
+    def run(self):
+        while True:
+            try:
+                self.scrape()
+            except Exception:
+                LOG.exception("Failed to scrape the node operations endpoints")
+            time.sleep(NODE_OPERATIONS_SCRAPE_INTERVAL)
+
+
+node_operations = NodeOperationsCache()
+_lock = threading.Lock()
+_scraper_started = False
+
+
+def start_scraper():
+    """Scrape the node operations endpoints in the background, once per process, unless disabled."""
+    global _scraper_started
+    with _lock:
+        if _scraper_started or not NODE_OPERATIONS_SCRAPER:
+            return
+        _scraper_started = True
+    scraper = NodeOperationsScraper(get_node_states, node_operations)
+    threading.Thread(target=scraper.run, name="node-operations-scraper", daemon=True).start()
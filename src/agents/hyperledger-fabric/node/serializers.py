@@ -1,7 +1,9 @@
+from adrf import serializers as async_serializers
+from asgiref.sync import sync_to_async
 from rest_framework import serializers
 
-from node.enums import NodeType
-from node.service import create_node, get_node_status
+from node.enums import NodeTransport, NodeType
+from node.service import create_node, create_nodes, get_node_status, get_nodes_status
 
 
 class NodeRequestSerializer(serializers.Serializer):
@@ -9,12 +11,16 @@ class NodeRequestSerializer(serializers.Serializer):
         help_text="Node Type",
         choices=[(node_type.name, node_type.name) for node_type in NodeType])
     name = serializers.CharField(help_text="Node Name")
+    transport = serializers.ChoiceField(
+        help_text="How the node receives its MSP, TLS and configuration, defaults to NODE_TRANSPORT",
+        choices=[(transport.name, transport.name) for transport in NodeTransport],
+        required=False)
 
     def create(self, validated_data):
         return NodeResponseSerializer({
             "type": validated_data["type"],
             "name": validated_data["name"],
-            "tls": create_node(validated_data["type"], validated_data["name"])
+            "tls": create_node(validated_data["type"], validated_data["name"], validated_data.get("transport"))
         })
 
 class NodeResponseSerializer(serializers.Serializer):
@@ -25,17 +31,108 @@ class NodeResponseSerializer(serializers.Serializer):
     tls = serializers.CharField(help_text="Node TLS")
 
 
+class NodeSpecSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(
+        help_text="Node Type",
+        choices=[(node_type.name, node_type.name) for node_type in NodeType])
+    name = serializers.CharField(help_text="Node Name")
+
+
+class NodeBatchResult(NodeSpecSerializer):
+    tls = serializers.CharField(help_text="Node TLS, if the node was created", allow_null=True)
+    duration = serializers.FloatField(help_text="Seconds Spent Configuring and Starting the Node")
+    error = serializers.CharField(help_text="Why the node could not be created", allow_null=True)
+
+
+class NodeBatchResponse(serializers.Serializer):
+    nodes = NodeBatchResult(many=True, help_text="Node Results")
+
+
+class NodeBatchRequest(serializers.Serializer):
+    nodes = NodeSpecSerializer(many=True, allow_empty=False, help_text="Nodes")
+    transport = serializers.ChoiceField(
+        help_text="How the nodes receive their MSP, TLS and configuration, defaults to NODE_TRANSPORT",
+        choices=[(transport.name, transport.name) for transport in NodeTransport],
+        required=False)
+    parallelism = serializers.IntegerField(
+        help_text="How many nodes are configured and started at the same time",
+        required=False,
+        min_value=1)
+
+    def validate_nodes(self, nodes):
+        if len({(node["type"], node["name"]) for node in nodes}) != len(nodes):
+            raise serializers.ValidationError("Nodes must not repeat")
+        return nodes
+
+    def create(self, validated_data) -> NodeBatchResponse:
+        return NodeBatchResponse(dict(nodes=create_nodes(
+            validated_data["nodes"],
+            validated_data.get("transport"),
+            validated_data.get("parallelism"))))
+
+
 class NodeStatusSerializer(serializers.Serializer):
     status = serializers.CharField(help_text="Node Status")
 
 
-class NodeStatusRequestSerializer(serializers.Serializer):
+class NodeStatusRequestSerializer(async_serializers.Serializer):
     type = serializers.ChoiceField(
         help_text="Node Type",
         choices=[(node_type.name, node_type.name) for node_type in NodeType])
     name = serializers.CharField(help_text="Node Name")
 
-    def create(self, validated_data) -> NodeStatusSerializer:
-        status = get_node_status(validated_data["type"], validated_data["name"])
+    async def acreate(self, validated_data) -> NodeStatusSerializer:
+        # docker-py blocks, so a cache miss is served from a worker thread.
+        status = await sync_to_async(get_node_status, thread_sensitive=False)(
+            validated_data["type"], validated_data["name"])
         return NodeStatusSerializer(dict(status=status))
 
+
+class NodeBulkStatusResult(serializers.Serializer):
+    type = serializers.ChoiceField(
+        help_text="Node Type",
+        choices=[(node_type.name, node_type.name) for node_type in NodeType])
+    name = serializers.CharField(help_text="Node Name")
+    status = serializers.CharField(help_text="Node Status")
+    health = serializers.CharField(help_text="Node Health, if the image has a health check", allow_null=True)
+    exit_code = serializers.IntegerField(help_text="Node Exit Code, if it exited", allow_null=True)
+    last_transition = serializers.DateTimeField(
+        help_text="When the Node Status Last Changed, if the agent saw it change",
+        allow_null=True)
+    restart_count = serializers.IntegerField(help_text="Node Restart Count, only with detail", allow_null=True)
+    uptime = serializers.FloatField(help_text="Seconds Since the Node Started, only with detail", allow_null=True)
+
+
+class NodeBulkStatusResponse(serializers.Serializer):
+    nodes = NodeBulkStatusResult(many=True, help_text="Node Statuses")
+
+
+class NodeBulkStatusRequest(async_serializers.Serializer):
+    detail = serializers.BooleanField(
+        help_text="Inspect every node for its restart count and uptime",
+        default=False)
+
+    async def acreate(self, validated_data) -> NodeBulkStatusResponse:
+        return NodeBulkStatusResponse(dict(
+            nodes=await sync_to_async(get_nodes_status, thread_sensitive=False)(validated_data["detail"])))
+
+
+class NodeOperationsSummary(serializers.Serializer):
+    type = serializers.ChoiceField(
+        help_text="Node Type",
+        choices=[(node_type.name, node_type.name) for node_type in NodeType])
+    name = serializers.CharField(help_text="Node Name")
+    healthy = serializers.BooleanField(help_text="Whether /healthz passed, unknown if the node could not be reached",
+                                       allow_null=True)
+    failed_checks = serializers.ListField(child=serializers.CharField(), help_text="Failed Health Checks")
+    error = serializers.CharField(help_text="Why the last scrape failed, if it did", allow_null=True)
+    scraped_at = serializers.DateTimeField(help_text="When the Node Was Last Scraped")
+    block_heights = serializers.DictField(child=serializers.IntegerField(), help_text="Block Height per Channel")
+    window = serializers.FloatField(help_text="Seconds Covered by the Rates and Averages", allow_null=True)
+    endorsement_latency = serializers.FloatField(help_text="Average Endorsement Duration in Seconds", allow_null=True)
+    broadcast_rate = serializers.FloatField(help_text="Broadcasts Processed per Second", allow_null=True)
+    commit_time = serializers.FloatField(help_text="Average Block Commit Duration in Seconds", allow_null=True)
+
+
+class NodeOperationsResponse(serializers.Serializer):
+    nodes = NodeOperationsSummary(many=True, help_text="Node Operations Summaries")
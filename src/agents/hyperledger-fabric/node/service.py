@@ -1,45 +1,159 @@
 import base64
 import logging
 import os
-import subprocess
+import tarfile
+import time
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from datetime import datetime, timezone
 from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
 
 import docker
 import yaml
 
-from hyperledger_fabric.settings import CRYPTO_CONFIG, FABRIC_TOOL, CELLO_HOME, FABRIC_VERSION
-from node.enums import NodeType
+from hyperledger_fabric import issuer
+from hyperledger_fabric.context import get_fabric_context
+from hyperledger_fabric.metrics import DOCKER_CALL_DURATION
+from hyperledger_fabric.runner import run
+from hyperledger_fabric.settings import CRYPTO_CONFIG, FABRIC_TOOL, CELLO_HOME, FABRIC_VERSION, NODE_TRANSPORT, \
+    NODE_CREATE_PARALLELISM, CRYPTOGEN_EXTEND
+from node.enums import NodeTransport, NodeType
+from node.events import NODE_DOMAIN_LABEL, NODE_NAME_LABEL, NODE_TYPE_LABEL, NodeState, node_states, \
+    parse_container
 
 LOG = logging.getLogger(__name__)
 docker_client = docker.DockerClient("unix:///var/run/docker.sock")
+# Where the ARCHIVE transport uploads the files of a node, read by init.sh.
+NODE_ARCHIVE_PATH = "/tmp/hlf-node"
 
 def get_node_status(node_type: str, name: str) -> str:
-    with open(
-        CRYPTO_CONFIG,
-        "r",
-        encoding="utf-8",
-    ) as f:
-        crypto_config = yaml.safe_load(f)
-    return docker_client.containers.get(
-        "{}.{}".format(
-            name,
-            crypto_config["PeerOrgs" if node_type == NodeType.PEER.name else "OrdererOrgs"][0]["Domain"])).status
+    container = "{}.{}".format(name, get_fabric_context().get_domain(node_type == NodeType.PEER.name))
+    state = node_states.get(container)
+    if state is not None:
+        return state.status
+    with DOCKER_CALL_DURATION.labels("containers.get").time():
+        return docker_client.containers.get(container).status
+
+
+def get_node_states() -> List[NodeState]:
+    """
+    Return the state of every node container of the organization, from the
+    event driven cache or, while it is not in sync, from listing the containers.
+    """
+    context = get_fabric_context()
+    domains = {
+        NodeType.PEER.name: context.peer_domain,
+        NodeType.ORDERER.name: context.orderer_domain,
+    }
+    states = node_states.all()
+    if states is None:
+        # Sparse, or docker-py inspects every listed container.
+        with DOCKER_CALL_DURATION.labels("containers.list").time():
+            containers = docker_client.containers.list(all=True, sparse=True, filters={"label": NODE_TYPE_LABEL})
+        states = [parse_container(container.attrs) for container in containers]
+    # Nodes of other organizations may share the Docker daemon.
+    return [state for state in states if state.domain == domains.get(state.type)]
+
+
+def get_nodes_status(detail: bool = False) -> List[Dict[str, Any]]:
+    """
+    Return the status of every node container of the organization.
+
+    The restart count and start time are only in the full container state,
+    so they are inspected one by one if detail.
+    """
+    statuses = []
+    for state in get_node_states():
+        node_status = dict(
+            type=state.type,
+            name=state.name,
+            status=state.status,
+            health=state.health,
+            exit_code=state.exit_code,
+            last_transition=state.last_transition,
+            restart_count=None,
+            uptime=None,
+        )
+        if detail:
+            with DOCKER_CALL_DURATION.labels("inspect_container").time():
+                attrs = docker_client.api.inspect_container(state.container)
+            node_status["restart_count"] = attrs["RestartCount"]
+            if attrs["State"]["Running"]:
+                node_status["uptime"] = (
+                    datetime.now(timezone.utc) - _parse_docker_time(attrs["State"]["StartedAt"])
+                ).total_seconds()
+        statuses.append(node_status)
+    return statuses
+
+
+def _parse_docker_time(value: str) -> datetime:
+    # Docker reports nanoseconds, e.g. 2025-01-01T00:00:00.123456789Z, which datetime cannot parse.
+    return datetime.strptime(value[:19], "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc)
+
+
+def create_node(node_type: str, name: str, transport: Optional[str] = None) -> bytes:
+    node_type = NodeType[node_type]
+    organization = _extend_crypto_material([(node_type, name)])[node_type]
+    return _start_node(
+        node_type,
+        name,
+        organization,
+        _load_node_config(node_type),
+        NodeTransport[transport or NODE_TRANSPORT])
+
+
+def create_nodes(
+        nodes: List[Dict[str, str]],
+        transport: Optional[str] = None,
+        parallelism: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Issue the crypto material of several nodes at once, then configure and
+    start up to parallelism of them at a time. A failing node does not stop
+    the others, each one gets its own result.
+    """
+    node_types = [(NodeType[node["type"]], node["name"]) for node in nodes]
+    organizations = _extend_crypto_material(node_types)
+    configs = {node_type: _load_node_config(node_type) for node_type in organizations}
+    transport = NodeTransport[transport or NODE_TRANSPORT]
 
+    def start(node: Tuple[NodeType, str]) -> Dict[str, Any]:
+        node_type, name = node
+        started = time.monotonic()
+        try:
+            tls = _start_node(node_type, name, organizations[node_type], configs[node_type], transport)
+            error = None
+        except Exception as e:
+            LOG.exception("Failed to create %s %s", node_type.name, name)
+            tls, error = None, str(e)
+        return dict(
+            type=node_type.name,
+            name=name,
+            tls=tls,
+            duration=round(time.monotonic() - started, 3),
+            error=error,
+        )
 
-def create_node(node_type: str, name: str) -> bytes:
-    return _create_node(NodeType.PEER if node_type == NodeType.PEER.name else NodeType.ORDERER, name)
+    with ThreadPoolExecutor(
+            max_workers=max(1, min(parallelism or NODE_CREATE_PARALLELISM, len(node_types))),
+            thread_name_prefix="node-create") as executor:
+        return list(executor.map(start, node_types))
 
-def _create_node(node_type: NodeType, name: str) -> bytes:
-    # edit CRYPTO_CONFIG
+
+def _extend_crypto_material(nodes: List[Tuple[NodeType, str]]) -> Dict[NodeType, Dict[str, Any]]:
+    """
+    Add the nodes to CRYPTO_CONFIG and generate their MSP and TLS material,
+    in process unless CRYPTOGEN_EXTEND, with one cryptogen extend otherwise.
+    Return the organization of each node type.
+    """
+    # the cached context is shared, so edit a copy of it
     edited = False
-    with open(
-        CRYPTO_CONFIG,
-        "r",
-        encoding="utf-8",
-    ) as f:
-        crypto_config = yaml.safe_load(f)
+    crypto_config = deepcopy(get_fabric_context().crypto_config)
+    organizations = {}
+    for node_type, name in nodes:
         organization = crypto_config["PeerOrgs" if node_type == NodeType.PEER else "OrdererOrgs"][0]
+        organizations[node_type] = organization
         specs = organization["Specs"]
         if name not in [spec["Hostname"] for spec in specs]:
             specs.append(dict(Hostname=name))
@@ -53,6 +167,12 @@ def _create_node(node_type: NodeType, name: str) -> bytes:
         ) as f:
             yaml.safe_dump(crypto_config, f)
 
+    if not CRYPTOGEN_EXTEND:
+        try:
+            LOG.info("Issued %s", ", ".join(issuer.extend(CELLO_HOME, crypto_config)) or "nothing")
+            return organizations
+        except FileNotFoundError as e:
+            LOG.warning("%s, running cryptogen extend instead", e)
     command = [
         os.path.join(FABRIC_TOOL, "cryptogen"),
         "extend",
@@ -60,21 +180,28 @@ def _create_node(node_type: NodeType, name: str) -> bytes:
         "--config={}".format(CRYPTO_CONFIG),
     ]
     LOG.info(" ".join(command))
-    LOG.info(subprocess.run(
-        command,
-        check=True,
-        text=True,
-        capture_output=True,
-    ).stdout)
+    LOG.info(run(command).stdout)
+    return organizations
 
+
+def _load_node_config(node_type: NodeType) -> Dict[str, Any]:
     with open(
             os.path.join(
                 CELLO_HOME,
                 "config",
                 "core.yaml" if node_type == NodeType.PEER else "orderer.yaml"),
             "r") as f:
-        cfg = yaml.safe_load(f)
+        return yaml.safe_load(f)
+
 
+def _start_node(
+        node_type: NodeType,
+        name: str,
+        organization: Dict[str, Any],
+        cfg: Dict[str, Any],
+        transport: NodeTransport = NodeTransport.ENV) -> bytes:
+    # the template may be shared by several nodes, so edit a copy of it
+    cfg = deepcopy(cfg)
     domain = name + "." + organization["Domain"]
     for key, value in ({
             "peer_tls_enabled": True,
@@ -122,28 +249,6 @@ def _create_node(node_type: NodeType, name: str) -> bytes:
         domain
     )
 
-    msp_buffer = BytesIO()
-    with zipfile.ZipFile(msp_buffer, 'w') as z:
-        folder_path = os.path.join(node_directory, "msp")
-        LOG.info("Compress MSP in " + folder_path)
-        for root, dirs, files in os.walk(folder_path):
-            for file in files:
-                full_path = os.path.join(root, file)
-                rel_path = os.path.relpath(full_path, os.path.dirname(folder_path))
-                LOG.info("Compress " + full_path + " into " + rel_path)
-                z.write(full_path, rel_path)
-
-    tls_buffer = BytesIO()
-    with zipfile.ZipFile(tls_buffer, 'w') as z:
-        folder_path = os.path.join(node_directory, "tls")
-        LOG.info("Compress TLS in " + folder_path)
-        for root, dirs, files in os.walk(folder_path):
-            for file in files:
-                full_path = os.path.join(root, file)
-                rel_path = os.path.relpath(full_path, os.path.dirname(folder_path))
-                LOG.info("Compress " + full_path + " into " + rel_path)
-                z.write(full_path, rel_path)
-
     cfg_file_name = "core.yaml" if node_type == NodeType.PEER else "orderer.yaml"
     with open(
         os.path.join(
@@ -154,76 +259,119 @@ def _create_node(node_type: NodeType, name: str) -> bytes:
     ) as f:
         yaml.safe_dump(cfg, f)
 
-    cfg_buffer = BytesIO()
-    with zipfile.ZipFile(cfg_buffer, "w") as z:
-        z.writestr(cfg_file_name, yaml.safe_dump(cfg))
-
-    tls = base64.b64encode(tls_buffer.getvalue())
-    cfg = base64.b64encode(cfg_buffer.getvalue())
-    docker_client.containers.run(
-        "hyperledger/fabric:" + FABRIC_VERSION,
-        "bash /tmp/init.sh " + ('"peer node start"' if node_type == NodeType.PEER else '"orderer"'),
+    tls = base64.b64encode(_zip_directory(os.path.join(node_directory, "tls")))
+    environment = {
+        "platform": "linux/amd64",
+        "CORE_VM_ENDPOINT": "unix:///host/var/run/docker.sock",
+        "CORE_VM_DOCKER_HOSTCONFIG_NETWORKMODE": "cello-net",
+        "FABRIC_LOGGING_SPEC": "INFO",
+        "CORE_PEER_TLS_ENABLED": "true",
+        "CORE_PEER_PROFILE_ENABLED": "false",
+        "CORE_PEER_TLS_CERT_FILE": "/etc/hyperledger/fabric/tls/server.crt",
+        "CORE_PEER_TLS_KEY_FILE": "/etc/hyperledger/fabric/tls/server.key",
+        "CORE_PEER_TLS_ROOTCERT_FILE": "/etc/hyperledger/fabric/tls/ca.crt",
+        "CORE_PEER_ID": domain,
+        "CORE_PEER_ADDRESS": domain + ":7051",
+        "CORE_PEER_LISTENADDRESS": "0.0.0.0:7051",
+        "CORE_PEER_CHAINCODEADDRESS": domain + ":7052",
+        "CORE_PEER_CHAINCODELISTENADDRESS": "0.0.0.0:7052",
+        "CORE_PEER_GOSSIP_BOOTSTRAP": domain + ":7051",
+        "CORE_PEER_GOSSIP_EXTERNALENDPOINT": domain + ":7051",
+        "CORE_PEER_LOCALMSPID": organization["Domain"].split(".", 1)[0].capitalize() + "MSP",
+        "CORE_PEER_MSPCONFIGPATH": "/etc/hyperledger/fabric/msp",
+        "CORE_OPERATIONS_LISTENADDRESS": "0.0.0.0:9444",
+        "CORE_METRICS_PROVIDER": "prometheus",
+    } if node_type == NodeType.PEER else {
+        "platform": "linux/amd64",
+        "FABRIC_LOGGING_SPEC": "INFO",
+        "ORDERER_GENERAL_LISTENADDRESS": "0.0.0.0",
+        "ORDERER_GENERAL_LISTENPORT": "7050",
+        "ORDERER_GENERAL_LOCALMSPID": "OrdererMSP",
+        "ORDERER_GENERAL_LOCALMSPDIR": "/etc/hyperledger/fabric/msp",
+        "ORDERER_GENERAL_TLS_ENABLED": "true",
+        "ORDERER_GENERAL_TLS_PRIVATEKEY": "/etc/hyperledger/fabric/tls/server.key",
+        "ORDERER_GENERAL_TLS_CERTIFICATE": "/etc/hyperledger/fabric/tls/server.crt",
+        "ORDERER_GENERAL_TLS_ROOTCAS": "[/etc/hyperledger/fabric/tls/ca.crt]",
+        "ORDERER_GENERAL_CLUSTER_CLIENTCERTIFICATE": "/etc/hyperledger/fabric/tls/server.crt",
+        "ORDERER_GENERAL_CLUSTER_CLIENTPRIVATEKEY": "/etc/hyperledger/fabric/tls/server.key",
+        "ORDERER_GENERAL_CLUSTER_ROOTCAS": "[/etc/hyperledger/fabric/tls/ca.crt]",
+        "ORDERER_GENERAL_BOOTSTRAPMETHOD": "none",
+        "ORDERER_CHANNELPARTICIPATION_ENABLED": "true",
+        "ORDERER_ADMIN_TLS_ENABLED": "true",
+        "ORDERER_ADMIN_TLS_CERTIFICATE": "/etc/hyperledger/fabric/tls/server.crt",
+        "ORDERER_ADMIN_TLS_PRIVATEKEY": "/etc/hyperledger/fabric/tls/server.key",
+        "ORDERER_ADMIN_TLS_ROOTCAS": "[/etc/hyperledger/fabric/tls/ca.crt]",
+        "ORDERER_ADMIN_TLS_CLIENTROOTCAS": "[/etc/hyperledger/fabric/tls/ca.crt]",
+        "ORDERER_ADMIN_LISTENADDRESS": "0.0.0.0:7053",
+        "ORDERER_OPERATIONS_LISTENADDRESS": "0.0.0.0:9443",
+        "ORDERER_METRICS_PROVIDER": "prometheus",
+    }
+    container_options = dict(
+        image="hyperledger/fabric:" + FABRIC_VERSION,
+        command="bash /tmp/init.sh " + ('"peer node start"' if node_type == NodeType.PEER else '"orderer"'),
         detach=True,
         tty=True,
         stdin_open=True,
         network="cello-net",
-        name=name + "." + organization["Domain"],
+        name=domain,
+        labels={
+            NODE_TYPE_LABEL: node_type.name,
+            NODE_NAME_LABEL: name,
+            NODE_DOMAIN_LABEL: organization["Domain"],
+        },
         volumes=[
             "/var/run/docker.sock:/host/var/run/docker.sock"
         ],
-        environment={
-            "HLF_NODE_MSP": base64.b64encode(msp_buffer.getvalue()),
+    )
+
+    if transport == NodeTransport.ARCHIVE:
+        # init.sh moves the uploaded files from HLF_NODE_ARCHIVE into place
+        # when the container starts, nothing secret ends up in its environment.
+        environment["HLF_NODE_ARCHIVE"] = NODE_ARCHIVE_PATH
+        archive = build_node_archive(node_directory, cfg_file_name, os.path.basename(NODE_ARCHIVE_PATH))
+        with DOCKER_CALL_DURATION.labels("containers.create").time():
+            container = docker_client.containers.create(environment=environment, **container_options)
+        with DOCKER_CALL_DURATION.labels("put_archive").time():
+            container.put_archive(os.path.dirname(NODE_ARCHIVE_PATH), archive)
+        with DOCKER_CALL_DURATION.labels("start").time():
+            container.start()
+    else:
+        cfg_buffer = BytesIO()
+        with zipfile.ZipFile(cfg_buffer, "w") as z:
+            z.write(os.path.join(node_directory, cfg_file_name), cfg_file_name)
+        cfg = base64.b64encode(cfg_buffer.getvalue())
+        environment.update({
+            "HLF_NODE_MSP": base64.b64encode(_zip_directory(os.path.join(node_directory, "msp"))),
             "HLF_NODE_TLS": tls,
             "HLF_NODE_PEER_CONFIG": cfg,
             "HLF_NODE_ORDERER_CONFIG": cfg,
-            "platform": "linux/amd64",
-            "CORE_VM_ENDPOINT": "unix:///host/var/run/docker.sock",
-            "CORE_VM_DOCKER_HOSTCONFIG_NETWORKMODE": "cello-net",
-            "FABRIC_LOGGING_SPEC": "INFO",
-            "CORE_PEER_TLS_ENABLED": "true",
-            "CORE_PEER_PROFILE_ENABLED": "false",
-            "CORE_PEER_TLS_CERT_FILE": "/etc/hyperledger/fabric/tls/server.crt",
-            "CORE_PEER_TLS_KEY_FILE": "/etc/hyperledger/fabric/tls/server.key",
-            "CORE_PEER_TLS_ROOTCERT_FILE": "/etc/hyperledger/fabric/tls/ca.crt",
-            "CORE_PEER_ID": domain,
-            "CORE_PEER_ADDRESS": domain + ":7051",
-            "CORE_PEER_LISTENADDRESS": "0.0.0.0:7051",
-            "CORE_PEER_CHAINCODEADDRESS": domain + ":7052",
-            "CORE_PEER_CHAINCODELISTENADDRESS": "0.0.0.0:7052",
-            "CORE_PEER_GOSSIP_BOOTSTRAP": domain + ":7051",
-            "CORE_PEER_GOSSIP_EXTERNALENDPOINT": domain + ":7051",
-            "CORE_PEER_LOCALMSPID": organization["Domain"].split(".", 1)[0].capitalize() + "MSP",
-            "CORE_PEER_MSPCONFIGPATH": "/etc/hyperledger/fabric/msp",
-            "CORE_OPERATIONS_LISTENADDRESS": "0.0.0.0:9444",
-            "CORE_METRICS_PROVIDER": "prometheus",
-        } if node_type == NodeType.PEER else {
-            "HLF_NODE_MSP": base64.b64encode(msp_buffer.getvalue()),
-            "HLF_NODE_TLS": base64.b64encode(tls_buffer.getvalue()),
-            "HLF_NODE_PEER_CONFIG": cfg,
-            "HLF_NODE_ORDERER_CONFIG": cfg,
-            "platform": "linux/amd64",
-            "FABRIC_LOGGING_SPEC": "INFO",
-            "ORDERER_GENERAL_LISTENADDRESS": "0.0.0.0",
-            "ORDERER_GENERAL_LISTENPORT": "7050",
-            "ORDERER_GENERAL_LOCALMSPID": "OrdererMSP",
-            "ORDERER_GENERAL_LOCALMSPDIR": "/etc/hyperledger/fabric/msp",
-            "ORDERER_GENERAL_TLS_ENABLED": "true",
-            "ORDERER_GENERAL_TLS_PRIVATEKEY": "/etc/hyperledger/fabric/tls/server.key",
-            "ORDERER_GENERAL_TLS_CERTIFICATE": "/etc/hyperledger/fabric/tls/server.crt",
-            "ORDERER_GENERAL_TLS_ROOTCAS": "[/etc/hyperledger/fabric/tls/ca.crt]",
-            "ORDERER_GENERAL_CLUSTER_CLIENTCERTIFICATE": "/etc/hyperledger/fabric/tls/server.crt",
-            "ORDERER_GENERAL_CLUSTER_CLIENTPRIVATEKEY": "/etc/hyperledger/fabric/tls/server.key",
-            "ORDERER_GENERAL_CLUSTER_ROOTCAS": "[/etc/hyperledger/fabric/tls/ca.crt]",
-            "ORDERER_GENERAL_BOOTSTRAPMETHOD": "none",
-            "ORDERER_CHANNELPARTICIPATION_ENABLED": "true",
-            "ORDERER_ADMIN_TLS_ENABLED": "true",
-            "ORDERER_ADMIN_TLS_CERTIFICATE": "/etc/hyperledger/fabric/tls/server.crt",
-            "ORDERER_ADMIN_TLS_PRIVATEKEY": "/etc/hyperledger/fabric/tls/server.key",
-            "ORDERER_ADMIN_TLS_ROOTCAS": "[/etc/hyperledger/fabric/tls/ca.crt]",
-            "ORDERER_ADMIN_TLS_CLIENTROOTCAS": "[/etc/hyperledger/fabric/tls/ca.crt]",
-            "ORDERER_ADMIN_LISTENADDRESS": "0.0.0.0:7053",
-            "ORDERER_OPERATIONS_LISTENADDRESS": "0.0.0.0:9443",
-            "ORDERER_METRICS_PROVIDER": "prometheus",
-        },
-    )
+        })
+        with DOCKER_CALL_DURATION.labels("containers.run").time():
+            docker_client.containers.run(environment=environment, **container_options)
     return tls
+
+
+def _zip_directory(folder_path: str) -> bytes:
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as z:
+        LOG.info("Compress " + folder_path)
+        for root, dirs, files in os.walk(folder_path):
+            for file in files:
+                full_path = os.path.join(root, file)
+                rel_path = os.path.relpath(full_path, os.path.dirname(folder_path))
+                LOG.info("Compress " + full_path + " into " + rel_path)
+                z.write(full_path, rel_path)
+    return buffer.getvalue()
+
+
+def build_node_archive(node_directory: str, cfg_file_name: str, prefix: str) -> bytes:
+    """
+    Pack the msp and tls directories and the configuration file of a node into
+    an uncompressed tar, for put_archive, with every member under prefix.
+    """
+    buffer = BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for name in ("msp", "tls", cfg_file_name):
+            LOG.info("Archive " + os.path.join(node_directory, name))
+            tar.add(os.path.join(node_directory, name), arcname=os.path.join(prefix, name))
+    return buffer.getvalue()
@@ -1,3 +1,364 @@
-from django.test import TestCase
+import io
+import os
+import tarfile
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+import yaml
+
+from django.test import SimpleTestCase
+
+with mock.patch("docker.DockerClient"):
+    from node import events, operations, service
+
+
+class NodeArchiveTestCase(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        for path, data in (
+                ("msp/signcerts/cert.pem", b"cert"),
+                ("msp/keystore/priv_sk", b"key"),
+                ("tls/server.key", b"tls key"),
+                ("core.yaml", b"peer: {}\n"),
+                ("other.yaml", b"")):
+            path = os.path.join(self.directory, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+
+    def test_archive_holds_msp_tls_and_config_under_prefix(self):
+        archive = service.build_node_archive(self.directory, "core.yaml", "hlf-node")
+
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            files = {
+                member.name: tar.extractfile(member).read()
+                for member in tar.getmembers()
+                if member.isfile()
+            }
+        self.assertEqual(files, {
+            "hlf-node/msp/signcerts/cert.pem": b"cert",
+            "hlf-node/msp/keystore/priv_sk": b"key",
+            "hlf-node/tls/server.key": b"tls key",
+            "hlf-node/core.yaml": b"peer: {}\n",
+        })
+
+
+def make_container(node_type: str, name: str, domain: str, state: str, status: str) -> dict:
+    """A container as a sparse list returns it."""
+    return {
+        "Names": ["/{}.{}".format(name, domain)],
+        "Labels": {
+            events.NODE_TYPE_LABEL: node_type,
+            events.NODE_NAME_LABEL: name,
+            events.NODE_DOMAIN_LABEL: domain,
+        },
+        "State": state,
+        "Status": status,
+    }
+
+
+def make_event(action: str, container: str, time_nano: int = 10 ** 18, **attributes) -> dict:
+    return {
+        "Type": "container",
+        "Action": action,
+        "Actor": {"Attributes": dict({
+            "name": container,
+            events.NODE_TYPE_LABEL: "PEER",
+            events.NODE_NAME_LABEL: container.split(".", 1)[0],
+            events.NODE_DOMAIN_LABEL: container.split(".", 1)[1],
+        }, **attributes)},
+        "timeNano": time_nano,
+    }
+
+
+class NodeStatusTestCase(SimpleTestCase):
+    def setUp(self):
+        context = mock.MagicMock(peer_domain="org1.example.com", orderer_domain="example.com")
+        context.get_domain.side_effect = lambda peer: "org1.example.com" if peer else "example.com"
+        self.containers = [
+            make_container("PEER", "peer0", "org1.example.com", "running", "Up 2 hours (healthy)"),
+            make_container("ORDERER", "orderer0", "example.com", "exited", "Exited (2) 5 minutes ago"),
+            make_container("PEER", "peer0", "org2.example.com", "running", "Up 2 hours"),
+        ]
+        for name, value in (
+                ("docker_client", mock.MagicMock()),
+                ("get_fabric_context", mock.MagicMock(return_value=context)),
+                ("node_states", events.NodeStateCache())):
+            patcher = mock.patch.object(service, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        service.docker_client.containers.list.return_value = [
+            mock.MagicMock(attrs=attrs) for attrs in self.containers
+        ]
+
+    def test_all_nodes_are_listed_at_once(self):
+        self.assertEqual(service.get_nodes_status(), [
+            dict(type="PEER", name="peer0", status="running", health="healthy", exit_code=None,
+                 last_transition=None, restart_count=None, uptime=None),
+            dict(type="ORDERER", name="orderer0", status="exited", health=None, exit_code=2,
+                 last_transition=None, restart_count=None, uptime=None),
+        ])
+        service.docker_client.containers.list.assert_called_once_with(
+            all=True, sparse=True, filters={"label": events.NODE_TYPE_LABEL})
+        service.docker_client.api.inspect_container.assert_not_called()
+
+    def test_synced_cache_is_read_without_docker(self):
+        service.node_states.resync(events.parse_container(attrs) for attrs in self.containers)
+
+        self.assertEqual([node["name"] for node in service.get_nodes_status()], ["peer0", "orderer0"])
+        self.assertEqual(service.get_node_status("ORDERER", "orderer0"), "exited")
+        service.docker_client.containers.list.assert_not_called()
+        service.docker_client.containers.get.assert_not_called()
+
+        service.node_states.invalidate()
+        service.get_node_status("ORDERER", "orderer0")
+        service.docker_client.containers.get.assert_called_once_with("orderer0.example.com")
+
+    def test_detail_adds_restart_count_and_uptime(self):
+        service.docker_client.api.inspect_container.side_effect = lambda container: {
+            "peer0.org1.example.com": {
+                "RestartCount": 1,
+                "State": {"Running": True, "StartedAt": "2025-01-01T00:00:00.123456789Z"}},
+            "orderer0.example.com": {
+                "RestartCount": 3,
+                "State": {"Running": False, "StartedAt": "2025-01-01T00:00:00Z"}},
+        }[container]
+
+        peer, orderer = service.get_nodes_status(detail=True)
+        self.assertEqual(peer["restart_count"], 1)
+        self.assertGreater(peer["uptime"], 0)
+        self.assertEqual(orderer["restart_count"], 3)
+        self.assertIsNone(orderer["uptime"])
+
+
+class NodeBatchTestCase(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cello_home = directory.name
+        self.crypto_config = os.path.join(self.cello_home, "crypto-config.yaml")
+        os.makedirs(os.path.join(self.cello_home, "config"))
+        for file_name in ("core.yaml", "orderer.yaml"):
+            with open(os.path.join(self.cello_home, "config", file_name), "w", encoding="utf-8") as f:
+                yaml.safe_dump({}, f)
+        context = mock.MagicMock(crypto_config={
+            "PeerOrgs": [{"Name": "Org1", "Domain": "org1.example.com", "Specs": [{"Hostname": "peer0"}]}],
+            "OrdererOrgs": [{"Name": "Orderer", "Domain": "example.com", "Specs": []}],
+        })
+        for name, value in (
+                ("CELLO_HOME", self.cello_home),
+                ("CRYPTO_CONFIG", self.crypto_config),
+                ("docker_client", mock.MagicMock()),
+                ("get_fabric_context", mock.MagicMock(return_value=context)),
+                ("CRYPTOGEN_EXTEND", True),
+                ("run", mock.MagicMock(side_effect=self.cryptogen))):
+            patcher = mock.patch.object(service, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def cryptogen(self, command):
+        # Generate the directories of every node in the config, as cryptogen extend does.
+        with open(self.crypto_config, encoding="utf-8") as f:
+            crypto_config = yaml.safe_load(f)
+        for orgs, nodes in (("PeerOrgs", "peers"), ("OrdererOrgs", "orderers")):
+            for organization in crypto_config[orgs]:
+                for spec in organization["Specs"]:
+                    node_directory = os.path.join(
+                        self.cello_home,
+                        "peerOrganizations" if orgs == "PeerOrgs" else "ordererOrganizations",
+                        organization["Domain"],
+                        nodes,
+                        "{}.{}".format(spec["Hostname"], organization["Domain"]))
+                    for sub_directory in ("msp", "tls"):
+                        os.makedirs(os.path.join(node_directory, sub_directory), exist_ok=True)
+                        with open(os.path.join(node_directory, sub_directory, "cert.pem"), "w") as f:
+                            f.write(spec["Hostname"])
+        return mock.MagicMock(stdout="")
+
+    def test_batch_extends_crypto_material_once(self):
+        nodes = [dict(type="PEER", name="peer{}".format(i)) for i in range(1, 4)]
+        results = service.create_nodes(nodes + [dict(type="ORDERER", name="orderer0")], transport="ENV")
+
+        service.run.assert_called_once()
+        self.assertEqual(service.docker_client.containers.run.call_count, 4)
+        self.assertEqual(
+            sorted(call.kwargs["name"] for call in service.docker_client.containers.run.call_args_list),
+            ["orderer0.example.com", "peer1.org1.example.com", "peer2.org1.example.com", "peer3.org1.example.com"])
+        self.assertEqual([(result["name"], result["error"]) for result in results], [
+            ("peer1", None), ("peer2", None), ("peer3", None), ("orderer0", None)])
+        self.assertTrue(all(result["tls"] for result in results))
+        with open(self.crypto_config, encoding="utf-8") as f:
+            specs = yaml.safe_load(f)["PeerOrgs"][0]["Specs"]
+        self.assertEqual([spec["Hostname"] for spec in specs], ["peer0", "peer1", "peer2", "peer3"])
+
+    def test_batch_issues_crypto_material_in_process(self):
+        def extend(home, crypto_config):
+            self.cryptogen(None)
+            return []
+        issuer = mock.MagicMock()
+        issuer.extend.side_effect = extend
+        with mock.patch.object(service, "CRYPTOGEN_EXTEND", False), mock.patch.object(service, "issuer", issuer):
+            results = service.create_nodes([dict(type="PEER", name="peer1")], transport="ENV")
+
+        issuer.extend.assert_called_once()
+        service.run.assert_not_called()
+        self.assertEqual([(result["name"], result["error"]) for result in results], [("peer1", None)])
+
+    def test_failing_node_does_not_stop_the_others(self):
+        def run_container(name, **kwargs):
+            if name == "peer2.org1.example.com":
+                raise RuntimeError("name already in use")
+        service.docker_client.containers.run.side_effect = run_container
+
+        results = service.create_nodes(
+            [dict(type="PEER", name="peer{}".format(i)) for i in range(1, 4)], transport="ENV")
+
+        self.assertEqual([(result["name"], result["error"]) for result in results], [
+            ("peer1", None), ("peer2", "name already in use"), ("peer3", None)])
+        self.assertIsNone(results[1]["tls"])
+
+
+class NodeStateWatcherTestCase(SimpleTestCase):
+    def setUp(self):
+        self.cache = events.NodeStateCache()
+
+    def test_events_update_the_listed_states(self):
+        source = events.FakeEventSource(
+            [make_container("PEER", "peer0", "org1.example.com", "running", "Up 2 hours")],
+            [[
+                make_event("create", "peer1.org1.example.com"),
+                make_event("start", "peer1.org1.example.com"),
+                make_event("health_status: healthy", "peer1.org1.example.com"),
+                make_event("die", "peer0.org1.example.com", 2 * 10 ** 18, exitCode="137"),
+                make_event("exec_start: peer version", "peer1.org1.example.com"),
+            ]])
+        watcher = events.NodeStateWatcher(source, self.cache)
+
+        # Keep the states readable after the fake stream ends.
+        with mock.patch.object(events.NodeStateCache, "invalidate"):
+            watcher.sync()
+        peer0 = self.cache.get("peer0.org1.example.com")
+        self.assertEqual((peer0.status, peer0.exit_code), ("exited", 137))
+        self.assertEqual(peer0.last_transition.timestamp(), 2 * 10 ** 9)
+        peer1 = self.cache.get("peer1.org1.example.com")
+        self.assertEqual((peer1.status, peer1.health, peer1.name), ("running", "healthy", "peer1"))
+
+    def test_reconnect_resyncs_everything(self):
+        source = events.FakeEventSource(
+            [
+                make_container("PEER", "peer0", "org1.example.com", "running", "Up 2 hours"),
+                make_container("PEER", "peer1", "org1.example.com", "running", "Up 2 hours"),
+            ],
+            [[make_event("die", "peer0.org1.example.com", exitCode="1"), ConnectionError("lost")], []])
+        watcher = events.NodeStateWatcher(source, self.cache)
+
+        with self.assertRaises(ConnectionError):
+            watcher.sync()
+        self.assertFalse(self.cache.synced)
+        self.assertIsNone(self.cache.get("peer0.org1.example.com"))
+
+        # peer1 was removed and peer0 restarted while disconnected.
+        source.containers = [make_container("PEER", "peer0", "org1.example.com", "running", "Up 1 second")]
+        with mock.patch.object(events.NodeStateCache, "invalidate"):
+            watcher.sync()
+        self.assertEqual([state.status for state in self.cache.all()], ["running"])
+        self.assertEqual(len(source.since), 2)
+
+    def test_destroyed_container_is_dropped(self):
+        self.cache.resync([events.parse_container(
+            make_container("PEER", "peer0", "org1.example.com", "exited", "Exited (0) 1 hour ago"))])
+        self.cache.apply(make_event("destroy", "peer0.org1.example.com"))
+        self.assertEqual(self.cache.all(), [])
+
+
+class NodeOperationsTestCase(SimpleTestCase):
+    def setUp(self):
+        self.nodes = [
+            events.NodeState("peer0.org1.example.com", "PEER", "peer0", "org1.example.com", "running"),
+            events.NodeState("orderer0.example.com", "ORDERER", "orderer0", "example.com", "running"),
+            events.NodeState("peer1.org1.example.com", "PEER", "peer1", "org1.example.com", "exited"),
+        ]
+        self.pages = {}
+        self.cache = operations.NodeOperationsCache(window=3)
+        self.scraper = operations.NodeOperationsScraper(lambda: self.nodes, self.cache, self.fetch)
+
+    def fetch(self, url, timeout):
+        page = self.pages[url]
+        if isinstance(page, BaseException):
+            raise page
+        return page
+
+    def serve(self, peer_metrics, orderer_metrics, peer_health=(200, '{"status": "OK"}')):
+        self.pages = {
+            "http://peer0.org1.example.com:9444/healthz": peer_health,
+            "http://peer0.org1.example.com:9444/metrics": (200, peer_metrics),
+            "http://orderer0.example.com:9443/healthz": (200, '{"status": "OK"}'),
+            "http://orderer0.example.com:9443/metrics": (200, orderer_metrics),
+        }
+
+    def peer_metrics(self, height, endorsements, seconds):
+        return (
+            '# TYPE ledger_blockchain_height gauge\n'
+            'ledger_blockchain_height{{channel="mychannel"}} {height}\n'
+            '# TYPE endorser_proposal_duration histogram\n'
+            'endorser_proposal_duration_bucket{{channel="mychannel",chaincode="basic",success="true",le="+Inf"}} '
+            '{endorsements}\n'
+            'endorser_proposal_duration_sum{{channel="mychannel",chaincode="basic",success="true"}} {seconds}\n'
+            'endorser_proposal_duration_count{{channel="mychannel",chaincode="basic",success="true"}} '
+            '{endorsements}\n'
+        ).format(height=height, endorsements=endorsements, seconds=seconds)
+
+    def orderer_metrics(self, broadcasts):
+        return (
+            '# TYPE broadcast_processed_count counter\n'
+            'broadcast_processed_count{{channel="mychannel",status="SUCCESS",type="ENDORSER_TRANSACTION"}} {}\n'
+        ).format(broadcasts)
+
+    def summaries(self):
+        return {summary["name"]: summary for summary in self.cache.summaries()}
+
+    def test_rates_and_averages_cover_the_window(self):
+        with mock.patch.object(operations.time, "monotonic", side_effect=[0, 0, 10, 10]):
+            self.serve(self.peer_metrics(5, 10, 1), self.orderer_metrics(100))
+            self.scraper.scrape()
+            self.serve(self.peer_metrics(8, 30, 5), self.orderer_metrics(150),
+                       peer_health=(503, '{"status": "Service Unavailable", "failed_checks": [{"component": "couchdb"}]}'))
+            self.scraper.scrape()
+
+        summaries = self.summaries()
+        self.assertEqual(set(summaries), {"peer0", "orderer0"})
+        self.assertEqual(summaries["peer0"]["block_heights"], {"mychannel": 8})
+        self.assertAlmostEqual(summaries["peer0"]["endorsement_latency"], 0.2)
+        self.assertEqual((summaries["peer0"]["healthy"], summaries["peer0"]["failed_checks"]), (False, ["couchdb"]))
+        self.assertEqual(summaries["orderer0"]["broadcast_rate"], 5)
+        self.assertIsNone(summaries["orderer0"]["endorsement_latency"])
+
+    def test_unreachable_node_keeps_its_last_figures(self):
+        self.serve(self.peer_metrics(5, 10, 1), self.orderer_metrics(100))
+        self.scraper.scrape()
+        self.pages["http://peer0.org1.example.com:9444/healthz"] = ConnectionRefusedError("refused")
+        self.scraper.scrape()
+
+        peer = self.summaries()["peer0"]
+        self.assertIsNone(peer["healthy"])
+        self.assertIn("refused", peer["error"])
+        self.assertEqual(peer["block_heights"], {"mychannel": 5})
+
+    def test_restarted_node_starts_a_new_window(self):
+        self.serve(self.peer_metrics(5, 10, 1), self.orderer_metrics(100))
+        self.scraper.scrape()
+        self.serve(self.peer_metrics(5, 2, 1), self.orderer_metrics(10))
+        self.scraper.scrape()
+
+        self.assertIsNone(self.summaries()["orderer0"]["broadcast_rate"])
+        self.assertIsNone(self.summaries()["peer0"]["endorsement_latency"])
+
+    def test_stopped_nodes_are_forgotten(self):
+        self.serve(self.peer_metrics(5, 10, 1), self.orderer_metrics(100))
+        self.scraper.scrape()
+        self.nodes = self.nodes[:1]
+        self.scraper.scrape()
+
+        self.assertEqual(set(self.summaries()), {"peer0"})
@@ -1,10 +1,13 @@
+from adrf import viewsets
 from drf_spectacular.utils import extend_schema
-from rest_framework import viewsets, status
+from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from node.operations import node_operations
 from node.serializers import NodeRequestSerializer, NodeResponseSerializer, NodeStatusRequestSerializer, \
-    NodeStatusSerializer
+    NodeStatusSerializer, NodeBulkStatusRequest, NodeBulkStatusResponse, NodeOperationsResponse, NodeBatchRequest, \
+    NodeBatchResponse
 
 
 # Create your views here.
@@ -14,14 +17,35 @@ class NodeViewSet(viewsets.ViewSet):
         responses={200: NodeStatusSerializer}
     )
     @action(detail=False, methods=['get'])
-    def status(self, request):
+    async def status(self, request):
         serializer = NodeStatusRequestSerializer(data=request.query_params)
         serializer.is_valid(raise_exception=True)
 
         return Response(
-            data=serializer.save().data,
+            data=(await serializer.asave()).data,
             status=status.HTTP_200_OK)
 
+    @extend_schema(
+        request=NodeBulkStatusRequest,
+        responses={200: NodeBulkStatusResponse}
+    )
+    @status.mapping.post
+    async def bulk_status(self, request):
+        serializer = NodeBulkStatusRequest(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return Response(
+            data=(await serializer.asave()).data,
+            status=status.HTTP_200_OK)
+
+    @extend_schema(
+        responses={200: NodeOperationsResponse}
+    )
+    @action(detail=False, methods=['get'])
+    async def operations(self, request):
+        return Response(
+            data=NodeOperationsResponse(dict(nodes=node_operations.summaries())).data,
+            status=status.HTTP_200_OK)
 
     @extend_schema(
         request=NodeRequestSerializer,
@@ -34,3 +58,16 @@ class NodeViewSet(viewsets.ViewSet):
         return Response(
             data=serializer.save().data,
             status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        request=NodeBatchRequest,
+        responses={201: NodeBatchResponse}
+    )
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        serializer = NodeBatchRequest(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return Response(
+            data=serializer.save().data,
+            status=status.HTTP_201_CREATED)
@@ -1,9 +1,9 @@
 import logging
 import os
-import subprocess
 
 import yaml
 
+from hyperledger_fabric.runner import run
 from hyperledger_fabric.settings import CELLO_HOME, FABRIC_TOOL, CRYPTO_CONFIG
 
 LOG = logging.getLogger(__name__)
@@ -57,9 +57,4 @@ def create(name: str):
         # |_ peerOrganizations
         # |_ ordererOrganizations
         # |_ crypto-config.yaml
-        LOG.info(subprocess.run(
-            command,
-            check=True,
-            text=True,
-            capture_output=True,
-        ).stdout)
+        LOG.info(run(command).stdout)
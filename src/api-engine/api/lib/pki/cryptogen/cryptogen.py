@@ -7,7 +7,15 @@ from subprocess import check_call
 
 import logging
 
-from api_engine.settings import CELLO_HOME, FABRIC_TOOL, FABRIC_VERSION
+import yaml
+
+from api_engine.settings import (
+    CELLO_HOME,
+    CRYPTOGEN_EXTEND,
+    FABRIC_TOOL,
+    FABRIC_VERSION,
+)
+from api.lib.pki.cryptogen import issuer
 
 LOG = logging.getLogger(__name__)
 
@@ -61,17 +69,34 @@ class CryptoGen:
 
     def extend(self, input="crypto-config", config="crypto-config.yaml"):
         """Extend existing network
+        Certificates are signed in process from the existing CAs, unless
+        CRYPTOGEN_EXTEND or an organization does not exist yet, which
+        run cryptogen extend instead.
         param:
             input: The input directory in which existing network place
             config: The configuration template to use
         return:
         """
+        input_dir = os.path.join(self.filepath, self.name, input)
+        config_file = os.path.join(self.filepath, self.name, config)
+        if not CRYPTOGEN_EXTEND:
+            try:
+                with open(config_file, "r", encoding="utf-8") as f:
+                    crypto_config = yaml.safe_load(f)
+                for directory in issuer.extend(input_dir, crypto_config):
+                    LOG.info("Issued {}".format(directory))
+                return
+            except FileNotFoundError as e:
+                LOG.info("{}, running cryptogen extend".format(e))
+            except Exception as e:
+                err_msg = "cryptogen extend fail for {}!".format(e)
+                raise Exception(err_msg)
         try:
             command = [
                 self.cryptogen,
                 "extend",
-                "--input={}/{}/{}".format(self.filepath, self.name, input),
-                "--config={}/{}/{}".format(self.filepath, self.name, config),
+                "--input={}".format(input_dir),
+                "--config={}".format(config_file),
             ]
 
             LOG.info(" ".join(command))
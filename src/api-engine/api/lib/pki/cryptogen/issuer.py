@@ -0,0 +1,468 @@
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+"""
+Sign the MSP and TLS certificates of nodes and users from the CA and TLS CA
+of an existing organization, without running cryptogen.
+
+CryptoGen.extend uses it for organizations that already exist. Each CA is
+loaded once and only the identities whose directories are missing are
+written, with the layout, subjects and NodeOU config.yaml of cryptogen.
+"""
+import ipaddress
+import os
+import re
+import secrets
+import shutil
+import tempfile
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import ExtendedKeyUsageOID, NameOID
+
+# MSP identity types, also the OU of their certificates with NodeOUs.
+CLIENT = "client"
+PEER = "peer"
+ADMIN = "admin"
+ORDERER = "orderer"
+
+_VALIDITY = timedelta(days=3650)
+_USAGES = dict(
+    digital_signature=False,
+    content_commitment=False,
+    key_encipherment=False,
+    data_encipherment=False,
+    key_agreement=False,
+    key_cert_sign=False,
+    crl_sign=False,
+    encipher_only=False,
+    decipher_only=False,
+)
+_SIGN_KEY_USAGE = x509.KeyUsage(**dict(_USAGES, digital_signature=True))
+_TLS_KEY_USAGE = x509.KeyUsage(
+    **dict(_USAGES, digital_signature=True, key_encipherment=True)
+)
+_PRIVATE_KEY = "priv_sk"
+_TEMPLATE_FIELD_PATTERN = re.compile(r"{{\s*\.(\w+)\s*}}")
+# msp/config.yaml, the certificate is cacerts/<CA name>-cert.pem.
+_NODE_OUS = """NodeOUs:
+  Enable: true
+  ClientOUIdentifier:
+    Certificate: {certificate}
+    OrganizationalUnitIdentifier: client
+  PeerOUIdentifier:
+    Certificate: {certificate}
+    OrganizationalUnitIdentifier: peer
+  AdminOUIdentifier:
+    Certificate: {certificate}
+    OrganizationalUnitIdentifier: admin
+  OrdererOUIdentifier:
+    Certificate: {certificate}
+    OrganizationalUnitIdentifier: orderer
+"""
+
+# Loaded CA keys and certificates by directory, with the stat of their files.
+_signers: Dict[
+    str, Tuple[Tuple, ec.EllipticCurvePrivateKey, x509.Certificate]
+] = {}
+_signers_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class CertificateAuthority:
+    name: str
+    key: ec.EllipticCurvePrivateKey
+    cert: x509.Certificate
+    # Subject attributes of the certificates it signs, from the CA spec.
+    country: str = ""
+    province: str = ""
+    locality: str = ""
+    organizational_unit: str = ""
+    street_address: str = ""
+    postal_code: str = ""
+
+    def sign(
+        self,
+        name: str,
+        organizational_units: List[str],
+        sans: List[str],
+        public_key: ec.EllipticCurvePublicKey,
+        key_usage: x509.KeyUsage,
+        extended_key_usage: List[x509.ObjectIdentifier],
+    ) -> x509.Certificate:
+        # cryptogen rounds to the minute and backdates by five.
+        not_before = (
+            datetime.now(timezone.utc) + timedelta(seconds=30)
+        ).replace(second=0, microsecond=0) - timedelta(minutes=5)
+        builder = (
+            x509.CertificateBuilder()
+            .subject_name(self._subject(name, organizational_units))
+            .issuer_name(self.cert.subject)
+            .public_key(public_key)
+            .serial_number(secrets.randbelow(2**128 - 1) + 1)
+            .not_valid_before(not_before)
+            .not_valid_after(not_before + _VALIDITY)
+            .add_extension(key_usage, critical=True)
+            .add_extension(
+                x509.BasicConstraints(ca=False, path_length=None),
+                critical=True,
+            )
+        )
+        if extended_key_usage:
+            builder = builder.add_extension(
+                x509.ExtendedKeyUsage(extended_key_usage), critical=False
+            )
+        try:
+            ski = self.cert.extensions.get_extension_for_class(
+                x509.SubjectKeyIdentifier
+            ).value
+            builder = builder.add_extension(
+                x509.AuthorityKeyIdentifier.from_issuer_subject_key_identifier(
+                    ski
+                ),
+                critical=False,
+            )
+        except x509.ExtensionNotFound:
+            pass
+        if sans:
+            builder = builder.add_extension(
+                x509.SubjectAlternativeName(
+                    [_general_name(san) for san in sans]
+                ),
+                critical=False,
+            )
+        return builder.sign(self.key, hashes.SHA256())
+
+    def _subject(
+        self, name: str, organizational_units: List[str]
+    ) -> x509.Name:
+        # Attribute order and defaults of cryptogen's subject template.
+        attributes = [
+            (NameOID.COUNTRY_NAME, self.country or "US"),
+            (NameOID.STATE_OR_PROVINCE_NAME, self.province or "California"),
+            (NameOID.LOCALITY_NAME, self.locality or "San Francisco"),
+        ]
+        if self.street_address:
+            attributes.append((NameOID.STREET_ADDRESS, self.street_address))
+        if self.postal_code:
+            attributes.append((NameOID.POSTAL_CODE, self.postal_code))
+        units = (
+            [self.organizational_unit] if self.organizational_unit else []
+        ) + organizational_units
+        rdns = [
+            x509.RelativeDistinguishedName([x509.NameAttribute(oid, value)])
+            for oid, value in attributes
+        ]
+        if units:
+            rdns.append(
+                x509.RelativeDistinguishedName(
+                    [
+                        x509.NameAttribute(
+                            NameOID.ORGANIZATIONAL_UNIT_NAME, unit
+                        )
+                        for unit in units
+                    ]
+                )
+            )
+        rdns.append(
+            x509.RelativeDistinguishedName(
+                [x509.NameAttribute(NameOID.COMMON_NAME, name)]
+            )
+        )
+        return x509.Name(rdns)
+
+
+def _general_name(san: str) -> x509.GeneralName:
+    try:
+        return x509.IPAddress(ipaddress.ip_address(san))
+    except ValueError:
+        return x509.DNSName(san)
+
+
+def _find_file(directory: str, suffix: str) -> str:
+    for file_name in sorted(os.listdir(directory)):
+        if file_name.endswith(suffix):
+            return os.path.join(directory, file_name)
+    raise FileNotFoundError("No *{} in {}".format(suffix, directory))
+
+
+def _load_signer(
+    directory: str,
+) -> Tuple[ec.EllipticCurvePrivateKey, x509.Certificate]:
+    """Return the key and certificate of the CA in directory, cached
+    until its files change."""
+    key_file = _find_file(directory, "_sk")
+    cert_file = _find_file(directory, ".pem")
+    signature = tuple(
+        (path, os.stat(path).st_mtime_ns, os.stat(path).st_size)
+        for path in (key_file, cert_file)
+    )
+    with _signers_lock:
+        cached = _signers.get(directory)
+        if cached and cached[0] == signature:
+            return cached[1], cached[2]
+    with open(key_file, "rb") as f:
+        key = serialization.load_pem_private_key(f.read(), password=None)
+    with open(cert_file, "rb") as f:
+        cert = x509.load_pem_x509_certificate(f.read())
+    with _signers_lock:
+        _signers[directory] = (signature, key, cert)
+    return key, cert
+
+
+def load_ca(
+    directory: str, name: str, ca_spec: Optional[Dict[str, Any]] = None
+) -> CertificateAuthority:
+    ca_spec = ca_spec or {}
+    key, cert = _load_signer(directory)
+    return CertificateAuthority(
+        name=name,
+        key=key,
+        cert=cert,
+        country=ca_spec.get("Country") or "",
+        province=ca_spec.get("Province") or "",
+        locality=ca_spec.get("Locality") or "",
+        organizational_unit=ca_spec.get("OrganizationalUnit") or "",
+        street_address=ca_spec.get("StreetAddress") or "",
+        postal_code=ca_spec.get("PostalCode") or "",
+    )
+
+
+def _pem(cert: x509.Certificate) -> bytes:
+    return cert.public_bytes(serialization.Encoding.PEM)
+
+
+def _write(path: str, content: bytes, mode: int = 0o644):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(
+        os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode), "wb"
+    ) as f:
+        f.write(content)
+
+
+def _generate_key() -> Tuple[ec.EllipticCurvePrivateKey, bytes]:
+    key = ec.generate_private_key(ec.SECP256R1())
+    return key, key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+def generate_local_msp(
+    directory: str,
+    name: str,
+    sans: List[str],
+    sign_ca: CertificateAuthority,
+    tls_ca: CertificateAuthority,
+    node_type: str,
+    node_ous: bool,
+):
+    """
+    Write the msp and tls directories of the identity name under directory, as
+    cryptogen does. The directory is assembled next to its final place and
+    renamed, so an interrupted run never leaves a partial identity behind.
+    """
+    parent = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(
+        prefix=".{}.".format(os.path.basename(directory)), dir=parent
+    )
+    try:
+        os.chmod(staging, 0o755)
+        msp, tls = os.path.join(staging, "msp"), os.path.join(staging, "tls")
+
+        key, key_pem = _generate_key()
+        cert = sign_ca.sign(
+            name,
+            [node_type] if node_ous else [],
+            [],
+            key.public_key(),
+            _SIGN_KEY_USAGE,
+            [],
+        )
+        _write(os.path.join(msp, "keystore", _PRIVATE_KEY), key_pem, 0o600)
+        _write(os.path.join(msp, "signcerts", name + "-cert.pem"), _pem(cert))
+        _write(
+            os.path.join(msp, "cacerts", sign_ca.name + "-cert.pem"),
+            _pem(sign_ca.cert),
+        )
+        _write(
+            os.path.join(msp, "tlscacerts", tls_ca.name + "-cert.pem"),
+            _pem(tls_ca.cert),
+        )
+        if node_ous:
+            _write(
+                os.path.join(msp, "config.yaml"),
+                _NODE_OUS.format(
+                    certificate="cacerts/" + sign_ca.name + "-cert.pem"
+                ).encode(),
+            )
+        else:
+            _write(
+                os.path.join(msp, "admincerts", name + "-cert.pem"), _pem(cert)
+            )
+
+        key, key_pem = _generate_key()
+        cert = tls_ca.sign(
+            name,
+            [],
+            sans,
+            key.public_key(),
+            _TLS_KEY_USAGE,
+            [ExtendedKeyUsageOID.SERVER_AUTH, ExtendedKeyUsageOID.CLIENT_AUTH],
+        )
+        prefix = "client" if node_type in (CLIENT, ADMIN) else "server"
+        _write(os.path.join(tls, "ca.crt"), _pem(tls_ca.cert))
+        _write(os.path.join(tls, prefix + ".crt"), _pem(cert))
+        _write(os.path.join(tls, prefix + ".key"), key_pem, 0o600)
+
+        os.rename(staging, directory)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+
+def _render(template: str, data: Dict[str, Any]) -> str:
+    def field(match: re.Match) -> str:
+        if match.group(1) not in data:
+            raise ValueError(
+                "Unknown field {} in {}".format(match.group(1), template)
+            )
+        return str(data[match.group(1)])
+
+    return _TEMPLATE_FIELD_PATTERN.sub(field, template)
+
+
+def _render_node_spec(
+    domain: str, spec: Dict[str, Any]
+) -> Tuple[str, List[str]]:
+    """Return the common name and subject alternative names of a node spec."""
+    data = dict(Hostname=spec.get("Hostname", ""), Domain=domain)
+    common_name = _render(
+        spec.get("CommonName") or "{{.Hostname}}.{{.Domain}}", data
+    )
+    data["CommonName"] = common_name
+    return common_name, [common_name, data["Hostname"]] + [
+        _render(san, data) for san in spec.get("SANS") or []
+    ]
+
+
+def _render_node_specs(
+    organization: Dict[str, Any], prefix: str
+) -> List[Tuple[str, List[str]]]:
+    template = organization.get("Template") or {}
+    specs = list(organization.get("Specs") or [])
+    for index in range(
+        template.get("Start", 0),
+        template.get("Start", 0) + template.get("Count", 0),
+    ):
+        hostname = _render(
+            template.get("Hostname") or "{{.Prefix}}{{.Index}}",
+            dict(Prefix=prefix, Index=index, Domain=organization["Domain"]),
+        )
+        specs.append(dict(Hostname=hostname, SANS=template.get("SANS")))
+    return [_render_node_spec(organization["Domain"], spec) for spec in specs]
+
+
+def _extend_organization(
+    organization_directory: str,
+    organization: Dict[str, Any],
+    nodes_directory: str,
+    prefix: str,
+    node_type: str,
+    users: int,
+) -> List[str]:
+    domain = organization["Domain"]
+    node_ous = bool(organization.get("EnableNodeOUs"))
+    ca_spec = organization.get("CA") or {}
+    ca_name, _ = _render_node_spec(
+        domain, dict(ca_spec, Hostname=ca_spec.get("Hostname") or "ca")
+    )
+    sign_ca = load_ca(
+        os.path.join(organization_directory, "ca"), ca_name, ca_spec
+    )
+    tls_ca = load_ca(
+        os.path.join(organization_directory, "tlsca"),
+        "tlsca." + domain,
+        ca_spec,
+    )
+    users_directory = os.path.join(organization_directory, "users")
+    admin = "Admin@" + domain
+    admin_cert = os.path.join(
+        users_directory, admin, "msp", "signcerts", admin + "-cert.pem"
+    )
+
+    written = []
+    for common_name, sans in _render_node_specs(organization, prefix):
+        directory = os.path.join(
+            organization_directory, nodes_directory, common_name
+        )
+        if os.path.exists(directory):
+            continue
+        generate_local_msp(
+            directory, common_name, sans, sign_ca, tls_ca, node_type, node_ous
+        )
+        if not node_ous:
+            # Without NodeOUs, admincerts lists the admins of the node.
+            admin_certs = os.path.join(directory, "msp", "admincerts")
+            shutil.rmtree(admin_certs)
+            os.makedirs(admin_certs)
+            shutil.copy(admin_cert, admin_certs)
+        written.append(directory)
+    for index in range(1, users + 1):
+        common_name = "User{}@{}".format(index, domain)
+        directory = os.path.join(users_directory, common_name)
+        if not os.path.exists(directory):
+            generate_local_msp(
+                directory, common_name, [], sign_ca, tls_ca, CLIENT, node_ous
+            )
+            written.append(directory)
+    return written
+
+
+def extend(input_directory: str, crypto_config: Dict[str, Any]) -> List[str]:
+    """
+    Issue what cryptogen extend --input=input_directory would for crypto_config
+    and return the directories written. Organizations must exist already,
+    FileNotFoundError is raised before anything is written otherwise, they
+    are for cryptogen generate to create.
+    """
+    organizations = [
+        (
+            os.path.join(
+                input_directory, "peerOrganizations", organization["Domain"]
+            ),
+            organization,
+            "peers",
+            "peer",
+            PEER,
+            (organization.get("Users") or {}).get("Count", 0),
+        )
+        for organization in crypto_config.get("PeerOrgs") or []
+    ] + [
+        (
+            os.path.join(
+                input_directory, "ordererOrganizations", organization["Domain"]
+            ),
+            organization,
+            "orderers",
+            "orderer",
+            ORDERER,
+            0,
+        )
+        for organization in crypto_config.get("OrdererOrgs") or []
+    ]
+    for directory, *_ in organizations:
+        for ca in ("ca", "tlsca"):
+            if not os.path.isdir(os.path.join(directory, ca)):
+                raise FileNotFoundError("No {} in {}".format(ca, directory))
+    written = []
+    for organization in organizations:
+        written += _extend_organization(*organization)
+    return written
@@ -0,0 +1,241 @@
+import datetime
+import os
+import tempfile
+from unittest import mock
+
+import yaml
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import ExtendedKeyUsageOID, NameOID
+from django.test import SimpleTestCase
+
+from api.lib.pki.cryptogen import cryptogen, issuer
+
+
+def make_ca(directory, name):
+    """Write a self-signed CA the way cryptogen generate does, and return its certificate."""
+    key = ec.generate_private_key(ec.SECP256R1())
+    subject = x509.Name(
+        [
+            x509.NameAttribute(NameOID.COUNTRY_NAME, "CN"),
+            x509.NameAttribute(NameOID.ORGANIZATION_NAME, name.split(".", 1)[1]),
+            x509.NameAttribute(NameOID.COMMON_NAME, name),
+        ]
+    )
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(subject)
+        .issuer_name(subject)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .add_extension(
+            x509.SubjectKeyIdentifier.from_public_key(key.public_key()),
+            critical=False,
+        )
+        .sign(key, hashes.SHA256())
+    )
+    os.makedirs(directory)
+    with open(os.path.join(directory, "priv_sk"), "wb") as f:
+        f.write(
+            key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )
+        )
+    with open(os.path.join(directory, name + "-cert.pem"), "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    return cert
+
+
+class OrganizationMixin:
+    """An organization of a crypto-config.yaml whose CAs exist, but none of its nodes."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        # Laid out like CryptoGen: <filepath>/<name>/crypto-config(.yaml).
+        self.filepath = directory.name
+        self.home = os.path.join(self.filepath, "org1.example.com", "crypto-config")
+        self.organization = os.path.join(
+            self.home, "peerOrganizations", "org1.example.com"
+        )
+        self.ca = make_ca(os.path.join(self.organization, "ca"), "ca.org1.example.com")
+        self.tls_ca = make_ca(
+            os.path.join(self.organization, "tlsca"), "tlsca.org1.example.com"
+        )
+        self.crypto_config = {
+            "PeerOrgs": [
+                {
+                    "Name": "Org1",
+                    "Domain": "org1.example.com",
+                    "CA": {"Country": "CN", "Province": "CP", "Locality": "BJ"},
+                    "EnableNodeOUs": True,
+                    "Specs": [{"Hostname": "peer0", "SANS": ["localhost", "127.0.0.1"]}],
+                    "Template": {"Count": 1, "Start": 1},
+                    "Users": {"Count": 1},
+                }
+            ],
+        }
+
+    def read_cert(self, *path):
+        with open(os.path.join(self.organization, *path), "rb") as f:
+            return x509.load_pem_x509_certificate(f.read())
+
+
+class IssuerTestCase(OrganizationMixin, SimpleTestCase):
+    def write_crypto_config(self):
+        with open(
+            os.path.join(self.filepath, "org1.example.com", "crypto-config.yaml"),
+            "w",
+            encoding="utf-8",
+        ) as f:
+            yaml.safe_dump(self.crypto_config, f)
+
+    def test_extend_writes_the_cryptogen_layout(self):
+        written = issuer.extend(self.home, self.crypto_config)
+
+        self.assertEqual(
+            [os.path.relpath(path, self.organization) for path in written],
+            [
+                "peers/peer0.org1.example.com",
+                "peers/peer1.org1.example.com",
+                "users/User1@org1.example.com",
+            ],
+        )
+        peer = os.path.join("peers", "peer0.org1.example.com")
+        self.assertEqual(
+            sorted(
+                os.path.relpath(
+                    os.path.join(root, file_name),
+                    os.path.join(self.organization, peer),
+                )
+                for root, _, file_names in os.walk(os.path.join(self.organization, peer))
+                for file_name in file_names
+            ),
+            [
+                "msp/cacerts/ca.org1.example.com-cert.pem",
+                "msp/config.yaml",
+                "msp/keystore/priv_sk",
+                "msp/signcerts/peer0.org1.example.com-cert.pem",
+                "msp/tlscacerts/tlsca.org1.example.com-cert.pem",
+                "tls/ca.crt",
+                "tls/server.crt",
+                "tls/server.key",
+            ],
+        )
+        with open(
+            os.path.join(self.organization, peer, "msp", "config.yaml"),
+            encoding="utf-8",
+        ) as f:
+            node_ous = yaml.safe_load(f)["NodeOUs"]
+        self.assertEqual(
+            node_ous["PeerOUIdentifier"],
+            {
+                "Certificate": "cacerts/ca.org1.example.com-cert.pem",
+                "OrganizationalUnitIdentifier": "peer",
+            },
+        )
+
+        sign_cert = self.read_cert(
+            peer, "msp", "signcerts", "peer0.org1.example.com-cert.pem"
+        )
+        sign_cert.verify_directly_issued_by(self.ca)
+        self.assertEqual(
+            sign_cert.subject.rfc4514_string(),
+            "CN=peer0.org1.example.com,OU=peer,L=BJ,ST=CP,C=CN",
+        )
+        tls_cert = self.read_cert(peer, "tls", "server.crt")
+        tls_cert.verify_directly_issued_by(self.tls_ca)
+        self.assertEqual(
+            tls_cert.extensions.get_extension_for_class(
+                x509.SubjectAlternativeName
+            ).value.get_values_for_type(x509.DNSName),
+            ["peer0.org1.example.com", "peer0", "localhost"],
+        )
+        self.assertEqual(
+            list(tls_cert.extensions.get_extension_for_class(x509.ExtendedKeyUsage).value),
+            [ExtendedKeyUsageOID.SERVER_AUTH, ExtendedKeyUsageOID.CLIENT_AUTH],
+        )
+
+        user = os.path.join("users", "User1@org1.example.com")
+        self.assertEqual(
+            self.read_cert(user, "msp", "signcerts", "User1@org1.example.com-cert.pem")
+            .subject.get_attributes_for_oid(NameOID.ORGANIZATIONAL_UNIT_NAME)[0]
+            .value,
+            "client",
+        )
+        self.assertTrue(
+            os.path.exists(os.path.join(self.organization, user, "tls", "client.key"))
+        )
+
+    def test_extend_only_writes_new_nodes(self):
+        issuer.extend(self.home, self.crypto_config)
+        cert = self.read_cert("peers", "peer0.org1.example.com", "tls", "server.crt")
+
+        self.crypto_config["PeerOrgs"][0]["Specs"].append({"Hostname": "peer2"})
+        written = issuer.extend(self.home, self.crypto_config)
+
+        self.assertEqual(
+            [os.path.basename(path) for path in written], ["peer2.org1.example.com"]
+        )
+        self.assertEqual(
+            self.read_cert("peers", "peer0.org1.example.com", "tls", "server.crt"), cert
+        )
+
+    def test_extend_needs_existing_organizations(self):
+        self.crypto_config["OrdererOrgs"] = [
+            {"Name": "Orderer", "Domain": "example.com", "Specs": []}
+        ]
+
+        with self.assertRaises(FileNotFoundError):
+            issuer.extend(self.home, self.crypto_config)
+        self.assertFalse(os.path.exists(os.path.join(self.organization, "peers")))
+
+    @mock.patch("api.lib.pki.cryptogen.cryptogen.check_call")
+    def test_cryptogen_extend_issues_in_process(self, check_call):
+        self.write_crypto_config()
+
+        cryptogen.CryptoGen("org1.example.com", filepath=self.filepath).extend()
+
+        check_call.assert_not_called()
+        self.assertTrue(
+            os.path.isdir(os.path.join(self.organization, "peers", "peer1.org1.example.com"))
+        )
+
+    @mock.patch("api.lib.pki.cryptogen.cryptogen.check_call")
+    def test_cryptogen_extend_falls_back_for_new_organizations(self, check_call):
+        self.crypto_config["OrdererOrgs"] = [
+            {"Name": "Orderer", "Domain": "example.com", "Specs": []}
+        ]
+        self.write_crypto_config()
+
+        cryptogen.CryptoGen(
+            "org1.example.com", filepath=self.filepath, cryptogen="/cello/bin"
+        ).extend()
+
+        check_call.assert_called_once_with(
+            [
+                "/cello/bin/cryptogen",
+                "extend",
+                "--input={}".format(self.home),
+                "--config={}".format(
+                    os.path.join(self.filepath, "org1.example.com", "crypto-config.yaml")
+                ),
+            ]
+        )
+
+    @mock.patch("api.lib.pki.cryptogen.cryptogen.CRYPTOGEN_EXTEND", True)
+    @mock.patch("api.lib.pki.cryptogen.cryptogen.check_call")
+    def test_cryptogen_extend_setting_skips_the_issuer(self, check_call):
+        self.write_crypto_config()
+
+        cryptogen.CryptoGen("org1.example.com", filepath=self.filepath).extend()
+
+        check_call.assert_called_once()
+        self.assertFalse(os.path.exists(os.path.join(self.organization, "peers")))
@@ -54,7 +54,8 @@ INSTALLED_APPS = [
     "organization.apps.OrganizationConfig",
     "node.apps.NodeConfig",
     "channel.apps.ChannelConfig",
-    "chaincode.apps.ChaincodeConfig"
+    "chaincode.apps.ChaincodeConfig",
+    "operation.apps.OperationConfig",
 ]
 
 MIDDLEWARE = [
@@ -219,6 +220,35 @@ LOGGING = {
 }
 
 MAX_AGENT_CAPACITY = 100
+# Calls to the agents time out after AGENT_CONNECT_TIMEOUT seconds without a
+# connection and AGENT_READ_TIMEOUT seconds without an answer, or
+# AGENT_LONG_READ_TIMEOUT for calls that build chaincode or start nodes. GETs
+# are retried AGENT_RETRIES times, after AGENT_RETRY_BACKOFF seconds, doubling.
+# Up to AGENT_POOL_SIZE connections to each agent are kept alive, and a passed
+# agent health check is trusted for AGENT_HEALTH_TTL seconds.
+AGENT_CONNECT_TIMEOUT = float(os.getenv("AGENT_CONNECT_TIMEOUT", "5"))
+AGENT_READ_TIMEOUT = float(os.getenv("AGENT_READ_TIMEOUT", "60"))
+AGENT_LONG_READ_TIMEOUT = float(os.getenv("AGENT_LONG_READ_TIMEOUT", "900"))
+AGENT_RETRIES = int(os.getenv("AGENT_RETRIES", "3"))
+AGENT_RETRY_BACKOFF = float(os.getenv("AGENT_RETRY_BACKOFF", "0.5"))
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "10"))
+AGENT_HEALTH_TTL = float(os.getenv("AGENT_HEALTH_TTL", "30"))
+# How many agent calls needed to list one page run at the same time.
+AGENT_FAN_OUT_PARALLELISM = int(os.getenv("AGENT_FAN_OUT_PARALLELISM", "8"))
+# Agents run chaincode installs as jobs. Their status is polled every
+# AGENT_JOB_POLL_INTERVAL seconds, for up to AGENT_JOB_TIMEOUT seconds.
+AGENT_JOB_POLL_INTERVAL = float(os.getenv("AGENT_JOB_POLL_INTERVAL", "2"))
+AGENT_JOB_TIMEOUT = float(os.getenv("AGENT_JOB_TIMEOUT", "3600"))
+# Nodes, channels and chaincodes are created by the run_operations command.
+# Each of its OPERATION_WORKERS threads looks for a pending operation every
+# OPERATION_POLL_INTERVAL seconds when idle. While an operation runs, its
+# worker marks it alive every OPERATION_HEARTBEAT_INTERVAL seconds. A running
+# operation that was not marked for OPERATION_ABANDONED_AFTER seconds is
+# failed, as the worker running it must have stopped.
+OPERATION_WORKERS = int(os.getenv("OPERATION_WORKERS", "4"))
+OPERATION_POLL_INTERVAL = float(os.getenv("OPERATION_POLL_INTERVAL", "1"))
+OPERATION_HEARTBEAT_INTERVAL = float(os.getenv("OPERATION_HEARTBEAT_INTERVAL", "30"))
+OPERATION_ABANDONED_AFTER = float(os.getenv("OPERATION_ABANDONED_AFTER", "1800"))
 
 MEDIA_URL = os.path.join(WEBROOT, "media/")
 MEDIA_ROOT = os.path.join(BASE_DIR, MEDIA_URL)
@@ -253,6 +283,9 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CELLO_HOME = os.path.join(BASE_DIR, "cello")
 FABRIC_TOOL = os.path.join(CELLO_HOME, "bin")
+# Certificates of nodes added to an existing organization are signed in
+# process by api.lib.pki.cryptogen.issuer unless CRYPTOGEN_EXTEND is true.
+CRYPTOGEN_EXTEND = os.getenv("CRYPTOGEN_EXTEND", "False").upper() == "TRUE"
 FABRIC_CFG = os.path.join(CELLO_HOME, "node")
 
 FABRIC_PEER_CFG = os.path.join(FABRIC_CFG, "core.yaml.bak")
@@ -31,6 +31,7 @@ from auth.views import RegisterViewSet, CelloTokenObtainPairView, CelloTokenVeri
 from chaincode.views import ChaincodeViewSet
 from channel.views import ChannelViewSet
 from node.views import NodeViewSet
+from operation.views import OperationViewSet
 from organization.views import OrganizationViewSet
 from user.views import UserViewSet
 
@@ -56,6 +57,7 @@ router.register("nodes", NodeViewSet, basename="node")
 router.register("register", RegisterViewSet, basename="register")
 router.register("channels", ChannelViewSet, basename="channel")
 router.register("chaincodes", ChaincodeViewSet, basename="chaincode")
+router.register("operations", OperationViewSet, basename="operation")
 
 urlpatterns = [path(WEBROOT, include(router.urls + [
     path(
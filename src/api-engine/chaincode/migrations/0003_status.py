@@ -0,0 +1,28 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chaincode', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chaincode',
+            name='approvals',
+            field=models.JSONField(blank=True, default=dict, help_text='Chaincode Approvals by Organization MSP ID'),
+        ),
+        migrations.AddField(
+            model_name='chaincode',
+            name='status',
+            field=models.CharField(blank=True, choices=[('CREATED', 'Created'), ('INSTALLED', 'Installed'), ('APPROVED', 'Approved'), ('COMMITTED', 'Committed')], help_text='Chaincode Status', max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='chaincode',
+            name='status_checked_at',
+            field=models.DateTimeField(blank=True, help_text='When the Chaincode Status was last checked with the agent', null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chaincode', '0003_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chaincode',
+            index=models.Index(fields=['channel', '-created_at', '-id'], name='chaincode_c_channel_ea7cb1_idx'),
+        ),
+    ]
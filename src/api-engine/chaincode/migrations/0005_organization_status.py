@@ -0,0 +1,42 @@
+# Generated by Django 4.2.16 on 2026-10-18 04:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0002_list_index'),
+        ('chaincode', '0004_list_index'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='chaincode',
+            name='approvals',
+        ),
+        migrations.RemoveField(
+            model_name='chaincode',
+            name='status',
+        ),
+        migrations.RemoveField(
+            model_name='chaincode',
+            name='status_checked_at',
+        ),
+        migrations.CreateModel(
+            name='ChaincodeOrganizationStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('CREATED', 'Created'), ('INSTALLED', 'Installed'), ('APPROVED', 'Approved'), ('COMMITTED', 'Committed')], help_text='Chaincode Status', max_length=64)),
+                ('approvals', models.JSONField(blank=True, default=dict, help_text='Chaincode Approvals by Organization MSP ID')),
+                ('status_checked_at', models.DateTimeField(help_text='When the Chaincode Status was last checked with the agent')),
+                ('chaincode', models.ForeignKey(help_text='Chaincode', on_delete=django.db.models.deletion.CASCADE, related_name='organization_statuses', to='chaincode.chaincode')),
+                ('organization', models.ForeignKey(help_text='Organization that checked the Chaincode Status', on_delete=django.db.models.deletion.CASCADE, to='organization.organization')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='chaincodeorganizationstatus',
+            constraint=models.UniqueConstraint(fields=('chaincode', 'organization'), name='unique_chaincode_organization_status'),
+        ),
+    ]
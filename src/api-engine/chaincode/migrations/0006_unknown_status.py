@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 04:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chaincode', '0005_organization_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='chaincodeorganizationstatus',
+            name='status',
+            field=models.CharField(choices=[('CREATED', 'Created'), ('INSTALLED', 'Installed'), ('APPROVED', 'Approved'), ('COMMITTED', 'Committed'), ('UNKNOWN', 'Unknown')], help_text='Chaincode Status', max_length=64),
+        ),
+    ]
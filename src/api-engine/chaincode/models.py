@@ -6,6 +6,7 @@ from django.db import models
 from channel.models import Channel
 from common.utils import make_uuid
 from node.models import Node
+from organization.models import Organization
 from user.models import UserProfile
 
 
@@ -20,6 +21,7 @@ class Chaincode(models.Model):
         INSTALLED = "INSTALLED", "Installed"
         APPROVED = "APPROVED", "Approved"
         COMMITTED = "COMMITTED", "Committed"
+        UNKNOWN = "UNKNOWN", "Unknown"
 
     id = models.UUIDField(
         primary_key=True,
@@ -91,3 +93,42 @@ class Chaincode(models.Model):
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["channel", "-created_at", "-id"]),
+        ]
+
+
+# Each organization's agent reports the install and approve state of its own peers.
+class ChaincodeOrganizationStatus(models.Model):
+    chaincode = models.ForeignKey(
+        Chaincode,
+        help_text="Chaincode",
+        related_name="organization_statuses",
+        on_delete=models.CASCADE,
+    )
+    organization = models.ForeignKey(
+        Organization,
+        help_text="Organization that checked the Chaincode Status",
+        on_delete=models.CASCADE,
+    )
+    status = models.CharField(
+        help_text="Chaincode Status",
+        choices=Chaincode.Status.choices,
+        max_length=64,
+    )
+    approvals = models.JSONField(
+        help_text="Chaincode Approvals by Organization MSP ID",
+        default=dict,
+        blank=True,
+    )
+    status_checked_at = models.DateTimeField(
+        help_text="When the Chaincode Status was last checked with the agent",
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("chaincode", "organization"),
+                name="unique_chaincode_organization_status",
+            )
+        ]
@@ -5,12 +5,13 @@ from django.core.validators import MinValueValidator
 from rest_framework import serializers
 
 from chaincode.models import Chaincode
-from chaincode.service import ChaincodeAction, create_chaincode, get_chaincode, install_chaincode, \
-    approve_chaincode, commit_chaincode, send_chaincode_request, metadata_exists, get_chaincode_status, \
-    get_chaincode_commit_readiness
+from chaincode.service import ChaincodeAction, get_chaincode, \
+    approve_chaincode, commit_chaincode, send_chaincode_request, metadata_exists
 from channel.models import Channel
 from channel.serializers import ChannelID
 from common.serializers import ListResponseSerializer
+from operation.models import Operation
+from operation.service import enqueue, stage_file
 from user.serializers import UserID
 
 
@@ -37,8 +38,26 @@ class ChaincodeID(serializers.ModelSerializer):
 class ChaincodeResponse(ChaincodeID):
     channel = ChannelID()
     creator = UserID()
-    status = serializers.SerializerMethodField()
-    approvals = serializers.SerializerMethodField()
+    # The status the current organization last checked, see attach_organization_statuses.
+    status = serializers.ChoiceField(
+        choices=Chaincode.Status.choices,
+        source="organization_status.status",
+        read_only=True,
+        allow_null=True,
+        help_text="Chaincode Status",
+    )
+    approvals = serializers.DictField(
+        source="organization_status.approvals",
+        read_only=True,
+        allow_null=True,
+        help_text="Chaincode Approvals by Organization MSP ID",
+    )
+    status_checked_at = serializers.DateTimeField(
+        source="organization_status.status_checked_at",
+        read_only=True,
+        allow_null=True,
+        help_text="When the Chaincode Status was last checked with the agent",
+    )
 
     class Meta:
         model = Chaincode
@@ -57,17 +76,10 @@ class ChaincodeResponse(ChaincodeID):
             "created_at",
             "description",
             "status",
-            "approvals"
+            "approvals",
+            "status_checked_at",
         )
 
-    def get_status(self, chaincode) -> str:
-        organization = self.context.get("organization")
-        return get_chaincode_status(organization, chaincode) if organization else chaincode.get("status")
-
-    def get_approvals(self, chaincode) -> str:
-        organization = self.context.get("organization")
-        return get_chaincode_commit_readiness(organization, chaincode) if organization else chaincode.get("approvals")
-
 
 class ChaincodeList(ListResponseSerializer):
     data = ChaincodeResponse(many=True, help_text="Chaincode data")
@@ -119,19 +131,23 @@ class ChaincodeCreateBody(serializers.ModelSerializer):
             raise serializers.ValidationError("You can only install chaincodes on your organization.")
         return value
 
-    def create(self, validated_data: Dict[str, Any]) -> ChaincodeID:
-        validated_data["user"] = self.context["user"]
-        validated_data["organization"] = self.context["organization"]
-        return ChaincodeID({"id": create_chaincode(**validated_data).id})
+    def create(self, validated_data: Dict[str, Any]) -> Operation:
+        validated_data["package"] = stage_file(validated_data["package"])
+        validated_data["channel"] = str(validated_data["channel"].id)
+        return enqueue(
+            self.context["organization"],
+            Operation.Type.CREATE_CHAINCODE,
+            validated_data,
+            self.context["user"])
 
 
 class ChaincodeInstallBody(ChaincodeID):
-    def update(self, instance: Chaincode, validated_data: Dict[str, Any]) -> Chaincode:
-        install_chaincode(
+    def update(self, instance: Chaincode, validated_data: Dict[str, Any]) -> Operation:
+        return enqueue(
             self.context["organization"],
-            instance
-        )
-        return instance
+            Operation.Type.INSTALL_CHAINCODE,
+            dict(chaincode=str(instance.id)),
+            self.context["user"])
 
 
 class ChaincodeApproveBody(ChaincodeID):
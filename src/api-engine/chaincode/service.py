@@ -5,15 +5,16 @@ import os
 import subprocess
 import tarfile
 import threading
-from typing import Optional, List, Any, Dict, Tuple
-from common.utils import safe_urljoin
+from functools import partial
+from typing import Callable, Optional, List, Any, Dict, Tuple
 
-import requests
 from django.db import transaction
+from django.utils import timezone
 
 from api_engine.settings import CELLO_HOME, FABRIC_TOOL
-from chaincode.models import Chaincode
+from chaincode.models import Chaincode, ChaincodeOrganizationStatus
 from channel.models import Channel
+from common.agent import LONG_TIMEOUT, fan_out, get_agent_client, wait_for_job
 from node.models import Node
 from node.service import get_domain_name, get_peer_directory, get_org_directory, get_orderer_directory
 from organization.models import Organization
@@ -29,10 +30,8 @@ def get_chaincode(pk: str) -> Optional[Chaincode]:
 
 
 def get_chaincode_status(organization: Organization, chaincode: Chaincode) -> str:
-    agent_url = organization.agent_url
-    requests.get(safe_urljoin(agent_url, "health")).raise_for_status()
-    response = requests.get(
-        safe_urljoin(agent_url, "chaincodes/status"),
+    response = get_agent_client(organization.agent_url).get(
+        "chaincodes/status",
         params=dict(
             name=chaincode.name,
             package_id=chaincode.package_id,
@@ -44,11 +43,81 @@ def get_chaincode_status(organization: Organization, chaincode: Chaincode) -> st
     return response.json()["status"]
 
 
+def get_chaincodes_status(organization: Organization, chaincodes: List[Chaincode]) -> Dict[str, Dict[str, Any]]:
+    """
+    Return the status and approvals of each chaincode by id, with one agent
+    call for the page, or all the per chaincode calls at the same time if
+    the agent has no bulk endpoint.
+    """
+    if not chaincodes:
+        return {}
+    response = get_agent_client(organization.agent_url).post(
+        "chaincodes/status",
+        json=dict(
+            chaincodes=[dict(
+                name=chaincode.name,
+                package_id=chaincode.package_id,
+                version=chaincode.version,
+                sequence=chaincode.sequence,
+                channel=chaincode.channel.name,
+                init_required=(chaincode.init_required is not None and chaincode.init_required),
+            ) for chaincode in chaincodes]
+        )
+    )
+    if response.status_code in (404, 405):
+        results = fan_out({
+            (str(chaincode.id), key): partial(get, organization, chaincode)
+            for chaincode in chaincodes
+            for key, get in (("status", get_chaincode_status), ("approvals", get_chaincode_commit_readiness))
+        })
+        return {
+            str(chaincode.id): dict(
+                status=results[(str(chaincode.id), "status")],
+                approvals=results[(str(chaincode.id), "approvals")],
+            )
+            for chaincode in chaincodes
+        }
+    response.raise_for_status()
+    return {
+        str(chaincode.id): chaincode_status
+        for chaincode, chaincode_status in zip(chaincodes, response.json()["chaincodes"])
+    }
+
+
+def refresh_chaincodes_status(organization: Organization, chaincodes: List[Chaincode]) -> None:
+    """Check the status and approvals of the chaincodes with the agent of the organization and store them."""
+    statuses = get_chaincodes_status(organization, chaincodes)
+    checked_at = timezone.now()
+    ChaincodeOrganizationStatus.objects.bulk_create(
+        [
+            ChaincodeOrganizationStatus(
+                chaincode=chaincode,
+                organization=organization,
+                status=statuses[str(chaincode.id)]["status"],
+                approvals=statuses[str(chaincode.id)].get("approvals", {}),
+                status_checked_at=checked_at,
+            )
+            for chaincode in chaincodes
+        ],
+        update_conflicts=True,
+        unique_fields=["chaincode", "organization"],
+        update_fields=["status", "approvals", "status_checked_at"],
+    )
+
+
+def attach_organization_statuses(organization: Organization, chaincodes: List[Chaincode]) -> None:
+    """Set organization_status of each chaincode to the stored status the organization checked, if any."""
+    statuses = {
+        str(status.chaincode_id): status
+        for status in ChaincodeOrganizationStatus.objects.filter(organization=organization, chaincode__in=chaincodes)
+    }
+    for chaincode in chaincodes:
+        chaincode.organization_status = statuses.get(str(chaincode.id))
+
+
 def get_chaincode_commit_readiness(organization: Organization, chaincode: Chaincode) -> str:
-    agent_url = organization.agent_url
-    requests.get(safe_urljoin(agent_url, "health")).raise_for_status()
-    response = requests.get(
-        safe_urljoin(agent_url, "chaincodes/commit/readiness"),
+    response = get_agent_client(organization.agent_url).get(
+        "chaincodes/commit/readiness",
         params=dict(
             name=chaincode.name,
             version=chaincode.version,
@@ -71,11 +140,16 @@ def create_chaincode(
         organization: Organization,
         description: str = None,
         init_required: bool = False,
-        signature_policy: str = None) -> Chaincode:
-    agent_url = organization.agent_url
-    requests.get(safe_urljoin(agent_url, "health")).raise_for_status()
-    response = requests.post(
-        safe_urljoin(agent_url, "chaincodes"),
+        signature_policy: str = None,
+        on_poll: Optional[Callable[[str], None]] = None) -> Chaincode:
+    """
+    Have the agent install and approve the package, and store the chaincode
+    once its job succeeded. on_poll is called with the status of the job
+    while it runs.
+    """
+    client = get_agent_client(organization.agent_url)
+    response = client.post(
+        "chaincodes",
         data=dict(
             name=name,
             version=version,
@@ -86,10 +160,14 @@ def create_chaincode(
         ),
         files=dict(
             file=package
-        )
+        ),
+        timeout=LONG_TIMEOUT
     )
     response.raise_for_status()
     response_json = response.json()
+    # Agents that install in the request answer without a job.
+    if response_json.get("job_id"):
+        wait_for_job(client, response_json["job_id"], on_poll)
 
     chaincode = Chaincode(
         package_id=response_json["package_id"],
@@ -121,11 +199,14 @@ def metadata_exists(file) -> bool:
     return res
 
 
-def install_chaincode(organization: Organization, chaincode: Chaincode) -> None:
-    agent_url = organization.agent_url
-    requests.get(safe_urljoin(agent_url, "health")).raise_for_status()
-    requests.put(
-        safe_urljoin(agent_url, "chaincodes/install"),
+def install_chaincode(
+        organization: Organization,
+        chaincode: Chaincode,
+        on_poll: Optional[Callable[[str], None]] = None) -> Optional[List[Dict[str, Any]]]:
+    """Have the agent install the package on its peers and return how it went on each one."""
+    client = get_agent_client(organization.agent_url)
+    response = client.put(
+        "chaincodes/install",
         data=dict(
             name=chaincode.name,
             version=chaincode.version,
@@ -134,17 +215,19 @@ def install_chaincode(organization: Organization, chaincode: Chaincode) -> None:
         ),
         files=dict(
             file=chaincode.package
-        )
-    ).raise_for_status()
+        ),
+        timeout=LONG_TIMEOUT
+    )
+    response.raise_for_status()
+    job_id = response.json().get("job_id") if response.content else None
+    return wait_for_job(client, job_id, on_poll) if job_id else None
 
 
 def approve_chaincode(
         organization: Organization,
         chaincode: Chaincode) -> None:
-    agent_url = organization.agent_url
-    requests.get(safe_urljoin(agent_url, "health")).raise_for_status()
-    requests.put(
-        safe_urljoin(agent_url, "chaincodes/approve"),
+    get_agent_client(organization.agent_url).put(
+        "chaincodes/approve",
         json=dict(
             name=chaincode.name,
             version=chaincode.version,
@@ -153,23 +236,23 @@ def approve_chaincode(
             channel_name=chaincode.channel.name,
             init_required=chaincode.init_required,
             signature_policy=chaincode.signature_policy
-        )
+        ),
+        timeout=LONG_TIMEOUT
     ).raise_for_status()
 
 
 def commit_chaincode(
         organization: Organization,
         chaincode: Chaincode) -> None:
-    agent_url = organization.agent_url
-    requests.get(safe_urljoin(agent_url, "health")).raise_for_status()
-    requests.put(
-        safe_urljoin(agent_url, "chaincodes/commit"),
+    get_agent_client(organization.agent_url).put(
+        "chaincodes/commit",
         json=dict(
             name=chaincode.name,
             version=chaincode.version,
             sequence=chaincode.sequence,
             channel_name=chaincode.channel.name
-        )
+        ),
+        timeout=LONG_TIMEOUT
     ).raise_for_status()
 
 
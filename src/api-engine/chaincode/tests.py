@@ -1,3 +1,135 @@
+import threading
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from chaincode.models import Chaincode, ChaincodeOrganizationStatus
+from chaincode.serializers import ChaincodeResponse
+from chaincode.service import attach_organization_statuses, get_chaincodes_status, refresh_chaincodes_status
+from channel.models import Channel
+from organization.models import Organization
+
+
+class ChaincodeStatusTestCase(TestCase):
+    def setUp(self):
+        self.organization = Organization.objects.create(
+            name="org1.example.com",
+            agent_url="http://org1-agent.example.com",
+        )
+        self.channel = Channel.objects.create(name="testchannel")
+        self.channel.organizations.add(self.organization)
+        self.chaincodes = [
+            Chaincode.objects.create(
+                package_id="basic_{}:{}".format(sequence, "a" * 64),
+                package="testchannel/basic_{}.tar.gz".format(sequence),
+                name="basic",
+                version="1.{}".format(sequence),
+                sequence=sequence,
+                label="basic_{}".format(sequence),
+                channel=self.channel,
+                language="golang",
+            ) for sequence in (1, 2)
+        ]
+
+    def agent_response(self, json):
+        response = mock.Mock()
+        response.json.return_value = json
+        return response
+
+    @mock.patch("chaincode.service.get_agent_client")
+    def test_get_chaincodes_status_sends_one_request_for_the_page(self, get_agent_client):
+        client = get_agent_client.return_value
+        client.post.return_value = self.agent_response({
+            "chaincodes": [
+                {"status": "COMMITTED", "approvals": {}},
+                {"status": "INSTALLED", "approvals": {"Org1MSP": False}},
+            ]
+        })
+
+        statuses = get_chaincodes_status(self.organization, self.chaincodes)
+
+        client.post.assert_called_once()
+        self.assertEqual(client.post.call_args.args[0], "chaincodes/status")
+        self.assertEqual(
+            [chaincode["sequence"] for chaincode in client.post.call_args.kwargs["json"]["chaincodes"]],
+            [1, 2],
+        )
+        self.assertEqual(statuses[str(self.chaincodes[0].id)]["status"], "COMMITTED")
+        self.assertEqual(statuses[str(self.chaincodes[1].id)]["approvals"], {"Org1MSP": False})
+
+    @mock.patch("chaincode.service.get_agent_client")
+    def test_get_chaincodes_status_fans_out_without_bulk_endpoint(self, get_agent_client):
+        client = get_agent_client.return_value
+        client.post.return_value = mock.Mock(status_code=405)
+        # A status and a readiness call per chaincode, all waiting for each other.
+        barrier = threading.Barrier(2 * len(self.chaincodes), timeout=5)
+
+        def get(path, params):
+            barrier.wait()
+            if path == "chaincodes/status":
+                return self.agent_response({"status": "COMMITTED"})
+            return self.agent_response({"approvals": {"Org1MSP": params["sequence"] == 1}})
+        client.get.side_effect = get
+
+        statuses = get_chaincodes_status(self.organization, self.chaincodes)
+
+        self.assertEqual(statuses, {
+            str(self.chaincodes[0].id): {"status": "COMMITTED", "approvals": {"Org1MSP": True}},
+            str(self.chaincodes[1].id): {"status": "COMMITTED", "approvals": {"Org1MSP": False}},
+        })
+
+    @mock.patch("chaincode.service.get_agent_client")
+    def test_get_chaincodes_status_skips_agent_for_empty_page(self, get_agent_client):
+        client = get_agent_client.return_value
+        self.assertEqual(get_chaincodes_status(self.organization, []), {})
+        client.get.assert_not_called()
+        client.post.assert_not_called()
+
+    @mock.patch("chaincode.service.get_agent_client")
+    def test_refresh_stores_the_statuses(self, get_agent_client):
+        client = get_agent_client.return_value
+        client.post.return_value = self.agent_response({
+            "chaincodes": [
+                {"status": "APPROVED", "approvals": {"Org1MSP": True}},
+                {"status": "CREATED"},
+            ]
+        })
+
+        refresh_chaincodes_status(self.organization, self.chaincodes)
+        refresh_chaincodes_status(self.organization, self.chaincodes)
+
+        statuses = ChaincodeOrganizationStatus.objects.order_by("chaincode__sequence")
+        self.assertEqual([status.status for status in statuses], ["APPROVED", "CREATED"])
+        self.assertEqual([status.approvals for status in statuses], [{"Org1MSP": True}, {}])
+        self.assertTrue(all(status.status_checked_at for status in statuses))
+
+    @mock.patch("chaincode.service.get_agent_client")
+    def test_each_organization_reads_its_own_status(self, get_agent_client):
+        other = Organization.objects.create(name="org2.example.com", agent_url="http://org2-agent.example.com")
+        self.channel.organizations.add(other)
+        get_agent_client.side_effect = lambda agent_url: mock.Mock(post=mock.Mock(return_value=self.agent_response({
+            "chaincodes": [
+                {"status": "APPROVED" if agent_url == self.organization.agent_url else "INSTALLED"},
+                {"status": "CREATED"},
+            ]
+        })))
+        refresh_chaincodes_status(self.organization, self.chaincodes)
+        refresh_chaincodes_status(other, self.chaincodes)
+        get_agent_client.reset_mock()
+
+        statuses = {}
+        for organization in (self.organization, other):
+            chaincodes = list(Chaincode.objects.filter(id=self.chaincodes[0].id))
+            attach_organization_statuses(organization, chaincodes)
+            statuses[organization.name] = ChaincodeResponse(chaincodes, many=True).data[0]["status"]
+
+        get_agent_client.assert_not_called()
+        self.assertEqual(statuses, {"org1.example.com": "APPROVED", "org2.example.com": "INSTALLED"})
+
+    def test_response_without_stored_status(self):
+        attach_organization_statuses(self.organization, self.chaincodes)
+
+        data = ChaincodeResponse(self.chaincodes, many=True).data
+
+        self.assertEqual([chaincode["status"] for chaincode in data], [None, None])
+        self.assertEqual([chaincode["approvals"] for chaincode in data], [None, None])
@@ -7,10 +7,12 @@ from rest_framework.response import Response
 
 from api.common.response import make_response_serializer
 from chaincode.models import Chaincode
-from chaincode.serializers import ChaincodeCommitBody, ChaincodeList, ChaincodeCreateBody, ChaincodeID, ChaincodeRequestBody, ChaincodeResponse, \
+from chaincode.serializers import ChaincodeCommitBody, ChaincodeList, ChaincodeCreateBody, ChaincodeRequestBody, ChaincodeResponse, \
     ChaincodeInstallBody, ChaincodeApproveBody
+from chaincode.service import attach_organization_statuses, refresh_chaincodes_status
 from common.responses import with_common_response, ok
-from common.serializers import PageQuerySerializer
+from common.serializers import StatusPageQuerySerializer
+from operation.serializers import OperationResponse
 
 
 # Create your views here.
@@ -30,27 +32,30 @@ class ChaincodeViewSet(viewsets.ViewSet):
 
     @swagger_auto_schema(
         operation_summary="List all chaincodes of the current organization",
-        query_serializer=PageQuerySerializer(),
+        query_serializer=StatusPageQuerySerializer(),
         responses=with_common_response(
             {status.HTTP_200_OK: make_response_serializer(ChaincodeList)}
         ),
     )
     def list(self, request):
-        serializer = PageQuerySerializer(data=request.GET)
-        p = serializer.get_paginator(
-            Chaincode.objects.filter(channel__organizations__id__contains=request.user.organization.id),
+        serializer = StatusPageQuerySerializer(data=request.GET)
+        page = serializer.get_page(
+            Chaincode.objects
+            .filter(channel__organizations=request.user.organization)
+            .select_related("channel", "creator"),
         )
+        chaincodes = page.object_list
+        # The stored statuses are kept up to date by the reconcile_status command.
+        if serializer.data["fresh"]:
+            refresh_chaincodes_status(request.user.organization, chaincodes)
+        attach_organization_statuses(request.user.organization, chaincodes)
         return Response(
             status=status.HTTP_200_OK,
             data=ok(ChaincodeList({
-                "total": p.count,
-                "data": ChaincodeResponse(
-                    p.get_page(serializer.data["page"]).object_list,
-                    many=True,
-                    context={
-                        "organization": request.user.organization,
-                    }
-                ).data}
+                "total": page.total,
+                "total_estimated": page.total_estimated,
+                "next_cursor": page.next_cursor,
+                "data": ChaincodeResponse(chaincodes, many=True).data}
             ).data),
         )
 
@@ -58,7 +63,7 @@ class ChaincodeViewSet(viewsets.ViewSet):
         operation_summary="Create (Install and Approve) a chaincode for the current organization",
         request_body=ChaincodeCreateBody(),
         responses=with_common_response(
-            {status.HTTP_201_CREATED: make_response_serializer(ChaincodeID)}
+            {status.HTTP_202_ACCEPTED: make_response_serializer(OperationResponse)}
         ),
     )
     def create(self, request):
@@ -68,14 +73,14 @@ class ChaincodeViewSet(viewsets.ViewSet):
         })
         serializer.is_valid(raise_exception=True)
         return Response(
-            status=status.HTTP_201_CREATED,
-            data=ok(serializer.save().data)
+            status=status.HTTP_202_ACCEPTED,
+            data=ok(OperationResponse(serializer.save()).data)
         )
 
     @swagger_auto_schema(
         operation_summary="Install a chaincode for the current organization",
         responses=with_common_response(
-            {status.HTTP_204_NO_CONTENT: None}
+            {status.HTTP_202_ACCEPTED: make_response_serializer(OperationResponse)}
         ),
     )
     @action(detail=True, methods=["PUT"])
@@ -84,11 +89,14 @@ class ChaincodeViewSet(viewsets.ViewSet):
             data={
                 "id": pk
             },
-            context={"organization": request.user.organization})
+            context={
+                "user": request.user,
+                "organization": request.user.organization,
+            })
         serializer.is_valid(raise_exception=True)
-        serializer.save()
         return Response(
-            status=status.HTTP_204_NO_CONTENT,
+            status=status.HTTP_202_ACCEPTED,
+            data=ok(OperationResponse(serializer.save()).data),
         )
 
     @swagger_auto_schema(
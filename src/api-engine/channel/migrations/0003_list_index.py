@@ -0,0 +1,21 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('channel', '0002_channel_invitation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='channel',
+            index=models.Index(fields=['-created_at', '-id'], name='channel_cha_created_364736_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='channelinvitation',
+            index=models.Index(fields=['creator_organization', '-created_at', '-id'], name='channel_cha_creator_36e1fd_idx'),
+        ),
+    ]
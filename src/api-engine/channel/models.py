@@ -26,6 +26,9 @@ class Channel(models.Model):
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["-created_at", "-id"]),
+        ]
 
 
 class ChannelInvitationQuerySet(models.QuerySet):
@@ -104,6 +107,9 @@ class ChannelInvitation(models.Model):
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["creator_organization", "-created_at", "-id"]),
+        ]
 
 
 class ChannelInvitationInvitee(models.Model):
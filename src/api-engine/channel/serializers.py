@@ -9,9 +9,10 @@ from channel.models import (
     ChannelInvitationInvitee,
     ChannelInvitationSignature,
 )
-from channel.service import create
 from common.serializers import ListResponseSerializer
 from node.service import organization_orderer_exists, organization_peer_exists
+from operation.models import Operation
+from operation.service import enqueue
 from organization.models import Organization
 from organization.serializers import OrganizationID
 
@@ -50,10 +51,12 @@ class ChannelCreateBody(serializers.Serializer):
             raise serializers.ValidationError("You must have at least one orderer for a channel.")
         return attrs
 
-    def create(self, validated_data: Dict[str, Any]) -> ChannelID:
-        return ChannelID(create(
+    def create(self, validated_data: Dict[str, Any]) -> Operation:
+        return enqueue(
             self.context["organization"],
-            validated_data["name"]))
+            Operation.Type.CREATE_CHANNEL,
+            dict(name=validated_data["name"]),
+            self.context.get("user"))
 
 
 class ChannelInvitationInviteeResponse(serializers.ModelSerializer):
@@ -1,4 +1,3 @@
-from django.core.paginator import Paginator
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
@@ -7,9 +6,10 @@ from rest_framework.response import Response
 from api.common import ok
 from api.common.response import make_response_serializer
 from channel.models import Channel
-from channel.serializers import ChannelList, ChannelID, ChannelResponse, ChannelCreateBody
+from channel.serializers import ChannelList, ChannelResponse, ChannelCreateBody
 from common.responses import with_common_response
 from common.serializers import PageQuerySerializer
+from operation.serializers import OperationResponse
 
 
 # Create your views here.
@@ -28,12 +28,18 @@ class ChannelViewSet(viewsets.ViewSet):
     )
     def list(self, request):
         serializer = PageQuerySerializer(data=request.GET)
-        p = serializer.get_paginator(Channel.objects.filter(organizations__id__contains=request.user.organization.id))
+        page = serializer.get_page(
+            Channel.objects
+            .filter(organizations=request.user.organization)
+            .prefetch_related("organizations"),
+        )
         return Response(
             status=status.HTTP_200_OK,
             data=ok(ChannelList({
-                "total": p.count,
-                "data": ChannelResponse(p.page(serializer.data["page"]).object_list, many=True).data,
+                "total": page.total,
+                "total_estimated": page.total_estimated,
+                "next_cursor": page.next_cursor,
+                "data": ChannelResponse(page.object_list, many=True).data,
             }).data),
         )
 
@@ -41,13 +47,16 @@ class ChannelViewSet(viewsets.ViewSet):
         operation_summary="Create a channel of the current organization",
         request_body=ChannelCreateBody(),
         responses=with_common_response(
-            {status.HTTP_201_CREATED: make_response_serializer(ChannelID)}
+            {status.HTTP_202_ACCEPTED: make_response_serializer(OperationResponse)}
         ),
     )
     def create(self, request):
-        serializer = ChannelCreateBody(data=request.data, context={"organization": request.user.organization})
+        serializer = ChannelCreateBody(data=request.data, context={
+            "user": request.user,
+            "organization": request.user.organization,
+        })
         serializer.is_valid(raise_exception=True)
         return Response(
-            status=status.HTTP_201_CREATED,
-            data=ok(serializer.save().data)
+            status=status.HTTP_202_ACCEPTED,
+            data=ok(OperationResponse(serializer.save()).data)
         )
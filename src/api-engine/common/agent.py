@@ -0,0 +1,170 @@
+"""
+HTTP client of the organization agents.
+
+There is one AgentClient per agent URL, and each one keeps a pool of
+keep-alive connections to its agent. Every call has a connect and a read
+timeout. GETs are retried with backoff on connection errors and on 502, 503
+or 504. Other requests are only retried when they never reached the agent.
+A passed health check is trusted for AGENT_HEALTH_TTL seconds instead of
+being repeated before every call. It is forgotten once a call cannot reach
+the agent.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+import requests
+from django.db import connection
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from api_engine.settings import (
+    AGENT_CONNECT_TIMEOUT,
+    AGENT_FAN_OUT_PARALLELISM,
+    AGENT_HEALTH_TTL,
+    AGENT_JOB_POLL_INTERVAL,
+    AGENT_JOB_TIMEOUT,
+    AGENT_LONG_READ_TIMEOUT,
+    AGENT_POOL_SIZE,
+    AGENT_READ_TIMEOUT,
+    AGENT_RETRIES,
+    AGENT_RETRY_BACKOFF,
+)
+from common.utils import safe_urljoin
+
+LOG = logging.getLogger(__name__)
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+# (connect, read) timeouts, the long one for calls that build chaincode,
+# start nodes or wait for a transaction to commit.
+TIMEOUT = (AGENT_CONNECT_TIMEOUT, AGENT_READ_TIMEOUT)
+LONG_TIMEOUT = (AGENT_CONNECT_TIMEOUT, AGENT_LONG_READ_TIMEOUT)
+
+
+class AgentClient:
+    def __init__(self, agent_url: str):
+        self.agent_url = agent_url
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=AGENT_POOL_SIZE,
+            max_retries=Retry(
+                total=AGENT_RETRIES,
+                backoff_factor=AGENT_RETRY_BACKOFF,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset({"GET"}),
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        self._healthy_until = 0.0
+
+    def check_health(self) -> None:
+        """Raise if the agent is not healthy, unless it was a moment ago."""
+        with self._lock:
+            if time.monotonic() < self._healthy_until:
+                return
+        self.session.get(safe_urljoin(self.agent_url, "health"), timeout=TIMEOUT).raise_for_status()
+        with self._lock:
+            self._healthy_until = time.monotonic() + AGENT_HEALTH_TTL
+
+    def forget_health(self) -> None:
+        with self._lock:
+            self._healthy_until = 0.0
+
+    def request(
+            self,
+            method: str,
+            path: str,
+            timeout: Optional[Tuple[float, float]] = None,
+            **kwargs) -> requests.Response:
+        self.check_health()
+        try:
+            return self.session.request(
+                method,
+                safe_urljoin(self.agent_url, path),
+                timeout=timeout or TIMEOUT,
+                **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            LOG.warning("%s %s of %s failed", method, path, self.agent_url)
+            self.forget_health()
+            raise
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path: str, **kwargs) -> requests.Response:
+        return self.request("PUT", path, **kwargs)
+
+
+class AgentJobError(Exception):
+    """A job of the agent failed or did not finish in time."""
+
+
+def wait_for_job(
+        client: AgentClient,
+        job_id: str,
+        on_poll: Optional[Callable[[str], None]] = None) -> Any:
+    """
+    Poll the job of the agent until it finishes and return its result.
+    on_poll is called with the status of the job while it is not finished.
+    """
+    deadline = time.monotonic() + AGENT_JOB_TIMEOUT
+    while True:
+        response = client.get("jobs/{}".format(job_id))
+        response.raise_for_status()
+        job = response.json()
+        if job["status"] == "SUCCEEDED":
+            return job["result"]
+        if job["status"] == "FAILED":
+            # The error is the traceback of the job, its last line says what went wrong.
+            lines = (job["error"] or "").strip().splitlines()
+            raise AgentJobError(lines[-1] if lines else "Agent job {} failed".format(job_id))
+        if time.monotonic() >= deadline:
+            raise AgentJobError("Agent job {} did not finish in {} seconds".format(job_id, AGENT_JOB_TIMEOUT))
+        if on_poll is not None:
+            on_poll(job["status"])
+        time.sleep(AGENT_JOB_POLL_INTERVAL)
+
+
+_clients: Dict[str, AgentClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_agent_client(agent_url: str) -> AgentClient:
+    """Return the shared client of the agent at agent_url."""
+    with _clients_lock:
+        if agent_url not in _clients:
+            _clients[agent_url] = AgentClient(agent_url)
+        return _clients[agent_url]
+
+
+def fan_out(calls: Dict[K, Callable[[], V]], parallelism: Optional[int] = None) -> Dict[K, V]:
+    """
+    Make the agent calls at the same time, up to parallelism of them, and
+    return their results by key. Raise the first error, like calling them
+    one after another would.
+    """
+    if len(calls) < 2:
+        return {key: call() for key, call in calls.items()}
+
+    def make(call: Callable[[], V]) -> V:
+        try:
+            return call()
+        finally:
+            # Calls may read related rows, do not leave the connection of the thread open.
+            connection.close()
+
+    with ThreadPoolExecutor(
+            max_workers=min(parallelism or AGENT_FAN_OUT_PARALLELISM, len(calls)),
+            thread_name_prefix="agent-fan-out") as executor:
+        futures = {key: executor.submit(make, call) for key, call in calls.items()}
+        return {key: future.result() for key, future in futures.items()}
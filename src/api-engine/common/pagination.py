@@ -1,6 +1,26 @@
+"""
+Keyset pagination of the lists, newest first.
+
+Pages are ordered by (created_at, id) and a page given by a cursor starts
+right after the row the cursor names. It is read from the index of the
+list, however deep it is, instead of counting and skipping every row
+before it like OFFSET does. The total can be exact, estimated by the
+query planner, or left out.
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from django.db import connections
+from django.db.models import Model, Q, QuerySet
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
+ORDERING = ("-created_at", "-id")
+
 
 class TotalDataPagination(PageNumberPagination):
     page_size = 10
@@ -12,3 +32,75 @@ class TotalDataPagination(PageNumberPagination):
             "total": self.page.paginator.count,
             "data": data
         })
+
+
+@dataclass(frozen=True)
+class KeysetPage:
+    object_list: List[Any]
+    total: Optional[int]
+    next_cursor: Optional[str]
+    # Whether total is the query planner's estimate rather than a count.
+    total_estimated: bool = False
+
+
+def encode_cursor(instance: Model) -> str:
+    return base64.urlsafe_b64encode(
+        json.dumps([instance.created_at.isoformat(), str(instance.pk)]).encode()
+    ).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Return the created_at and id a cursor names, or raise ValueError."""
+    try:
+        created_at, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), str(pk)
+    except (binascii.Error, TypeError, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def estimate_count(q: QuerySet) -> Optional[int]:
+    """Return the number of rows the query planner expects, or None where there is no planner to ask."""
+    connection = connections[q.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = q.order_by().values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def paginate(
+        q: QuerySet,
+        per_page: int,
+        page: int = 1,
+        cursor: Optional[str] = None,
+        count: str = "exact") -> KeysetPage:
+    """
+    Return the page after cursor, or the page numbered page without one,
+    along with the cursor of the next page and the total as asked by count.
+    """
+    rows = q.order_by(*ORDERING)
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        # The OR alone cannot bound an index scan, the redundant created_at__lte
+        # lets PostgreSQL start the scan on the (..., -created_at, -id) indexes
+        # at the cursor instead of at the newest row.
+        rows = rows.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk),
+            created_at__lte=created_at)
+    else:
+        rows = rows[(page - 1) * per_page:]
+    # One more row than the page tells whether there is a next one.
+    object_list = list(rows[:per_page + 1])
+    next_cursor = encode_cursor(object_list[per_page - 1]) if len(object_list) > per_page else None
+    total = None
+    total_estimated = False
+    if count == "estimate":
+        total = estimate_count(q)
+        total_estimated = total is not None
+    if count == "exact" or (count == "estimate" and total is None):
+        total = q.count()
+    return KeysetPage(object_list[:per_page], total, next_cursor, total_estimated)
@@ -1,7 +1,8 @@
-from django.core.paginator import Paginator
 from django.db.models import QuerySet
 from rest_framework import serializers
 
+from common.pagination import KeysetPage, decode_cursor, paginate
+
 
 class PageQuerySerializer(serializers.Serializer):
     page = serializers.IntegerField(
@@ -10,13 +11,49 @@ class PageQuerySerializer(serializers.Serializer):
     per_page = serializers.IntegerField(
         default=10, help_text="Per Page of filter", min_value=1, max_value=100
     )
+    cursor = serializers.CharField(
+        required=False,
+        help_text="next_cursor of the previous page, instead of page, to read deep pages quickly",
+    )
+    count = serializers.ChoiceField(
+        choices=["exact", "estimate", "none"],
+        default="exact",
+        help_text="Whether the total is counted exactly, estimated or left out",
+    )
 
-    def get_paginator(self, q: QuerySet) -> Paginator:
+    @staticmethod
+    def validate_cursor(value: str) -> str:
+        try:
+            decode_cursor(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+        return value
+
+    def get_page(self, q: QuerySet) -> KeysetPage:
         self.is_valid(raise_exception=True)
-        return Paginator(q, self.data['per_page'])
+        return paginate(
+            q,
+            self.data["per_page"],
+            page=self.data["page"],
+            cursor=self.data.get("cursor"),
+            count=self.data["count"],
+        )
+
+
+class StatusPageQuerySerializer(PageQuerySerializer):
+    fresh = serializers.BooleanField(
+        default=False,
+        help_text="Check the status with the agent instead of reading the last stored one",
+    )
 
 
 class ListResponseSerializer(serializers.Serializer):
     total = serializers.IntegerField(
-        help_text="Total number of data", min_value=0
+        help_text="Total number of data, unless count is none", min_value=0, allow_null=True
+    )
+    total_estimated = serializers.BooleanField(
+        help_text="Whether total is an estimate of the query planner", default=False
+    )
+    next_cursor = serializers.CharField(
+        help_text="Cursor of the next page, if there is one", allow_null=True, required=False
     )
@@ -3,6 +3,13 @@
 holdup -t 120 tcp://${DB_HOST:-localhost}:${DB_PORT:-5432}
 python manage.py migrate
 python manage.py collectstatic --noinput
+# Keep the stored node and chaincode statuses fresh, unless disabled with 0.
+STATUS_RECONCILE_INTERVAL="${STATUS_RECONCILE_INTERVAL:-30}"
+if [[ "${STATUS_RECONCILE_INTERVAL}" != "0" ]]; then
+  python manage.py reconcile_status --interval "${STATUS_RECONCILE_INTERVAL}" &
+fi
+# Nodes, channels and chaincodes are created by this worker, not the requests.
+python manage.py run_operations &
 DEBUG="${DEBUG:-True}"
 if [[ "${DEBUG,,}" == "true" ]]; then # For dev, use pure Django directly
   python manage.py runserver 0.0.0.0:8080
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('node', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='node',
+            name='status',
+            field=models.CharField(blank=True, help_text='Node Status', max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='node',
+            name='status_checked_at',
+            field=models.DateTimeField(blank=True, help_text='When the Node Status was last checked with the agent', null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('node', '0002_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='node',
+            index=models.Index(fields=['organization', '-created_at', '-id'], name='node_node_organiz_686d5a_idx'),
+        ),
+    ]
@@ -42,6 +42,21 @@ class Node(models.Model):
     created_at = models.DateTimeField(
         help_text="Node Creation Timestamp", auto_now_add=True
     )
+    # The container status the agent last reported, e.g. running or exited.
+    status = models.CharField(
+        help_text="Node Status",
+        max_length=64,
+        null=True,
+        blank=True,
+    )
+    status_checked_at = models.DateTimeField(
+        help_text="When the Node Status was last checked with the agent",
+        null=True,
+        blank=True,
+    )
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["organization", "-created_at", "-id"]),
+        ]
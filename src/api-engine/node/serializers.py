@@ -2,10 +2,10 @@ from typing import Dict, Any
 
 from rest_framework import serializers
 
-from api.common.serializers import ListResponseSerializer
-from node import service
+from common.serializers import ListResponseSerializer
 from node.models import Node
-from node.service import get_node_status
+from operation.models import Operation
+from operation.service import enqueue
 
 
 class NodeID(serializers.Serializer):
@@ -13,8 +13,6 @@ class NodeID(serializers.Serializer):
 
 
 class NodeResponse(NodeID, serializers.ModelSerializer):
-    status = serializers.SerializerMethodField()
-
     class Meta:
         model = Node
         fields = (
@@ -22,18 +20,33 @@ class NodeResponse(NodeID, serializers.ModelSerializer):
             "type",
             "name",
             "status",
+            "status_checked_at",
             "created_at",
         )
 
-    def get_status(self, node):
-        organization = self.context.get("organization")
-        return get_node_status(organization, node) if organization else node.get("status")
-
 
 class NodeList(ListResponseSerializer):
     data = NodeResponse(many=True, help_text="Node list")
 
 
+class NodeOperationsSummary(serializers.Serializer):
+    type = serializers.CharField(help_text="Node type")
+    name = serializers.CharField(help_text="Node name")
+    healthy = serializers.BooleanField(help_text="Whether the node health checks passed", allow_null=True)
+    failed_checks = serializers.ListField(child=serializers.CharField(), help_text="Failed health checks")
+    error = serializers.CharField(help_text="Why the node could not be scraped", allow_null=True)
+    scraped_at = serializers.DateTimeField(help_text="When the node was last scraped")
+    block_heights = serializers.DictField(child=serializers.IntegerField(), help_text="Block height per channel")
+    window = serializers.FloatField(help_text="Seconds covered by the rates and averages", allow_null=True)
+    endorsement_latency = serializers.FloatField(help_text="Average endorsement duration in seconds", allow_null=True)
+    broadcast_rate = serializers.FloatField(help_text="Broadcasts processed per second", allow_null=True)
+    commit_time = serializers.FloatField(help_text="Average block commit duration in seconds", allow_null=True)
+
+
+class NodeOperationsList(serializers.Serializer):
+    data = NodeOperationsSummary(many=True, help_text="Node operations summaries")
+
+
 class NodeCreateBody(serializers.ModelSerializer):
     class Meta:
         model = Node
@@ -51,5 +64,26 @@ class NodeCreateBody(serializers.ModelSerializer):
             raise serializers.ValidationError("Node Exists")
         return data
 
-    def create(self, validated_data: Dict[str, Any]) -> Node:
-        return service.create(self.context["organization"], validated_data["type"], validated_data["name"])
+    def create(self, validated_data: Dict[str, Any]) -> Operation:
+        return enqueue(
+            self.context["organization"],
+            Operation.Type.CREATE_NODE,
+            dict(type=validated_data["type"], name=validated_data["name"]),
+            self.context.get("user"))
+
+
+class NodeBatchCreateBody(serializers.Serializer):
+    nodes = NodeCreateBody(many=True, allow_empty=False, help_text="Nodes to create")
+
+    def validate_nodes(self, nodes):
+        names = [node["name"] for node in nodes]
+        if len(set(names)) != len(names):
+            raise serializers.ValidationError("Node names must not repeat")
+        return nodes
+
+    def create(self, validated_data: Dict[str, Any]) -> Operation:
+        return enqueue(
+            self.context["organization"],
+            Operation.Type.CREATE_NODES,
+            dict(nodes=[dict(type=node["type"], name=node["name"]) for node in validated_data["nodes"]]),
+            self.context.get("user"))
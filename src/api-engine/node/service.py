@@ -2,17 +2,18 @@ import base64
 import logging
 import os
 import sys
+from functools import partial
 from typing import Optional, Dict, Any, List
-from common.utils import safe_urljoin
 from zipfile import ZipFile
 
 import docker
-import requests
 import yaml
+from django.utils import timezone
 from docker.errors import DockerException
 
 from api.lib.pki import CryptoConfig, CryptoGen
 from api_engine.settings import CELLO_HOME, FABRIC_PEER_CFG, FABRIC_ORDERER_CFG, FABRIC_VERSION
+from common.agent import LONG_TIMEOUT, fan_out, get_agent_client
 from node.models import Node
 from organization.models import Organization
 
@@ -25,13 +26,58 @@ def get_node(node_id: str) -> Optional[Node]:
 
 
 def get_node_status(organization: Organization, node: Node) -> str:
-    agent_url = organization.agent_url
-    requests.get(safe_urljoin(agent_url, "health")).raise_for_status()
-    return requests.get(
-        safe_urljoin(agent_url, "nodes/status"),
+    return get_agent_client(organization.agent_url).get(
+        "nodes/status",
         params=dict(type=node.type, name=node.name)).json()["status"]
 
 
+def get_nodes_status(organization: Organization, nodes: List[Node]) -> Dict[str, str]:
+    """
+    Return the status of each node by id, with one agent call for the page.
+    The nodes the agent does not list, and every node of an agent without
+    the bulk endpoint, are asked for at the same time.
+    """
+    if not nodes:
+        return {}
+    response = get_agent_client(organization.agent_url).post("nodes/status", json=dict(detail=False))
+    if response.status_code in (404, 405):
+        statuses = {}
+    else:
+        response.raise_for_status()
+        statuses = {
+            (node_status["type"], node_status["name"]): node_status["status"]
+            for node_status in response.json()["nodes"]
+        }
+    # Containers created before the agent labelled them are not listed.
+    unlisted = fan_out({
+        str(node.id): partial(get_node_status, organization, node)
+        for node in nodes
+        if (node.type, node.name) not in statuses
+    })
+    return {
+        str(node.id): statuses[(node.type, node.name)]
+        if (node.type, node.name) in statuses
+        else unlisted[str(node.id)]
+        for node in nodes
+    }
+
+
+def refresh_nodes_status(organization: Organization, nodes: List[Node]) -> None:
+    """Check the status of the nodes with the agent and store it."""
+    statuses = get_nodes_status(organization, nodes)
+    checked_at = timezone.now()
+    for node in nodes:
+        node.status = statuses[str(node.id)]
+        node.status_checked_at = checked_at
+    Node.objects.bulk_update(nodes, ["status", "status_checked_at"])
+
+
+def get_nodes_operations(organization: Organization) -> List[Dict[str, Any]]:
+    response = get_agent_client(organization.agent_url).get("nodes/operations")
+    response.raise_for_status()
+    return response.json()["nodes"]
+
+
 def organization_peer_exists(organization: Organization) -> bool:
     return Node.objects.filter(organization=organization, type=Node.Type.PEER).exists()
 
@@ -41,9 +87,10 @@ def organization_orderer_exists(organization: Organization) -> bool:
 
 
 def create(organization: Organization, node_type: Node.Type, node_name: str) -> Node:
-    agent_url = organization.agent_url
-    requests.get(safe_urljoin(agent_url, "health")).raise_for_status()
-    response = requests.post(safe_urljoin(agent_url, "nodes"), json=dict(type=node_type, name=node_name))
+    response = get_agent_client(organization.agent_url).post(
+        "nodes",
+        json=dict(type=node_type, name=node_name),
+        timeout=LONG_TIMEOUT)
     response.raise_for_status()
 
     node = Node(
@@ -56,6 +103,40 @@ def create(organization: Organization, node_type: Node.Type, node_name: str) ->
     return node
 
 
+def create_batch(organization: Organization, nodes: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Create several nodes with one agent request. The agent generates their
+    crypto material at once, so only the nodes it failed to start are
+    returned with an error instead of an id.
+    """
+    response = get_agent_client(organization.agent_url).post(
+        "nodes/batch",
+        json=dict(nodes=[dict(type=node["type"], name=node["name"]) for node in nodes]),
+        timeout=LONG_TIMEOUT)
+    response.raise_for_status()
+
+    results = response.json()["nodes"]
+    created = Node.objects.bulk_create([
+        Node(
+            name=result["name"],
+            type=result["type"],
+            tls=result["tls"],
+            organization=organization,
+        )
+        for result in results if result["error"] is None
+    ])
+    ids = {(node.type, node.name): node.id for node in created}
+    return [
+        dict(
+            id=ids.get((result["type"], result["name"])),
+            type=result["type"],
+            name=result["name"],
+            error=result["error"],
+        )
+        for result in results
+    ]
+
+
 def get_domain_name(organization_name: str, node_type: Node.Type, node_name: str) -> str:
     return "{}.{}".format(
         node_name,
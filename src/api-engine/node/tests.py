@@ -1,3 +1,193 @@
+import threading
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from node.models import Node
+from node.serializers import NodeBatchCreateBody, NodeOperationsList, NodeResponse
+from node.service import get_nodes_operations, get_nodes_status, refresh_nodes_status
+from operation.models import Operation
+from operation.service import run_pending
+from organization.models import Organization
+
+
+class NodeStatusTestCase(TestCase):
+    def setUp(self):
+        self.organization = Organization.objects.create(
+            name="org1.example.com",
+            agent_url="http://org1-agent.example.com",
+        )
+        self.nodes = [
+            Node.objects.create(name=name, type=node_type, tls="", organization=self.organization)
+            for name, node_type in (("peer0", Node.Type.PEER), ("orderer0", Node.Type.ORDERER))
+        ]
+
+    def agent_response(self, json):
+        response = mock.Mock()
+        response.json.return_value = json
+        return response
+
+    @mock.patch("node.service.get_agent_client")
+    def test_get_nodes_status_sends_one_request_for_the_page(self, get_agent_client):
+        client = get_agent_client.return_value
+        client.post.return_value = self.agent_response({
+            "nodes": [
+                {"type": "ORDERER", "name": "orderer0", "status": "exited"},
+                {"type": "PEER", "name": "peer0", "status": "running"},
+                {"type": "PEER", "name": "peer1", "status": "running"},
+            ]
+        })
+
+        statuses = get_nodes_status(self.organization, self.nodes)
+
+        get_agent_client.assert_called_with("http://org1-agent.example.com")
+        client.post.assert_called_once()
+        self.assertEqual(client.post.call_args.args[0], "nodes/status")
+        self.assertEqual(statuses, {
+            str(self.nodes[0].id): "running",
+            str(self.nodes[1].id): "exited",
+        })
+
+    @mock.patch("node.service.get_agent_client")
+    def test_get_nodes_status_asks_for_unlisted_nodes_one_by_one(self, get_agent_client):
+        client = get_agent_client.return_value
+        client.post.return_value = self.agent_response({
+            "nodes": [{"type": "PEER", "name": "peer0", "status": "running"}]
+        })
+        client.get.return_value = self.agent_response({"status": "created"})
+
+        statuses = get_nodes_status(self.organization, self.nodes)
+
+        self.assertEqual(statuses[str(self.nodes[1].id)], "created")
+        self.assertEqual(
+            client.get.call_args.kwargs["params"],
+            dict(type=Node.Type.ORDERER, name="orderer0"))
+
+    @mock.patch("node.service.get_agent_client")
+    def test_get_nodes_status_asks_for_every_node_at_once_without_bulk_endpoint(self, get_agent_client):
+        client = get_agent_client.return_value
+        client.post.return_value = mock.Mock(status_code=404)
+        # Each call waits for the other one, so calls made one after another would time out.
+        barrier = threading.Barrier(len(self.nodes), timeout=5)
+
+        def get(path, params):
+            barrier.wait()
+            return self.agent_response({"status": "running" if params["type"] == Node.Type.PEER else "exited"})
+        client.get.side_effect = get
+
+        statuses = get_nodes_status(self.organization, self.nodes)
+
+        self.assertEqual(statuses, {
+            str(self.nodes[0].id): "running",
+            str(self.nodes[1].id): "exited",
+        })
+
+    @mock.patch("node.service.get_agent_client")
+    def test_get_nodes_status_skips_agent_for_empty_page(self, get_agent_client):
+        client = get_agent_client.return_value
+        self.assertEqual(get_nodes_status(self.organization, []), {})
+        client.get.assert_not_called()
+        client.post.assert_not_called()
+
+    @mock.patch("node.service.get_agent_client")
+    def test_refresh_stores_the_statuses(self, get_agent_client):
+        client = get_agent_client.return_value
+        client.post.return_value = self.agent_response({
+            "nodes": [
+                {"type": "ORDERER", "name": "orderer0", "status": "exited"},
+                {"type": "PEER", "name": "peer0", "status": "running"},
+            ]
+        })
+
+        refresh_nodes_status(self.organization, self.nodes)
+
+        nodes = Node.objects.filter(id__in=[node.id for node in self.nodes]).order_by("name")
+        self.assertEqual([node.status for node in nodes], ["exited", "running"])
+        self.assertTrue(all(node.status_checked_at for node in nodes))
+
+    @mock.patch("node.service.get_agent_client")
+    def test_response_reads_stored_statuses(self, get_agent_client):
+        self.nodes[0].status = "running"
+        self.nodes[0].save()
+
+        data = NodeResponse(self.nodes, many=True).data
+
+        get_agent_client.assert_not_called()
+        self.assertEqual([node["status"] for node in data], ["running", None])
+
+
+class NodeOperationsTestCase(TestCase):
+    @mock.patch("node.service.get_agent_client")
+    def test_operations_summaries_come_from_the_agent(self, get_agent_client):
+        client = get_agent_client.return_value
+        organization = Organization.objects.create(
+            name="org1.example.com",
+            agent_url="http://org1-agent.example.com",
+        )
+        summary = {
+            "type": "PEER",
+            "name": "peer0",
+            "healthy": True,
+            "failed_checks": [],
+            "error": None,
+            "scraped_at": "2025-01-01T00:00:00Z",
+            "block_heights": {"mychannel": 8},
+            "window": 10.0,
+            "endorsement_latency": 0.2,
+            "broadcast_rate": None,
+            "commit_time": 0.01,
+        }
+        client.get.return_value.json.return_value = {"nodes": [summary]}
+
+        nodes = get_nodes_operations(organization)
+
+        self.assertEqual(client.get.call_args.args[0], "nodes/operations")
+        self.assertEqual(NodeOperationsList(dict(data=nodes)).data["data"], [summary])
+
+
+class NodeBatchTestCase(TestCase):
+    def setUp(self):
+        self.organization = Organization.objects.create(
+            name="org1.example.com",
+            agent_url="http://org1-agent.example.com",
+        )
+
+    @mock.patch("node.service.get_agent_client")
+    def test_batch_is_created_with_one_agent_request(self, get_agent_client):
+        client = get_agent_client.return_value
+        client.post.return_value.json.return_value = {"nodes": [
+            {"type": "PEER", "name": "peer0", "tls": "tls0", "duration": 1.0, "error": None},
+            {"type": "PEER", "name": "peer1", "tls": None, "duration": 1.0, "error": "name already in use"},
+            {"type": "ORDERER", "name": "orderer0", "tls": "tls2", "duration": 1.0, "error": None},
+        ]}
+        serializer = NodeBatchCreateBody(
+            data={"nodes": [
+                {"type": "PEER", "name": "peer0"},
+                {"type": "PEER", "name": "peer1"},
+                {"type": "ORDERER", "name": "orderer0"},
+            ]},
+            context={"organization": self.organization})
+        serializer.is_valid(raise_exception=True)
+
+        operation = serializer.save()
+        client.post.assert_not_called()
+        run_pending()
+        operation.refresh_from_db()
+        results = operation.result
+
+        self.assertEqual(operation.status, Operation.Status.SUCCEEDED)
+        client.post.assert_called_once()
+        self.assertEqual(client.post.call_args.args[0], "nodes/batch")
+        self.assertEqual(
+            sorted(Node.objects.filter(organization=self.organization).values_list("name", "tls")),
+            [("orderer0", "tls2"), ("peer0", "tls0")])
+        self.assertEqual([(result["name"], result["error"]) for result in results], [
+            ("peer0", None), ("peer1", "name already in use"), ("orderer0", None)])
+        self.assertIsNone(results[1]["id"])
+        self.assertEqual(results[0]["id"], str(Node.objects.get(name="peer0").id))
+
+    def test_repeated_names_are_rejected(self):
+        serializer = NodeBatchCreateBody(
+            data={"nodes": [{"type": "PEER", "name": "peer0"}, {"type": "PEER", "name": "peer0"}]},
+            context={"organization": self.organization})
+        self.assertFalse(serializer.is_valid())
@@ -1,14 +1,17 @@
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from api.common import ok
 from api.common.response import make_response_serializer
 from api.utils.common import with_common_response
-from common.serializers import PageQuerySerializer
+from common.serializers import StatusPageQuerySerializer
 from node.models import Node
-from node.serializers import NodeList, NodeCreateBody, NodeID, NodeResponse
+from node.serializers import NodeList, NodeCreateBody, NodeResponse, NodeOperationsList, NodeBatchCreateBody
+from node.service import get_nodes_operations, refresh_nodes_status
+from operation.serializers import OperationResponse
 
 
 class NodeViewSet(viewsets.ViewSet):
@@ -18,23 +21,26 @@ class NodeViewSet(viewsets.ViewSet):
 
     @swagger_auto_schema(
         operation_summary="List all nodes of the current organization",
-        query_serializer=PageQuerySerializer(),
+        query_serializer=StatusPageQuerySerializer(),
         responses=with_common_response(
             {status.HTTP_200_OK: make_response_serializer(NodeList)}
         ),
     )
     def list(self, request):
-        serializer = PageQuerySerializer(data=request.GET)
-        p = serializer.get_paginator(Node.objects.filter(organization=request.user.organization))
+        serializer = StatusPageQuerySerializer(data=request.GET)
+        page = serializer.get_page(Node.objects.filter(organization=request.user.organization))
+        nodes = page.object_list
+        # The stored statuses are kept up to date by the reconcile_status command.
+        if serializer.data["fresh"]:
+            refresh_nodes_status(request.user.organization, nodes)
         return Response(
             status=status.HTTP_200_OK,
             data=ok(NodeList(
                 {
-                    "total": p.count,
-                    "data": NodeResponse(
-                        p.page(serializer.data['page']).object_list,
-                        context={"organization": request.user.organization},
-                        many=True).data
+                    "total": page.total,
+                    "total_estimated": page.total_estimated,
+                    "next_cursor": page.next_cursor,
+                    "data": NodeResponse(nodes, many=True).data
                 },
             ).data),
         )
@@ -43,13 +49,48 @@ class NodeViewSet(viewsets.ViewSet):
         operation_summary="Create a new node of the current organization",
         request_body=NodeCreateBody,
         responses=with_common_response(
-            {status.HTTP_201_CREATED: make_response_serializer(NodeID)}
+            {status.HTTP_202_ACCEPTED: make_response_serializer(OperationResponse)}
         ),
     )
     def create(self, request):
-        serializer = NodeCreateBody(data=request.data, context={"organization": request.user.organization})
+        serializer = NodeCreateBody(data=request.data, context={
+            "user": request.user,
+            "organization": request.user.organization,
+        })
         serializer.is_valid(raise_exception=True)
         return Response(
-            status=status.HTTP_201_CREATED,
-            data=ok(NodeID(serializer.save().__dict__).data),
+            status=status.HTTP_202_ACCEPTED,
+            data=ok(OperationResponse(serializer.save()).data),
+        )
+
+    @swagger_auto_schema(
+        operation_summary="Throughput and health of the running nodes of the current organization",
+        responses=with_common_response(
+            {status.HTTP_200_OK: make_response_serializer(NodeOperationsList)}
+        ),
+    )
+    @action(detail=False, methods=["get"])
+    def operations(self, request):
+        return Response(
+            status=status.HTTP_200_OK,
+            data=ok(NodeOperationsList(dict(data=get_nodes_operations(request.user.organization))).data),
+        )
+
+    @swagger_auto_schema(
+        operation_summary="Create several nodes of the current organization at once",
+        request_body=NodeBatchCreateBody,
+        responses=with_common_response(
+            {status.HTTP_202_ACCEPTED: make_response_serializer(OperationResponse)}
+        ),
+    )
+    @action(detail=False, methods=["post"])
+    def batch(self, request):
+        serializer = NodeBatchCreateBody(data=request.data, context={
+            "user": request.user,
+            "organization": request.user.organization,
+        })
+        serializer.is_valid(raise_exception=True)
+        return Response(
+            status=status.HTTP_202_ACCEPTED,
+            data=ok(OperationResponse(serializer.save()).data),
         )
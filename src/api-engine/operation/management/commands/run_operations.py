@@ -0,0 +1,59 @@
+import logging
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from api_engine.settings import OPERATION_POLL_INTERVAL, OPERATION_WORKERS
+from operation.service import fail_abandoned, run_pending
+
+LOG = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the pending node, channel and chaincode operations. Several "
+        "of these commands can run at once against the same database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=OPERATION_WORKERS,
+            help="How many operations to run at the same time")
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no operation is pending instead of waiting for more")
+
+    def handle(self, *args, **options):
+        fail_abandoned()
+        workers = [
+            threading.Thread(target=self.work, args=(options["once"],), name="operation-worker-{}".format(i))
+            for i in range(options["workers"])
+        ]
+        for worker in workers:
+            worker.start()
+        while any(worker.is_alive() for worker in workers):
+            time.sleep(OPERATION_POLL_INTERVAL)
+            fail_abandoned()
+        connection.close()
+
+    @staticmethod
+    def work(once: bool):
+        try:
+            while True:
+                try:
+                    if run_pending():
+                        continue
+                except Exception:
+                    # The database may be restarting, try again after a while.
+                    LOG.exception("Failed to claim an operation")
+                    close_old_connections()
+                if once:
+                    return
+                time.sleep(OPERATION_POLL_INTERVAL)
+        finally:
+            connection.close()
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:48
+
+import common.utils
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('organization', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Operation',
+            fields=[
+                ('id', models.UUIDField(default=common.utils.make_uuid, help_text='Operation ID', primary_key=True, serialize=False)),
+                ('type', models.CharField(choices=[('CREATE_NODE', 'Create Node'), ('CREATE_CHANNEL', 'Create Channel'), ('CREATE_CHAINCODE', 'Create Chaincode')], help_text='Operation Type', max_length=64)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('SUCCEEDED', 'Succeeded'), ('FAILED', 'Failed')], default='PENDING', help_text='Operation Status', max_length=64)),
+                ('parameters', models.JSONField(default=dict, help_text='Operation Parameters')),
+                ('progress', models.PositiveSmallIntegerField(default=0, help_text='Operation Progress in Percent')),
+                ('step', models.CharField(blank=True, help_text='What the Operation is doing', max_length=128, null=True)),
+                ('resource_id', models.UUIDField(blank=True, help_text='ID of what the Operation created', null=True)),
+                ('error', models.TextField(blank=True, help_text='Why the Operation failed', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Operation Creation Timestamp')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Operation Update Timestamp')),
+                ('finished_at', models.DateTimeField(blank=True, help_text='Operation Finish Timestamp', null=True)),
+                ('creator', models.ForeignKey(help_text='Operation Creator', null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('organization', models.ForeignKey(help_text='Organization Operations', on_delete=django.db.models.deletion.CASCADE, related_name='operations', to='organization.organization')),
+            ],
+            options={
+                'ordering': ('-created_at',),
+                'indexes': [models.Index(fields=['status', 'created_at'], name='operation_o_status_260022_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operation', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='operation',
+            index=models.Index(fields=['organization', '-created_at', '-id'], name='operation_o_organiz_0b39ff_idx'),
+        ),
+    ]
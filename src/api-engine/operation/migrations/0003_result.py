@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-18 04:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operation', '0002_list_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='operation',
+            name='result',
+            field=models.JSONField(blank=True, help_text='Operation Result', null=True),
+        ),
+        migrations.AlterField(
+            model_name='operation',
+            name='type',
+            field=models.CharField(choices=[('CREATE_NODE', 'Create Node'), ('CREATE_NODES', 'Create Nodes'), ('CREATE_CHANNEL', 'Create Channel'), ('CREATE_CHAINCODE', 'Create Chaincode')], help_text='Operation Type', max_length=64),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 04:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operation', '0003_result'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='operation',
+            name='type',
+            field=models.CharField(choices=[('CREATE_NODE', 'Create Node'), ('CREATE_NODES', 'Create Nodes'), ('CREATE_CHANNEL', 'Create Channel'), ('CREATE_CHAINCODE', 'Create Chaincode'), ('INSTALL_CHAINCODE', 'Install Chaincode')], help_text='Operation Type', max_length=64),
+        ),
+    ]
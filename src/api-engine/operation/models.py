@@ -0,0 +1,104 @@
+from django.db import models
+
+from common.utils import make_uuid
+from organization.models import Organization
+from user.models import UserProfile
+
+
+# Create your models here.
+
+class Operation(models.Model):
+    class Type(models.TextChoices):
+        CREATE_NODE = "CREATE_NODE", "Create Node"
+        CREATE_NODES = "CREATE_NODES", "Create Nodes"
+        CREATE_CHANNEL = "CREATE_CHANNEL", "Create Channel"
+        CREATE_CHAINCODE = "CREATE_CHAINCODE", "Create Chaincode"
+        INSTALL_CHAINCODE = "INSTALL_CHAINCODE", "Install Chaincode"
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        RUNNING = "RUNNING", "Running"
+        SUCCEEDED = "SUCCEEDED", "Succeeded"
+        FAILED = "FAILED", "Failed"
+
+    id = models.UUIDField(
+        primary_key=True,
+        help_text="Operation ID",
+        default=make_uuid,
+    )
+    type = models.CharField(
+        help_text="Operation Type",
+        choices=Type.choices,
+        max_length=64,
+    )
+    status = models.CharField(
+        help_text="Operation Status",
+        choices=Status.choices,
+        max_length=64,
+        default=Status.PENDING,
+    )
+    organization = models.ForeignKey(
+        Organization,
+        help_text="Organization Operations",
+        related_name="operations",
+        on_delete=models.CASCADE,
+    )
+    creator = models.ForeignKey(
+        UserProfile,
+        help_text="Operation Creator",
+        on_delete=models.SET_NULL,
+        null=True,
+    )
+    # What the operation was asked to do, as validated by the request.
+    parameters = models.JSONField(
+        help_text="Operation Parameters",
+        default=dict,
+    )
+    progress = models.PositiveSmallIntegerField(
+        help_text="Operation Progress in Percent",
+        default=0,
+    )
+    step = models.CharField(
+        help_text="What the Operation is doing",
+        max_length=128,
+        null=True,
+        blank=True,
+    )
+    resource_id = models.UUIDField(
+        help_text="ID of what the Operation created",
+        null=True,
+        blank=True,
+    )
+    # What an operation that creates several things returned about each one.
+    result = models.JSONField(
+        help_text="Operation Result",
+        null=True,
+        blank=True,
+    )
+    error = models.TextField(
+        help_text="Why the Operation failed",
+        null=True,
+        blank=True,
+    )
+    created_at = models.DateTimeField(
+        help_text="Operation Creation Timestamp",
+        auto_now_add=True,
+    )
+    updated_at = models.DateTimeField(
+        help_text="Operation Update Timestamp",
+        auto_now=True,
+    )
+    finished_at = models.DateTimeField(
+        help_text="Operation Finish Timestamp",
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        ordering = ("-created_at",)
+        indexes = [
+            # Workers claim the oldest pending operation.
+            models.Index(fields=["status", "created_at"]),
+            # The list pages of an organization.
+            models.Index(fields=["organization", "-created_at", "-id"]),
+        ]
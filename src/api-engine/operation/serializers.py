@@ -0,0 +1,26 @@
+from rest_framework import serializers
+
+from common.serializers import ListResponseSerializer
+from operation.models import Operation
+
+
+class OperationResponse(serializers.ModelSerializer):
+    class Meta:
+        model = Operation
+        fields = (
+            "id",
+            "type",
+            "status",
+            "progress",
+            "step",
+            "resource_id",
+            "result",
+            "error",
+            "created_at",
+            "updated_at",
+            "finished_at",
+        )
+
+
+class OperationList(ListResponseSerializer):
+    data = OperationResponse(many=True, help_text="Operation list")
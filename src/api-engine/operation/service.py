@@ -0,0 +1,223 @@
+"""
+Agent calls that take too long for a request.
+
+Creating a node, a channel or a chaincode stores a pending Operation and
+answers 202 with it instead of waiting for the agent. The run_operations
+command claims pending operations with SELECT ... FOR UPDATE SKIP LOCKED, so
+any number of workers share the table without a broker and without running
+an operation twice, and records their progress and what they created.
+While an operation runs, a heartbeat thread keeps its updated_at recent, so
+fail_abandoned only fails operations whose worker stopped, however long the
+agent call takes.
+"""
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterator, Optional
+from uuid import UUID
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from api_engine.settings import OPERATION_ABANDONED_AFTER, OPERATION_HEARTBEAT_INTERVAL
+from chaincode.models import Chaincode
+from chaincode.service import create_chaincode, install_chaincode
+from channel import service as channel_service
+from channel.models import Channel
+from common.utils import make_uuid
+from node import service as node_service
+from operation.models import Operation
+from organization.models import Organization
+from user.models import UserProfile
+
+LOG = logging.getLogger(__name__)
+
+
+def enqueue(
+        organization: Organization,
+        operation_type: Operation.Type,
+        parameters: Dict[str, Any],
+        creator: Optional[UserProfile] = None) -> Operation:
+    return Operation.objects.create(
+        type=operation_type,
+        organization=organization,
+        creator=creator,
+        parameters=parameters,
+    )
+
+
+def stage_file(file) -> str:
+    """Store an uploaded file until the operation that needs it runs, and return its path."""
+    return default_storage.save(os.path.join("operations", make_uuid(), file.name), file)
+
+
+def set_progress(operation: Operation, progress: int, step: str) -> None:
+    operation.progress = progress
+    operation.step = step
+    operation.save(update_fields=["progress", "step", "updated_at"])
+
+
+def claim() -> Optional[Operation]:
+    """Mark the oldest pending operation as running and return it, skipping those other workers are claiming."""
+    with transaction.atomic():
+        operation = (
+            Operation.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=Operation.Status.PENDING)
+            .order_by("created_at")
+            .first())
+        if operation is None:
+            return None
+        operation.status = Operation.Status.RUNNING
+        operation.save(update_fields=["status", "updated_at"])
+    return operation
+
+
+@contextmanager
+def heartbeat(operation: Operation) -> Iterator[None]:
+    """Mark the running operation alive every OPERATION_HEARTBEAT_INTERVAL seconds until the block ends."""
+    stopped = threading.Event()
+
+    def beat():
+        try:
+            while not stopped.wait(OPERATION_HEARTBEAT_INTERVAL):
+                try:
+                    Operation.objects.filter(id=operation.id, status=Operation.Status.RUNNING).update(
+                        updated_at=timezone.now())
+                except DatabaseError:
+                    LOG.exception("Failed to mark operation %s alive", operation.id)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, name="operation-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def run(operation: Operation) -> None:
+    try:
+        with heartbeat(operation):
+            resource_id = HANDLERS[operation.type](operation)
+    except Exception as e:
+        LOG.exception("Operation %s failed", operation.id)
+        operation.status = Operation.Status.FAILED
+        operation.error = str(e) or type(e).__name__
+    else:
+        operation.status = Operation.Status.SUCCEEDED
+        operation.progress = 100
+        operation.step = None
+        operation.resource_id = resource_id
+    operation.finished_at = timezone.now()
+    # fail_abandoned may have failed the operation meanwhile, do not overwrite that.
+    finished = Operation.objects.filter(id=operation.id, status=Operation.Status.RUNNING).update(
+        status=operation.status,
+        progress=operation.progress,
+        step=operation.step,
+        resource_id=operation.resource_id,
+        result=operation.result,
+        error=operation.error,
+        finished_at=operation.finished_at,
+        updated_at=operation.finished_at,
+    )
+    if not finished:
+        LOG.warning("Operation %s finished as %s after it was abandoned", operation.id, operation.status)
+
+
+def run_pending() -> bool:
+    """Run the oldest pending operation, if there is one."""
+    operation = claim()
+    if operation is None:
+        return False
+    run(operation)
+    return True
+
+
+def fail_abandoned() -> int:
+    """Fail the running operations that stopped reporting progress, and return how many."""
+    return Operation.objects.filter(
+        status=Operation.Status.RUNNING,
+        updated_at__lt=timezone.now() - timedelta(seconds=OPERATION_ABANDONED_AFTER),
+    ).update(
+        status=Operation.Status.FAILED,
+        error="The worker running the operation stopped",
+        finished_at=timezone.now(),
+    )
+
+
+# Progress of an operation waiting for a job of the agent, by job status.
+AGENT_JOB_PROGRESS = {
+    "PENDING": (20, "Waiting for the agent to start the job"),
+    "RUNNING": (50, "Waiting for the agent to finish the job"),
+}
+
+
+def _follow_agent_job(operation: Operation) -> Callable[[str], None]:
+    def on_poll(job_status: str) -> None:
+        set_progress(operation, *AGENT_JOB_PROGRESS.get(job_status, AGENT_JOB_PROGRESS["RUNNING"]))
+    return on_poll
+
+
+def _create_node(operation: Operation) -> UUID:
+    set_progress(operation, 10, "Creating the node with the agent")
+    return node_service.create(
+        operation.organization,
+        operation.parameters["type"],
+        operation.parameters["name"],
+    ).id
+
+
+def _create_nodes(operation: Operation) -> None:
+    set_progress(operation, 10, "Creating the nodes with the agent")
+    operation.result = [
+        dict(result, id=str(result["id"]) if result["id"] else None)
+        for result in node_service.create_batch(operation.organization, operation.parameters["nodes"])
+    ]
+
+
+def _create_channel(operation: Operation) -> UUID:
+    set_progress(operation, 10, "Creating the channel with the agent")
+    return channel_service.create(operation.organization, operation.parameters["name"]).id
+
+
+def _create_chaincode(operation: Operation) -> UUID:
+    parameters = dict(operation.parameters)
+    path = parameters.pop("package")
+    channel = Channel.objects.get(id=parameters.pop("channel"))
+    set_progress(operation, 10, "Installing and approving the chaincode with the agent")
+    try:
+        with default_storage.open(path) as package:
+            return create_chaincode(
+                package=File(package, name=os.path.basename(path)),
+                channel=channel,
+                user=operation.creator,
+                organization=operation.organization,
+                on_poll=_follow_agent_job(operation),
+                **parameters,
+            ).id
+    finally:
+        default_storage.delete(path)
+
+
+def _install_chaincode(operation: Operation) -> UUID:
+    chaincode = Chaincode.objects.get(id=operation.parameters["chaincode"])
+    set_progress(operation, 10, "Installing the chaincode with the agent")
+    operation.result = install_chaincode(operation.organization, chaincode, _follow_agent_job(operation))
+    return chaincode.id
+
+
+# Each handler returns the id of what it created, or sets the result of the operation.
+HANDLERS: Dict[str, Callable[[Operation], Optional[UUID]]] = {
+    Operation.Type.CREATE_NODE: _create_node,
+    Operation.Type.CREATE_NODES: _create_nodes,
+    Operation.Type.CREATE_CHANNEL: _create_channel,
+    Operation.Type.CREATE_CHAINCODE: _create_chaincode,
+    Operation.Type.INSTALL_CHAINCODE: _install_chaincode,
+}
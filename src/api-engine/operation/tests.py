@@ -0,0 +1,276 @@
+import os
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+
+import requests
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from chaincode.models import Chaincode
+from channel.models import Channel
+from node.models import Node
+from operation.models import Operation
+from operation.service import HANDLERS, claim, enqueue, fail_abandoned, run, run_pending, stage_file
+from organization.models import Organization
+from user.models import UserProfile
+
+
+class OperationTestCase(TestCase):
+    def setUp(self):
+        self.organization = Organization.objects.create(
+            name="org1.example.com",
+            agent_url="http://org1-agent.example.com",
+        )
+        self.user = UserProfile.objects.create(
+            username="admin",
+            email="admin@org1.example.com",
+            organization=self.organization,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @mock.patch("node.service.get_agent_client")
+    def test_node_is_created_by_the_worker(self, get_agent_client):
+        client = get_agent_client.return_value
+        client.post.return_value.json.return_value = {"tls": "tls"}
+
+        response = self.client.post(reverse("node-list"), {"name": "peer0", "type": "PEER"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["data"]["status"], Operation.Status.PENDING)
+        client.post.assert_not_called()
+
+        self.assertTrue(run_pending())
+        self.assertFalse(run_pending())
+
+        response = self.client.get(reverse("operation-detail", args=[response.data["data"]["id"]]))
+        self.assertEqual(response.data["data"]["status"], Operation.Status.SUCCEEDED)
+        self.assertEqual(response.data["data"]["progress"], 100)
+        node = Node.objects.get(name="peer0")
+        self.assertEqual(response.data["data"]["resource_id"], str(node.id))
+
+    @mock.patch("channel.service.get_agent_client")
+    def test_agent_errors_fail_the_operation(self, get_agent_client):
+        get_agent_client.return_value.post.side_effect = requests.ConnectionError("agent unreachable")
+        operation = enqueue(self.organization, Operation.Type.CREATE_CHANNEL, dict(name="testchannel"))
+
+        with self.assertLogs("operation.service", "ERROR"):
+            run_pending()
+
+        operation.refresh_from_db()
+        self.assertEqual(operation.status, Operation.Status.FAILED)
+        self.assertEqual(operation.error, "agent unreachable")
+        self.assertIsNotNone(operation.finished_at)
+        self.assertFalse(Channel.objects.exists())
+
+    def test_oldest_pending_operation_is_claimed_first(self):
+        operations = [
+            enqueue(self.organization, Operation.Type.CREATE_CHANNEL, dict(name=name))
+            for name in ("first", "second")
+        ]
+
+        self.assertEqual([str(claim().id), str(claim().id)], [operation.id for operation in operations])
+        self.assertIsNone(claim())
+        self.assertEqual(
+            set(Operation.objects.values_list("status", flat=True)),
+            {Operation.Status.RUNNING},
+        )
+
+    def test_abandoned_operations_are_failed(self):
+        running, abandoned = [
+            enqueue(self.organization, Operation.Type.CREATE_CHANNEL, dict(name=name))
+            for name in ("running", "abandoned")
+        ]
+        Operation.objects.update(status=Operation.Status.RUNNING)
+        Operation.objects.filter(id=abandoned.id).update(updated_at=timezone.now() - timedelta(days=1))
+
+        self.assertEqual(fail_abandoned(), 1)
+        self.assertEqual(
+            {str(id): status for id, status in Operation.objects.values_list("id", "status")},
+            {running.id: Operation.Status.RUNNING, abandoned.id: Operation.Status.FAILED},
+        )
+
+    @mock.patch("channel.service.get_agent_client")
+    def test_abandoned_operation_stays_failed(self, get_agent_client):
+        enqueue(self.organization, Operation.Type.CREATE_CHANNEL, dict(name="testchannel"))
+        operation = claim()
+
+        def abandon(*args, **kwargs):
+            Operation.objects.filter(id=operation.id).update(updated_at=timezone.now() - timedelta(days=1))
+            fail_abandoned()
+            return mock.Mock()
+        get_agent_client.return_value.post.side_effect = abandon
+
+        with self.assertLogs("operation.service", "WARNING"):
+            run(operation)
+
+        operation.refresh_from_db()
+        self.assertEqual(operation.status, Operation.Status.FAILED)
+        self.assertIsNone(operation.resource_id)
+
+    def test_invalid_operation_id_is_not_found(self):
+        response = self.client.get(reverse("operation-detail", args=["not-a-uuid"]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_operations_of_other_organizations_are_hidden(self):
+        other = Organization.objects.create(name="org2.example.com", agent_url="http://org2-agent.example.com")
+        operation = enqueue(other, Operation.Type.CREATE_CHANNEL, dict(name="testchannel"))
+
+        response = self.client.get(reverse("operation-detail", args=[operation.id]))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(reverse("operation-list")).data["data"]["total"], 0)
+
+    def chaincode_operation(self, channel: Channel, media_root: str) -> Operation:
+        with override_settings(MEDIA_ROOT=media_root):
+            return enqueue(
+                self.organization,
+                Operation.Type.CREATE_CHAINCODE,
+                dict(
+                    name="basic",
+                    version="1.0",
+                    sequence=1,
+                    package=stage_file(SimpleUploadedFile("basic.tar.gz", b"package")),
+                    channel=str(channel.id),
+                ),
+                self.user,
+            )
+
+    def agent_jobs(self, client, *jobs):
+        client.post.return_value.json.return_value = {
+            "package_id": "basic_1:" + "a" * 64,
+            "label": "basic_1",
+            "language": "golang",
+            "job_id": "00000000-0000-0000-0000-000000000001",
+        }
+        client.get.return_value.json.side_effect = [
+            dict(dict(result=None, error=""), **job) for job in jobs
+        ]
+
+    @mock.patch("common.agent.AGENT_JOB_POLL_INTERVAL", 0)
+    @mock.patch("chaincode.service.get_agent_client")
+    def test_chaincode_is_stored_once_the_agent_job_succeeds(self, get_agent_client):
+        client = get_agent_client.return_value
+        self.agent_jobs(client, dict(status="PENDING"), dict(status="RUNNING"), dict(status="SUCCEEDED"))
+        steps = []
+        set_progress = mock.MagicMock(side_effect=lambda operation, progress, step: steps.append(progress))
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            operation = self.chaincode_operation(Channel.objects.create(name="testchannel"), media_root)
+
+            with mock.patch("operation.service.set_progress", set_progress):
+                run_pending()
+
+            Chaincode.objects.get().package.close()
+        operation.refresh_from_db()
+        self.assertEqual(operation.status, Operation.Status.SUCCEEDED)
+        self.assertEqual(steps, [10, 20, 50])
+        self.assertEqual(
+            client.get.call_args_list,
+            [mock.call("jobs/00000000-0000-0000-0000-000000000001")] * 3,
+        )
+
+    @mock.patch("common.agent.AGENT_JOB_POLL_INTERVAL", 0)
+    @mock.patch("chaincode.service.get_agent_client")
+    def test_failed_agent_job_fails_the_operation(self, get_agent_client):
+        self.agent_jobs(get_agent_client.return_value, dict(status="RUNNING"), dict(
+            status="FAILED",
+            error="Traceback (most recent call last):\nRuntimeError: Failed to install basic on any peer\n",
+        ))
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            operation = self.chaincode_operation(Channel.objects.create(name="testchannel"), media_root)
+
+            with self.assertLogs("operation.service", "ERROR"):
+                run_pending()
+
+        operation.refresh_from_db()
+        self.assertEqual(operation.status, Operation.Status.FAILED)
+        self.assertEqual(operation.error, "RuntimeError: Failed to install basic on any peer")
+        self.assertFalse(Chaincode.objects.exists())
+
+    @mock.patch("common.agent.AGENT_JOB_POLL_INTERVAL", 0)
+    @mock.patch("chaincode.service.get_agent_client")
+    def test_chaincode_is_installed_by_the_worker(self, get_agent_client):
+        client = get_agent_client.return_value
+        client.put.return_value.json.return_value = {"job_id": "00000000-0000-0000-0000-000000000002"}
+        installed = [{"peer": "peer0.org1.example.com", "installed": True, "error": None}]
+        client.get.return_value.json.return_value = dict(status="SUCCEEDED", result=installed, error="")
+        channel = Channel.objects.create(name="testchannel")
+        channel.organizations.add(self.organization)
+        chaincode = Chaincode.objects.create(
+            package_id="basic_1:" + "a" * 64,
+            package="testchannel/basic_1.tar.gz",
+            name="basic",
+            version="1.0",
+            sequence=1,
+            label="basic_1",
+            channel=channel,
+            language="golang",
+        )
+
+        response = self.client.put(reverse("chaincode-install", args=[chaincode.id]))
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        client.put.assert_not_called()
+        run_pending()
+        operation = Operation.objects.get(id=response.data["data"]["id"])
+        self.assertEqual(operation.status, Operation.Status.SUCCEEDED)
+        self.assertEqual(operation.result, installed)
+        self.assertEqual(str(operation.resource_id), str(chaincode.id))
+
+    @mock.patch("chaincode.service.get_agent_client")
+    def test_staged_chaincode_package_is_removed(self, get_agent_client):
+        get_agent_client.return_value.post.return_value.json.return_value = {
+            "package_id": "basic_1:" + "a" * 64,
+            "label": "basic_1",
+            "language": "golang",
+        }
+        channel = Channel.objects.create(name="testchannel")
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            path = stage_file(SimpleUploadedFile("basic.tar.gz", b"package"))
+            enqueue(
+                self.organization,
+                Operation.Type.CREATE_CHAINCODE,
+                dict(name="basic", version="1.0", sequence=1, package=path, channel=str(channel.id)),
+                self.user,
+            )
+
+            run_pending()
+
+            chaincode = Chaincode.objects.get()
+            self.assertEqual(chaincode.creator.email, self.user.email)
+            self.assertEqual(chaincode.package.read(), b"package")
+            chaincode.package.close()
+            self.assertFalse(os.path.exists(os.path.join(media_root, path)))
+
+
+# The heartbeat writes from its own thread, which needs committed rows.
+class OperationHeartbeatTestCase(TransactionTestCase):
+    def setUp(self):
+        self.organization = Organization.objects.create(
+            name="org1.example.com",
+            agent_url="http://org1-agent.example.com",
+        )
+
+    @mock.patch("operation.service.OPERATION_HEARTBEAT_INTERVAL", 0.01)
+    def test_long_operation_is_not_abandoned(self):
+        operation = enqueue(self.organization, Operation.Type.CREATE_CHANNEL, dict(name="testchannel"))
+        abandoned = []
+
+        def create_channel(operation):
+            # Nothing is reported for longer than OPERATION_ABANDONED_AFTER.
+            Operation.objects.filter(id=operation.id).update(updated_at=timezone.now() - timedelta(days=1))
+            time.sleep(0.1)
+            abandoned.append(fail_abandoned())
+
+        with mock.patch.dict(HANDLERS, {Operation.Type.CREATE_CHANNEL: create_channel}):
+            run_pending()
+
+        self.assertEqual(abandoned, [0])
+        operation.refresh_from_db()
+        self.assertEqual(operation.status, Operation.Status.SUCCEEDED)
@@ -0,0 +1,58 @@
+from django.core.exceptions import ValidationError
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import viewsets, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from api.common import ok
+from api.common.response import make_response_serializer
+from api.utils.common import with_common_response
+from common.responses import err
+from common.serializers import PageQuerySerializer
+from operation.models import Operation
+from operation.serializers import OperationList, OperationResponse
+
+
+class OperationViewSet(viewsets.ViewSet):
+    permission_classes = [
+        IsAuthenticated,
+    ]
+
+    @swagger_auto_schema(
+        operation_summary="List the operations of the current organization",
+        query_serializer=PageQuerySerializer(),
+        responses=with_common_response(
+            {status.HTTP_200_OK: make_response_serializer(OperationList)}
+        ),
+    )
+    def list(self, request):
+        serializer = PageQuerySerializer(data=request.GET)
+        page = serializer.get_page(Operation.objects.filter(organization=request.user.organization))
+        return Response(
+            status=status.HTTP_200_OK,
+            data=ok(OperationList({
+                "total": page.total,
+                "total_estimated": page.total_estimated,
+                "next_cursor": page.next_cursor,
+                "data": OperationResponse(page.object_list, many=True).data,
+            }).data),
+        )
+
+    @swagger_auto_schema(
+        operation_summary="Get an operation of the current organization",
+        responses=with_common_response(
+            {status.HTTP_200_OK: make_response_serializer(OperationResponse)}
+        ),
+    )
+    def retrieve(self, request, pk=None):
+        try:
+            operation = Operation.objects.get(pk=pk, organization=request.user.organization)
+        except (Operation.DoesNotExist, ValidationError):
+            return Response(
+                status=status.HTTP_404_NOT_FOUND,
+                data=err("Operation not found")
+            )
+        return Response(
+            status=status.HTTP_200_OK,
+            data=ok(OperationResponse(operation).data),
+        )
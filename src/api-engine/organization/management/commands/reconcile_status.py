@@ -0,0 +1,37 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from organization.models import Organization
+from organization.service import reconcile_status
+
+LOG = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Check the status of the nodes and chaincodes of every organization "
+        "with its agent and store it, so that lists do not call the agents."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Keep reconciling, this many seconds apart, instead of once")
+
+    def handle(self, *args, **options):
+        while True:
+            for organization in Organization.objects.all():
+                try:
+                    reconcile_status(organization)
+                except Exception:
+                    # An unreachable agent must not keep the others stale.
+                    LOG.exception("Failed to reconcile the status of %s", organization.name)
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
+            # Do not keep a connection the database dropped while sleeping.
+            close_old_connections()
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='organization',
+            index=models.Index(fields=['-created_at', '-id'], name='organizatio_created_a5e009_idx'),
+        ),
+    ]
@@ -27,3 +27,6 @@ class Organization(models.Model):
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["-created_at", "-id"]),
+        ]
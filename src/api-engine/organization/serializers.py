@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from api.common.serializers import ListResponseSerializer
+from common.serializers import ListResponseSerializer
 from organization.models import Organization
 
 
@@ -1,7 +1,7 @@
-from common.utils import safe_urljoin
-
-import requests
-
+from chaincode.models import Chaincode
+from chaincode.service import refresh_chaincodes_status
+from common.agent import get_agent_client
+from node.service import refresh_nodes_status
 from organization.models import Organization
 
 
@@ -13,5 +13,18 @@ def create_organization(org_name: str, agent_url: str) -> Organization:
 
 
 def _create_organization(org_name: str, agent_url: str):
-    requests.get(safe_urljoin(agent_url, "health")).raise_for_status()
-    requests.post(safe_urljoin(agent_url, "organizations"), json=dict(name=org_name)).raise_for_status()
+    get_agent_client(agent_url).post("organizations", json=dict(name=org_name)).raise_for_status()
+
+
+def reconcile_status(organization: Organization) -> None:
+    """Store the status of the nodes and chaincodes of the organization, with one agent call for each."""
+    nodes = list(organization.nodes.all())
+    if nodes:
+        refresh_nodes_status(organization, nodes)
+    chaincodes = list(
+        Chaincode.objects
+        .filter(channel__organizations=organization)
+        .select_related("channel")
+        .distinct())
+    if chaincodes:
+        refresh_chaincodes_status(organization, chaincodes)
@@ -1,3 +1,178 @@
-from django.test import TestCase
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from common import agent
+from common.agent import AgentClient
+from node.models import Node
+from organization.models import Organization
+from user.models import UserProfile
+
+
+class FakeAgent(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.answer()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.answer()
+
+    def answer(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.command, self.path, self.client_address[1]))
+            status = server.statuses.pop(0) if server.statuses and self.path != "/health" else 200
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class AgentClientTestCase(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeAgent)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.statuses = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        patcher = mock.patch.object(agent, "AGENT_RETRY_BACKOFF", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = AgentClient("http://127.0.0.1:{}".format(self.server.server_port))
+        self.addCleanup(self.client.session.close)
+
+    def paths(self):
+        return [(method, path) for method, path, _ in self.server.requests]
+
+    def test_health_is_checked_once_and_connections_are_reused(self):
+        for _ in range(3):
+            self.client.get("nodes/operations").raise_for_status()
+        self.client.post("nodes/status", json={}).raise_for_status()
+
+        self.assertEqual(self.paths(), [
+            ("GET", "/health"),
+            ("GET", "/nodes/operations"),
+            ("GET", "/nodes/operations"),
+            ("GET", "/nodes/operations"),
+            ("POST", "/nodes/status"),
+        ])
+        self.assertEqual(len({port for _, _, port in self.server.requests}), 1)
+
+    def test_only_gets_are_retried(self):
+        self.server.statuses = [503, 200]
+        self.assertEqual(self.client.get("nodes/operations").status_code, 200)
+
+        self.server.statuses = [503, 200]
+        self.assertEqual(self.client.post("nodes/status", json={}).status_code, 503)
+        self.assertEqual(self.paths().count(("POST", "/nodes/status")), 1)
+
+    def test_unreachable_agent_is_checked_again(self):
+        self.client.get("nodes/operations")
+        with mock.patch.object(self.client.session, "request", side_effect=requests.ConnectionError):
+            with self.assertRaises(requests.ConnectionError):
+                self.client.get("nodes/operations")
+        self.client.get("nodes/operations")
+
+        self.assertEqual(self.paths().count(("GET", "/health")), 2)
+
+
+class ReconcileStatusTestCase(TestCase):
+    def setUp(self):
+        self.organizations = [
+            Organization.objects.create(name=name, agent_url="http://{}-agent".format(name))
+            for name in ("org1.example.com", "org2.example.com")
+        ]
+        for organization in self.organizations:
+            Node.objects.create(name="peer0", type=Node.Type.PEER, tls="", organization=organization)
+
+    @mock.patch("node.service.get_agent_client")
+    def test_unreachable_agent_does_not_stop_the_others(self, get_agent_client):
+        reachable = mock.Mock()
+        reachable.post.return_value.status_code = 200
+        reachable.post.return_value.json.return_value = {
+            "nodes": [{"type": "PEER", "name": "peer0", "status": "running"}],
+        }
+        unreachable = mock.Mock()
+        unreachable.post.side_effect = requests.ConnectionError
+        get_agent_client.side_effect = lambda agent_url: (
+            unreachable if agent_url == "http://org1.example.com-agent" else reachable
+        )
+
+        with self.assertLogs("organization.management.commands.reconcile_status", "ERROR"):
+            call_command("reconcile_status")
+
+        self.assertEqual(
+            dict(Node.objects.values_list("organization__name", "status")),
+            {"org1.example.com": None, "org2.example.com": "running"},
+        )
+
+
+class OrganizationListTestCase(TestCase):
+    def setUp(self):
+        self.organizations = [
+            Organization.objects.create(name="org{}.example.com".format(i), agent_url="http://org{}-agent".format(i))
+            for i in range(5)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(UserProfile.objects.create(
+            username="admin",
+            email="admin@org0.example.com",
+            organization=self.organizations[0],
+        ))
+
+    def list(self, **params):
+        response = self.client.get(reverse("organization-list"), {"per_page": 2, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["data"]
+
+    def test_cursors_walk_every_organization_once(self):
+        # Rows created at the same time are told apart by id.
+        Organization.objects.update(created_at=timezone.now())
+        ids, cursor = [], None
+        while True:
+            page = self.list(cursor=cursor) if cursor else self.list()
+            ids += [organization["id"] for organization in page["data"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        self.assertEqual(sorted(ids), sorted(organization.id for organization in self.organizations))
+        self.assertEqual(ids, [organization["id"] for organization in self.list(per_page=5)["data"]])
+
+    def test_pages_and_cursors_agree(self):
+        first = self.list()
+        self.assertEqual(self.list(cursor=first["next_cursor"])["data"], self.list(page=2)["data"])
+
+    def test_total_is_optional(self):
+        page = self.list()
+        self.assertEqual(page["total"], 5)
+        self.assertFalse(page["total_estimated"])
+        self.assertIsNone(self.list(count="none")["total"])
+
+    def test_estimated_total(self):
+        page = self.list(count="estimate")
+        self.assertIsInstance(page["total"], int)
+        self.assertGreaterEqual(page["total"], 0)
+        # Only PostgreSQL has a planner to ask, the others count.
+        if not page["total_estimated"]:
+            self.assertEqual(page["total"], 5)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(reverse("organization-list"), dict(cursor="not a cursor"))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,6 +1,5 @@
 from typing import Optional
 
-from django.core.paginator import Paginator
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
@@ -49,13 +48,15 @@ class OrganizationViewSet(viewsets.ViewSet):
     )
     def list(self, request):
         serializer = PageQuerySerializer(data=request.GET)
-        p = serializer.get_paginator(Organization.objects.all())
+        page = serializer.get_page(Organization.objects.all())
         return Response(
             status=status.HTTP_200_OK,
             data=ok(OrganizationList({
-                "total": p.count,
+                "total": page.total,
+                "total_estimated": page.total_estimated,
+                "next_cursor": page.next_cursor,
                 "data": OrganizationResponse(
-                    p.page(serializer.data["page"]).object_list,
+                    page.object_list,
                     many=True
                 ).data
             }).data)
@@ -39,6 +39,9 @@ class UserProfile(AbstractUser):
         verbose_name = "User Info"
         verbose_name_plural = verbose_name
         ordering = ["-date_joined"]
+        indexes = [
+            models.Index(fields=["organization", "-created_at", "-id"]),
+        ]
 
     def __str__(self):
         return self.username
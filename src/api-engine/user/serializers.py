@@ -4,7 +4,7 @@
 from typing import Dict, Any
 
 from rest_framework import serializers
-from api.common.serializers import ListResponseSerializer
+from common.serializers import ListResponseSerializer
 from organization.serializers import OrganizationID, OrganizationResponse
 from user.models import UserProfile
 from user.service import create_user
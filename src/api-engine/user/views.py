@@ -41,13 +41,15 @@ class UserViewSet(viewsets.ViewSet):
     )
     def list(self, request: Request) -> Response:
         serializer = PageQuerySerializer(data=request.GET)
-        p = serializer.get_paginator(UserProfile.objects.filter(organization=request.user.organization))
+        page = serializer.get_page(UserProfile.objects.filter(organization=request.user.organization))
         return Response(
             status=status.HTTP_200_OK,
             data=ok(UserList({
-                "total": p.count,
+                "total": page.total,
+                "total_estimated": page.total_estimated,
+                "next_cursor": page.next_cursor,
                 "data": UserInfo(
-                    p.page(serializer.data['page']).object_list,
+                    page.object_list,
                     many=True
                 ).data,
             }).data),
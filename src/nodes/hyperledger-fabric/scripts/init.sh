@@ -8,6 +8,7 @@
 # HLF_NODE_BOOTSTRAP_BLOCK: store a base64 encoded zipped bootstrap block, which is no longer needed for HLF 2.5.10 or higher versions
 # HLF_NODE_PEER_CONFIG: store a base64 encoded zipped peer configuration file (core.yaml)
 # HLF_NODE_ORDERER_CONFIG: store a base64 encoded zipped orderer configuration file (orderer.yaml)
+# HLF_NODE_ARCHIVE: path of a directory uploaded into the container before start, holding "msp", "tls" and the configuration file
 
 
 # storeFile will read the variable with given name, and store its data under the given path
@@ -53,6 +54,20 @@ do
     storeFile ${name} ${cfg_path}
 done
 
+# Move the uploaded files under the ${cfg_path}, they are only there on the first start
+if [ ! -z "${HLF_NODE_ARCHIVE}" ] && [ -d ${HLF_NODE_ARCHIVE} ]; then
+    echo "Store data in ${HLF_NODE_ARCHIVE} to ${cfg_path}"
+    for name in msp tls; do
+        if [ -d ${HLF_NODE_ARCHIVE}/${name} ] && [ -d ${cfg_path}/${name} ]; then
+            rm -rf ${cfg_path}/${name}.bak
+            mv ${cfg_path}/${name} ${cfg_path}/${name}.bak
+        fi
+    done
+    cp -a ${HLF_NODE_ARCHIVE}/. ${cfg_path}/
+    rm -rf ${HLF_NODE_ARCHIVE}
+    ls ${cfg_path}
+fi
+
 # Run optional cmd
 if [[ ! -z "${cmd}" ]]; then
     echo "Run ${cmd}"